@@ -24,6 +24,8 @@ class MqttSnConstants:
     DEFAULT_PORT = 2442
     DEFAULT_TIMEOUT = 60
     DEFAULT_KEEP_ALIVE = 30
+    # Max number of requests waiting for an acknowledge in pipelined calls
+    DEFAULT_WINDOW = 16
     
     MAX_PACKET_LENGTH = 255
     MAX_PAYLOAD_LENGTH = MAX_PACKET_LENGTH - 7
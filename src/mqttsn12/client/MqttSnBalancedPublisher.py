@@ -0,0 +1,166 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import bisect
+import hashlib
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Dict, List, Optional
+
+from mqttsn12.client.MqttSnClient import MqttSnClient
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+class MqttSnBalancedPublisher:
+    """
+    Spread publishes over a pool of gateway sessions by consistent hashing of the topic name.
+
+    A topic always maps to the same session and every session has a single
+    sending thread, so messages of one topic keep their order while
+    different topics are published in parallel on different gateways.
+    Adding or removing a gateway only moves the topics owned by that
+    gateway; pending publishes are drained before the ring changes.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_VIRTUAL_NODES = 100
+
+    def __init__(self, virtual_nodes: int = DEFAULT_VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self.ring_hashes: List[int] = []
+        self.ring_names: List[str] = []
+        self.sessions: Dict[str, MqttSnClient] = {}
+        self.executors: Dict[str, ThreadPoolExecutor] = {}
+        self.pending = set()
+        # 'lock' guards the ring, 'stats_lock' the counters updated by the sending threads
+        self.lock = threading.RLock()
+        self.stats_lock = threading.Lock()
+        self.started = time.monotonic()
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+        self.messages_by_gateway: Dict[str, int] = {}
+
+    def hash(self, value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def add_gateway(self, client: MqttSnClient, name: Optional[str] = None) -> str:
+        """Add an opened and connected session to the pool. Returns the gateway name."""
+        if name is None:
+            name = f"{client.address}:{client.port}"
+        with self.lock:
+            if name in self.sessions:
+                raise MqttSnClientException(f"Gateway '{name}' already in the pool.")
+            self.flush()
+            self.sessions[name] = client
+            self.executors[name] = ThreadPoolExecutor(max_workers=1)
+            self.messages_by_gateway.setdefault(name, 0)
+            for i in range(self.virtual_nodes):
+                point = self.hash(f"{name}#{i}")
+                index = bisect.bisect(self.ring_hashes, point)
+                self.ring_hashes.insert(index, point)
+                self.ring_names.insert(index, name)
+        self.logger.info(f"Gateway {name} added to the pool")
+        return name
+
+    def remove_gateway(self, name: str) -> MqttSnClient:
+        """Remove a gateway from the pool, returning its session (still connected)"""
+        with self.lock:
+            if name not in self.sessions:
+                raise MqttSnClientException(f"Gateway '{name}' not in the pool.")
+            self.flush()
+            keep = [i for i, n in enumerate(self.ring_names) if n != name]
+            self.ring_hashes = [self.ring_hashes[i] for i in keep]
+            self.ring_names = [self.ring_names[i] for i in keep]
+            self.executors.pop(name).shutdown(wait=True)
+            client = self.sessions.pop(name)
+        self.logger.info(f"Gateway {name} removed from the pool")
+        return client
+
+    def get_gateway(self, topic_name: str) -> str:
+        """Name of the gateway owning 'topic_name'"""
+        with self.lock:
+            if len(self.ring_hashes) == 0:
+                raise MqttSnClientException("No gateway in the pool.")
+            index = bisect.bisect(self.ring_hashes, self.hash(topic_name)) % len(self.ring_hashes)
+            return self.ring_names[index]
+
+    def send_publish(self, topic_name: str, data: bytes, qos: int, retain: bool = False) -> Future:
+        """Queue a publish on the gateway owning the topic. The Future resolves to the topic ID."""
+        with self.lock:
+            name = self.get_gateway(topic_name)
+            future = self.executors[name].submit(self.publish_on, name, topic_name, data, qos, retain)
+            with self.stats_lock:
+                self.pending.add(future)
+        future.add_done_callback(self.publish_done)
+        return future
+
+    def publish_done(self, future: Future) -> None:
+        with self.stats_lock:
+            self.pending.discard(future)
+
+    def publish_on(self, name: str, topic_name: str, data: bytes, qos: int, retain: bool) -> int:
+        try:
+            topic_id = self.sessions[name].send_publish(topic_name, data, qos, retain)
+        except MqttSnClientException:
+            with self.stats_lock:
+                self.errors += 1
+            raise
+        with self.stats_lock:
+            self.messages += 1
+            self.bytes += len(data)
+            self.messages_by_gateway[name] += 1
+        return topic_id
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every queued publish. Returns False on timeout."""
+        with self.stats_lock:
+            pending = list(self.pending)
+        if len(pending) == 0:
+            return True
+        _, not_done = wait(pending, timeout=timeout)
+        return len(not_done) == 0
+
+    def get_throughput(self) -> Dict:
+        """Aggregate counters of the pool since creation"""
+        with self.stats_lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "messages": self.messages,
+                "bytes": self.bytes,
+                "errors": self.errors,
+                "elapsed": elapsed,
+                "messages_per_second": self.messages / elapsed if elapsed > 0 else 0.0,
+                "bytes_per_second": self.bytes / elapsed if elapsed > 0 else 0.0,
+                "by_gateway": dict(self.messages_by_gateway),
+            }
+
+    def close(self) -> None:
+        """Drain and stop the sending threads. Sessions are left to the caller."""
+        self.flush()
+        with self.lock:
+            for executor in self.executors.values():
+                executor.shutdown(wait=True)
+            self.executors.clear()
+            self.sessions.clear()
+            self.ring_hashes = []
+            self.ring_names = []
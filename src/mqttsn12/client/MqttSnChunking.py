@@ -0,0 +1,193 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+import logging
+from typing import Dict, Hashable, Iterator, Optional, Union
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+# Chunk header: magic, transfer ID, chunk sequence, chunk count, object length, chunk offset, object CRC-32
+CHUNK_HEADER = struct.Struct(">4sIIIQQI")
+CHUNK_MAGIC = b"MSCK"
+# Largest chunk whose extended PUBLISH (9-byte header) fits in one received datagram
+DEFAULT_CHUNK_SIZE = MqttSnConstants.MAX_PACKET_LENGTH_EXTENDED - 9 - CHUNK_HEADER.size
+
+def is_chunk(payload) -> bool:
+    return len(payload) >= CHUNK_HEADER.size and bytes(payload[:4]) == CHUNK_MAGIC
+
+def new_transfer_id() -> int:
+    return random.getrandbits(32)
+
+def encode_chunks(data, chunk_size: int, transfer_id: Optional[int] = None) -> Iterator[bytes]:
+    """Payloads (header + data) of the chunks of 'data', at most 'chunk_size' data bytes each"""
+    if chunk_size < 1:
+        raise MqttSnClientException("Chunk size must be at least 1 byte.")
+    if transfer_id is None:
+        transfer_id = new_transfer_id()
+    view = memoryview(data).cast("B")
+    length = len(view)
+    count = max(1, (length + chunk_size - 1) // chunk_size)
+    crc = zlib.crc32(view)
+    for sequence in range(count):
+        offset = sequence * chunk_size
+        yield CHUNK_HEADER.pack(CHUNK_MAGIC, transfer_id, sequence, count, length, offset, crc) + view[offset:offset + chunk_size]
+
+class MqttSnChunkAssembler:
+    """
+    Reassembly of one chunked object, in memory or in a file.
+
+    Chunks can arrive in any order and more than once; the object is
+    complete when every chunk arrived and its CRC-32 matches.
+    """
+
+    def __init__(self, length: int, count: int, crc: int, path: Optional[str] = None):
+        self.length = length
+        self.count = count
+        self.crc = crc
+        self.path = path
+        self.received = set()
+        self.updated = time.monotonic()
+        if path is None:
+            self.buffer = bytearray(length)
+            self.file = None
+        else:
+            self.buffer = None
+            try:
+                self.file = open(path + ".part", "w+b")
+                self.file.truncate(length)
+            except OSError as e:
+                raise MqttSnClientException(f"Unable to create '{path}.part': {e}")
+
+    def add(self, sequence: int, offset: int, data) -> bool:
+        """Store a chunk. Returns True when the object is complete."""
+        if sequence >= self.count or offset + len(data) > self.length:
+            raise MqttSnClientException(f"Chunk {sequence} out of range ({offset}+{len(data)} > {self.length})")
+        self.updated = time.monotonic()
+        if sequence in self.received:
+            return False
+        if self.file is None:
+            self.buffer[offset:offset + len(data)] = data
+        else:
+            try:
+                self.file.seek(offset)
+                self.file.write(data)
+            except OSError as e:
+                raise MqttSnClientException(f"Unable to write '{self.path}.part': {e}")
+        self.received.add(sequence)
+        return len(self.received) == self.count
+
+    def result(self) -> Union[memoryview, str]:
+        """The object (memoryview) or the path of its file, once the CRC is checked"""
+        if self.file is None:
+            crc = zlib.crc32(self.buffer)
+        else:
+            crc = 0
+            self.file.seek(0)
+            for block in iter(lambda: self.file.read(1 << 20), b""):
+                crc = zlib.crc32(block, crc)
+            self.file.close()
+        if crc != self.crc:
+            self.discard()
+            raise MqttSnClientException(f"Chunked object CRC mismatch: {crc:08x} instead of {self.crc:08x}")
+        if self.file is None:
+            return memoryview(self.buffer)
+        try:
+            os.replace(self.path + ".part", self.path)
+        except OSError as e:
+            raise MqttSnClientException(f"Unable to rename '{self.path}.part': {e}")
+        return self.path
+
+    def discard(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            try:
+                os.remove(self.path + ".part")
+            except OSError:
+                pass
+
+class MqttSnReassembler:
+    """
+    Reassembly of the chunked objects of many senders, keyed by topic and
+    transfer ID. Objects are rebuilt in memory, or in 'directory' when set.
+    Transfers without new chunks for 'timeout' seconds are dropped.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_TIMEOUT = 30.0
+    DEFAULT_MAX_LENGTH = 64 * 1024 * 1024
+
+    def __init__(self, directory: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT, max_length: int = DEFAULT_MAX_LENGTH):
+        self.directory = directory
+        self.timeout = timeout
+        self.max_length = max_length
+        self.transfers: Dict[Hashable, MqttSnChunkAssembler] = {}
+        self.completed = 0
+        self.failed = 0
+        # add() may run on the inbound thread while expire() runs on the polling one
+        self.lock = threading.Lock()
+
+    def add(self, key: Hashable, payload) -> Optional[Union[memoryview, str]]:
+        """Store a chunk of the transfer of 'key'. Returns the object once complete, None before."""
+        with self.lock:
+            magic, transfer_id, sequence, count, length, offset, crc = CHUNK_HEADER.unpack_from(payload)
+            transfer_key = (key, transfer_id)
+            assembler = self.transfers.get(transfer_key)
+            if assembler is None:
+                if length > self.max_length:
+                    self.failed += 1
+                    raise MqttSnClientException(f"Chunked object too big: {length} bytes (max {self.max_length})")
+                path = None
+                if self.directory is not None:
+                    path = os.path.join(self.directory, f"{transfer_id:08x}")
+                assembler = MqttSnChunkAssembler(length, count, crc, path)
+                self.transfers[transfer_key] = assembler
+
+            try:
+                if not assembler.add(sequence, offset, memoryview(payload)[CHUNK_HEADER.size:]):
+                    return None
+                del self.transfers[transfer_key]
+                result = assembler.result()
+            except MqttSnClientException:
+                self.transfers.pop(transfer_key, None)
+                assembler.discard()
+                self.failed += 1
+                raise
+            self.completed += 1
+            return result
+
+    def expire(self) -> int:
+        """Drop the stalled transfers. Returns how many were dropped."""
+        with self.lock:
+            now = time.monotonic()
+            expired = [key for key, assembler in self.transfers.items() if now - assembler.updated >= self.timeout]
+            for key in expired:
+                assembler = self.transfers.pop(key)
+                assembler.discard()
+                self.failed += 1
+                self.logger.warning(f"Transfer {key[1]:08x} on '{key[0]}' timed out: {len(assembler.received)}/{assembler.count} chunks")
+            return len(expired)
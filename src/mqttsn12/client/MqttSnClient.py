@@ -20,17 +20,32 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import asyncio
+import mmap
+import os
+import select
 import socket
 import struct
 import threading
 import time
 import random
 import logging
+from array import array
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError
-from typing import Dict, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 
 from mqttsn12.MqttSnConstants import MqttSnConstants
 from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnTopicCatalog import MqttSnTopicCatalog
+from mqttsn12.client.MqttSnTopicAliases import MqttSnTopicAliases
+from mqttsn12.client.MqttSnTopicRegistry import MqttSnTopicRegistry
+from mqttsn12.client.MqttSnDispatcher import MqttSnDispatcher
+from mqttsn12.client.MqttSnInboundQueue import MqttSnInboundQueue
+from mqttsn12.client.MqttSnSchema import MqttSnSchema
+from mqttsn12.client.MqttSnSeries import decode_series, encode_series, is_series
+from mqttsn12.client.MqttSnCoalescing import MqttSnCoalescer, decode_aggregate, is_aggregate
+from mqttsn12.client.MqttSnCompression import MqttSnCompression, is_compressed
+from mqttsn12.client.MqttSnChunking import CHUNK_HEADER, DEFAULT_CHUNK_SIZE, MqttSnReassembler, encode_chunks, is_chunk, new_transfer_id
 from mqttsn12.packets import (
     AdvertisePacket,
     ConnackPacket,
@@ -65,6 +80,7 @@ from mqttsn12.packets import (
 #!/usr/bin/env python3
 
 class MqttSnMessage:
+    __slots__ = ("topic_id", "topic_name", "qos", "retain", "payload", "schema", "timestamp")
     
     def __init__(self, topic_id=0, topic_name="", qos=0, retain=False, payload=b""):
         self.topic_id = topic_id
@@ -72,6 +88,14 @@ class MqttSnMessage:
         self.qos = qos
         self.retain = retain
         self.payload = payload
+        self.schema = None
+        self.timestamp = 0.0
+
+    def copy(self) -> "MqttSnMessage":
+        msg = MqttSnMessage(self.topic_id, self.topic_name, self.qos, self.retain, self.payload)
+        msg.schema = self.schema
+        msg.timestamp = self.timestamp
+        return msg
 
     # Getter e Setter per topic_id
     def get_topic_id(self):
@@ -110,6 +134,43 @@ class MqttSnMessage:
             raise MqttSnClientException("Payload must to be bytes or bytearray!")
         self.payload = value
 
+    # Receive time (seconds since the epoch), 0 for the messages not received
+    def get_timestamp(self) -> float:
+        return self.timestamp
+
+    def set_timestamp(self, value: float):
+        self.timestamp = value
+
+    # Schema of the payload, set by the client for the topics with one (see MqttSnClient.set_schema)
+    def get_schema(self) -> Optional[MqttSnSchema]:
+        return self.schema
+
+    def set_schema(self, value: Optional[MqttSnSchema]):
+        self.schema = value
+
+    def get_record(self):
+        """The record of the payload, decoded with the schema of the topic"""
+        if self.schema is None:
+            raise MqttSnClientException(f"No schema for topic '{self.topic_name}'")
+        return self.schema.unpack(self.payload)
+
+    def get_records(self) -> List:
+        """The records of a payload holding several of them"""
+        if self.schema is None:
+            raise MqttSnClientException(f"No schema for topic '{self.topic_name}'")
+        return self.schema.unpack_many(self.payload)
+
+    def is_series(self) -> bool:
+        return is_series(self.payload)
+
+    def get_series(self) -> array:
+        """Samples of a numeric series payload (see MqttSnSeries)"""
+        return decode_series(self.payload)
+
+    def set_series(self, values, typecode: Optional[str] = None, codec: Optional[int] = None):
+        """Payload encoding the numeric series 'values' (delta for integers, XOR for floats)"""
+        self.payload = encode_series(values, typecode, codec)
+
     def __str__(self):
         return (f"MqttSnMessage(topic_id={self.topic_id}, "
                 f"topic_name='{self.topic_name}', qos={self.qos}, "
@@ -119,9 +180,149 @@ class MqttSnListener:
     def message_arrived(self, msg: MqttSnMessage) -> None:
         """Callback interface for received messages"""
         pass
+
+    def flush(self, force: bool = True) -> None:
+        """Called on every polling() to deliver what the listener holds back (if 'force' is False, only what is due)"""
+        pass
+
+class MqttSnBatchListener(MqttSnListener):
+    """
+    Callback interface receiving the messages in batches.
+
+    messages_arrived() is called with up to 'max_messages' messages, or with
+    the messages collected so far once the oldest one has waited 'max_delay'
+    seconds, whichever comes first. The delay is checked only when the
+    client runs: on every polling(), on the attached event loop and by
+    flush_listeners(). Without those calls (no traffic, nobody polling) a
+    partial batch waits, so poll regularly or call flush_listeners(False)
+    from a timer. The last batch is delivered on close().
+    """
+    DEFAULT_MAX_MESSAGES = 100
+    DEFAULT_MAX_DELAY = 0.1
+
+    def __init__(self, max_messages: int = DEFAULT_MAX_MESSAGES, max_delay: float = DEFAULT_MAX_DELAY):
+        if max_messages < 1:
+            raise MqttSnClientException("Parameter 'max_messages' must be at least 1.")
+        self.max_messages = max_messages
+        self.max_delay = max_delay
+        self.batch = []
+        self.batch_started = 0.0
+        # Held while delivering, so batches are never delivered concurrently or out of order
+        self.lock = threading.RLock()
+
+    def messages_arrived(self, msgs: List[MqttSnMessage]) -> None:
+        """Callback interface for a batch of received messages"""
+        pass
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        with self.lock:
+            if len(self.batch) == 0:
+                self.batch_started = time.monotonic()
+            self.batch.append(msg)
+            if len(self.batch) >= self.max_messages:
+                self.flush()
+
+    def flush(self, force: bool = True) -> None:
+        """Deliver the pending batch (if 'force' is False, only when 'max_delay' has elapsed)"""
+        with self.lock:
+            if len(self.batch) == 0:
+                return
+            if not force and time.monotonic() - self.batch_started < self.max_delay:
+                return
+            batch = self.batch
+            self.batch = []
+            self.messages_arrived(batch)
+
+class MqttSnChunkListener(MqttSnListener):
+    """
+    Listener reassembling the objects sent with MqttSnClient.send_chunked().
+
+    object_arrived() receives every complete object as a memoryview, or as
+    the path of its file when 'directory' is set. Messages that are not
+    chunks are passed as they are.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, directory: Optional[str] = None, timeout: float = MqttSnReassembler.DEFAULT_TIMEOUT,
+                 max_length: int = MqttSnReassembler.DEFAULT_MAX_LENGTH):
+        self.reassembler = MqttSnReassembler(directory, timeout, max_length)
+
+    def object_arrived(self, msg: MqttSnMessage, data) -> None:
+        """Callback interface for received objects"""
+        pass
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        payload = msg.get_payload()
+        if not is_chunk(payload):
+            self.object_arrived(msg, memoryview(payload))
+            return
+        key = msg.get_topic_name() if msg.get_topic_name() is not None else msg.get_topic_id()
+        try:
+            data = self.reassembler.add(key, payload)
+        except MqttSnClientException as e:
+            self.logger.warning(f"Chunked transfer on '{key}' dropped: {e}")
+            return
+        if data is not None:
+            self.object_arrived(msg, data)
+
+    def flush(self, force: bool = True) -> None:
+        self.reassembler.expire()
+
+class MqttSnMessageStream(MqttSnListener):
+    """
+    Listener queuing the messages for a coroutine, see MqttSnClient.messages().
+
+    Messages arriving on the event loop thread are queued directly; the ones
+    arriving on other threads are handed over to the loop. With 'max_queued'
+    greater than zero the newest messages are dropped when the queue is full.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queued: int = 0):
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queued)
+        self.dropped = 0
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        if running_loop() is self.loop:
+            self.put(msg)
+        else:
+            self.loop.call_soon_threadsafe(self.put, msg)
+
+    def put(self, msg: MqttSnMessage) -> None:
+        try:
+            self.queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self) -> MqttSnMessage:
+        return await self.queue.get()
+
+class MqttSnInflightPublish:
+    """Asynchronous QoS 1/2 publish waiting for its acknowledge"""
+    __slots__ = ("future", "packet", "expected", "deadline", "retries")
+
+    def __init__(self, future: Future, packet: PublishPacket, expected: int, deadline: float):
+        self.future = future
+        self.packet = packet
+        self.expected = expected
+        self.deadline = deadline
+        self.retries = 0
+
+def running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Event loop running in the current thread, None if any"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
                 
 class MqttSnClient:
     logger = logging.getLogger(__name__)
+    # Event loop receiving: keep-alive check interval (seconds) and max packets read per callback
+    LOOP_TICK = 0.1
+    LOOP_READ_BATCH = 64
+    # Retransmissions of an unacknowledged asynchronous publish
+    INFLIGHT_RETRIES = 1
+    INFLIGHT_ACKS = (MqttSnConstants.TYPE_PUBACK, MqttSnConstants.TYPE_PUBREC, MqttSnConstants.TYPE_PUBCOMP)
     port = MqttSnConstants.DEFAULT_PORT
     timeout = MqttSnConstants.DEFAULT_TIMEOUT
     keep_alive = MqttSnConstants.DEFAULT_KEEP_ALIVE
@@ -138,8 +339,33 @@ class MqttSnClient:
     address = None
     last_transmit = 0
     last_receive = 0
+    last_heard = 0.0
     executor = None
-    topic_map: Dict[int, str] = {}
+    dispatcher = None
+    inbound_queue = None
+    inbound_thread = None
+    loop = None
+    loop_timer = None
+    loop_tasks = None
+    loop_requests = None
+    ping_deadline = 0.0
+    pending_publishes = None
+    inflight = None
+    max_inflight = MqttSnConstants.DEFAULT_WINDOW
+    mtu = 0
+    reassembler = None
+    compression = None
+    operators = None
+    schemas = None
+    coalescer = None
+    deaggregate = False
+    topic_codecs = None
+    codecs_by_topic = None
+    operators_lock = None
+    schemas_by_topic = None
+    topic_map = None
+    topic_catalog = None
+    topic_aliases = None
     list_of_mqtt_sn_callback: Dict[str, MqttSnListener] = {}
         
     def __init__(self):
@@ -160,10 +386,43 @@ class MqttSnClient:
         self.address = None
         self.last_transmit = 0
         self.last_receive = 0
+        # Monotonic and fractional, for the liveness checks
+        self.last_heard = 0.0
         
-        self.topic_map: Dict[int, str] = {}
+        self.topic_map = MqttSnTopicRegistry()
+        self.topic_catalog: Optional[MqttSnTopicCatalog] = None
+        self.topic_aliases: Optional[MqttSnTopicAliases] = None
         self.list_of_mqtt_sn_callback: Dict[str, MqttSnListener] = {}
         self.executor = ThreadPoolExecutor(max_workers=1)
+        self.dispatcher: Optional[MqttSnDispatcher] = None
+        self.inbound_queue: Optional[MqttSnInboundQueue] = None
+        self.inbound_thread: Optional[threading.Thread] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_timer: Optional[asyncio.TimerHandle] = None
+        # Tasks of the coroutine listeners, referenced until done
+        self.loop_tasks = set()
+        # SUBACK/UNSUBACK awaited on the event loop, by message ID
+        self.loop_requests: Dict[int, Tuple[int, asyncio.Future, Callable]] = {}
+        # Monotonic deadline of the PINGRESP while the event loop waits for it (0 = no ping pending)
+        self.ping_deadline = 0.0
+        # PUBLISH packets received while waiting for another packet
+        self.pending_publishes = deque()
+        self.inflight: Dict[int, MqttSnInflightPublish] = {}
+        self.max_inflight = MqttSnConstants.DEFAULT_WINDOW
+        self.mtu = 0
+        self.reassembler: Optional[MqttSnReassembler] = None
+        self.compression: Optional[MqttSnCompression] = None
+        # Stream operators by listener key, run by the receive thread and by flush_listeners()
+        self.operators: Dict[str, list] = {}
+        self.operators_lock = threading.Lock()
+        # Payload schema by topic filter, and the resolved ones by topic name
+        self.schemas: Dict[str, MqttSnSchema] = {}
+        self.schemas_by_topic: Dict[str, Optional[MqttSnSchema]] = {}
+        self.coalescer: Optional[MqttSnCoalescer] = None
+        self.deaggregate = False
+        # Codec and dictionary ID by topic filter, and the resolved ones by topic name
+        self.topic_codecs: Dict[str, Tuple[int, int]] = {}
+        self.codecs_by_topic: Dict[str, Tuple[int, int]] = {}
         
     def open(self, host: str, port: int) -> None:
         """Open connection to MQTT-SN gateway"""
@@ -193,27 +452,57 @@ class MqttSnClient:
     
     def close(self) -> None:
         """Close the connection"""
+        self.detach_loop()
+        if self.coalescer is not None and self.datagram_socket:
+            self.flush_publishes()
+        self.fail_inflight("Connection closed.")
         if self.datagram_socket:
             self.logger.debug("Socket closed.")
             self.datagram_socket.close()
             self.datagram_socket = None
         self.connected = False
+        self.stop_inbound_queue()
+        if self.operators:
+            self.flush_operators(True)
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+        self.flush_listeners(True)
         if self.executor is not None:
             self.executor.shutdown(wait=True)
     
     def is_connected(self) -> bool:
         """Check if client is connected"""
         return self.connected
+
+    def get_next_message_id(self) -> int:
+        """Return a new message ID (1..65535, wrapping around)"""
+        message_id = self.next_message_id
+        self.next_message_id = (message_id % 0xFFFF) + 1
+        return message_id
     
     def send_subscribe(self, topic_filter: str, qos: int, callback: MqttSnListener) -> None:
         """Subscribe to a topic with callback"""
-        topic_len = len(topic_filter)
+        if self.topic_catalog is not None and topic_filter in self.topic_catalog:
+            self.send_subscribe_predefined(self.topic_catalog.get_topic_id(topic_filter), qos, callback)
+            return
+
+        sub_packet = self.build_subscribe(topic_filter, qos)
+        self.send_packet(sub_packet.encode())
+        
+        topic_id = self.receive_suback()
+        self.subscribed(topic_filter, topic_id, callback)
+
+    def build_subscribe(self, topic_filter: str, qos: int) -> SubPacket:
+        """SUBSCRIBE packet for a topic filter, a short topic or a topic of the catalog"""
         sub_packet = SubPacket()
         
         flags = 0x00
         flags += self.get_qos_flag(qos)
         
-        if topic_len == 2:
+        if self.topic_catalog is not None and topic_filter in self.topic_catalog:
+            flags += MqttSnConstants.TOPIC_TYPE_PREDEFINED
+            sub_packet.set_topic_id(self.topic_catalog.get_topic_id(topic_filter))
+        elif len(topic_filter) == 2:
             flags += MqttSnConstants.TOPIC_TYPE_SHORT
             topic_bytes = topic_filter.encode()
             topic_id = (topic_bytes[0] << 8) + topic_bytes[1]
@@ -223,15 +512,18 @@ class MqttSnClient:
             sub_packet.set_topic_name(topic_filter)
         
         sub_packet.set_flags(flags)
-        sub_packet.set_message_id(self.next_message_id)
-        self.next_message_id += 1
-        
-        self.send_packet(sub_packet.encode())
-        
-        topic_id = self.receive_suback()
-        
-        if topic_id > 0 and topic_len > 2:
+        sub_packet.set_message_id(self.get_next_message_id())
+        return sub_packet
+
+    def subscribed(self, topic_filter: str, topic_id: int, callback: MqttSnListener) -> None:
+        """Update the topic registry and the listeners after a SUBACK"""
+        topic_len = len(topic_filter)
+        if self.topic_catalog is not None and topic_filter in self.topic_catalog:
+            self.add_mqtt_sn_callback(str(self.topic_catalog.get_topic_id(topic_filter)), callback)
+        elif topic_id > 0 and topic_len > 2:
             self.register_topic(topic_id, topic_filter)
+            # Never evict a subscribed topic: its PUBLISH could not be named anymore
+            self.topic_map.pin(topic_filter)
             self.add_mqtt_sn_callback(topic_filter, callback)
         elif topic_id == 0 and topic_len == 2:
             topic_bytes = topic_filter.encode()
@@ -239,7 +531,58 @@ class MqttSnClient:
             self.add_mqtt_sn_callback(str(topic_id), callback)
         else:
             self.add_mqtt_sn_callback(topic_filter, callback)
-    
+
+    def listener_key(self, topic_filter: str) -> str:
+        """Key of the listener of a topic filter, as set by subscribed()"""
+        if self.topic_catalog is not None and topic_filter in self.topic_catalog:
+            return str(self.topic_catalog.get_topic_id(topic_filter))
+        if len(topic_filter) == 2:
+            return str(int.from_bytes(topic_filter.encode(), 'big'))
+        return topic_filter
+
+    def set_operators(self, topic_filter: str, operators: Optional[list]):
+        """
+        Stream operators (see MqttSnOperators) applied in order to the messages
+        of a subscription before its listener, e.g. a tumbling window to get
+        one aggregate per window instead of every message. None removes them.
+        """
+        with self.operators_lock:
+            if operators:
+                self.operators[self.listener_key(topic_filter)] = list(operators)
+            else:
+                self.operators.pop(self.listener_key(topic_filter), None)
+
+    def subscribe_many(self, subscriptions, window: int = MqttSnConstants.DEFAULT_WINDOW) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Subscribe to many (topic_filter, qos, callback) pipelining up to
+        'window' SUBSCRIBE packets.
+
+        SUBACKs are matched by message ID. Returns the granted QoS of every
+        accepted topic filter and the failure reason of the other ones.
+        """
+        if window < 1:
+            raise MqttSnClientException("Parameter 'window' must be at least 1.")
+        callbacks = {}
+        requests = []
+        for topic_filter, qos, callback in subscriptions:
+            if topic_filter in callbacks:
+                continue
+            callbacks[topic_filter] = callback
+            requests.append((topic_filter, self.build_subscribe(topic_filter, qos)))
+
+        acks, failures = self.pipeline(requests, MqttSnConstants.TYPE_SUBACK, SubAckPacket, window)
+        granted: Dict[str, int] = {}
+        for topic_filter, packet in acks.items():
+            if packet.get_return_code() > 0:
+                failures[topic_filter] = self.decode_return_code(packet.get_return_code())
+                continue
+            self.subscribed(topic_filter, packet.get_topic_id(), callbacks[topic_filter])
+            qos = (packet.get_flags() & MqttSnConstants.FLAG_QOS_MASK) >> 5
+            granted[topic_filter] = MqttSnConstants.QOS_N1 if qos == 3 else qos
+
+        self.logger.debug(f"Subscribed {len(granted)} topic filters, {len(failures)} failures")
+        return granted, failures
+
     def send_subscribe_predefined(self, topic_id: int, qos: int, callback: MqttSnListener) -> None:
         """Subscribe to predefined topic ID"""
         sub_packet = SubPacket()
@@ -249,9 +592,8 @@ class MqttSnClient:
         flags += MqttSnConstants.TOPIC_TYPE_PREDEFINED
         sub_packet.set_flags(flags)
         
-        sub_packet.set_message_id(self.next_message_id)
+        sub_packet.set_message_id(self.get_next_message_id())
         sub_packet.set_topic_id(topic_id)
-        self.next_message_id += 1
         
         self.send_packet(sub_packet.encode())
         self.receive_suback()        
@@ -259,26 +601,109 @@ class MqttSnClient:
     
     def send_unsubscribe(self, topic_name: str) -> None:
         """Unsubscribe from topic"""
-        topic_name_len = len(topic_name)
+        if self.topic_catalog is not None and topic_name in self.topic_catalog:
+            self.send_unsubscribe_predefined(self.topic_catalog.get_topic_id(topic_name))
+            return
+
+        unsubscribe_packet = self.build_unsubscribe(topic_name)
+        self.send_packet(unsubscribe_packet.encode())
+        self.receive_unsuback()
+        self.unsubscribed(topic_name)
+
+    def build_unsubscribe(self, topic_name: str) -> UnsubscribePacket:
+        """UNSUBSCRIBE packet for a topic filter, a short topic or a topic of the catalog"""
         unsubscribe_packet = UnsubscribePacket()
         
         flags = 0
-        if topic_name_len == 2:
+        if self.topic_catalog is not None and topic_name in self.topic_catalog:
+            flags += MqttSnConstants.TOPIC_TYPE_PREDEFINED
+            unsubscribe_packet.set_topic_id(self.topic_catalog.get_topic_id(topic_name))
+        elif len(topic_name) == 2:
             flags += MqttSnConstants.TOPIC_TYPE_SHORT
+            unsubscribe_packet.set_topic_name(topic_name)
         else:
             flags += MqttSnConstants.TOPIC_TYPE_NORMAL
+            unsubscribe_packet.set_topic_name(topic_name)
         
         unsubscribe_packet.set_flags(flags)
-        unsubscribe_packet.set_message_id(self.next_message_id)
-        unsubscribe_packet.set_topic_name(topic_name)
-        self.next_message_id += 1
-        
-        self.send_packet(unsubscribe_packet.encode())
-        self.receive_unsuback()
-        
+        unsubscribe_packet.set_message_id(self.get_next_message_id())
+        return unsubscribe_packet
+
+    def unsubscribed(self, topic_name: str) -> None:
+        """Update the topic registry and the listeners after an UNSUBACK"""
+        with self.operators_lock:
+            self.operators.pop(self.listener_key(topic_name), None)
+        if self.topic_catalog is not None and topic_name in self.topic_catalog:
+            self.list_of_mqtt_sn_callback.pop(str(self.topic_catalog.get_topic_id(topic_name)), None)
+            return
+        if len(topic_name) == 2:
+            self.list_of_mqtt_sn_callback.pop(str(int.from_bytes(topic_name.encode(), 'big')), None)
+        self.list_of_mqtt_sn_callback.pop(topic_name, None)
+        self.topic_map.unpin(topic_name)
         topic_id = self.search_topic_id(topic_name)
         if topic_id is not None:
             self.unregister_topic(topic_id)
+
+    def unsubscribe_many(self, topic_names, window: int = MqttSnConstants.DEFAULT_WINDOW) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Unsubscribe from many topic filters pipelining up to 'window'
+        UNSUBSCRIBE packets. Returns the unsubscribed topic filters and the
+        failure reason of the other ones.
+        """
+        if window < 1:
+            raise MqttSnClientException("Parameter 'window' must be at least 1.")
+        requests = [(topic_name, self.build_unsubscribe(topic_name)) for topic_name in dict.fromkeys(topic_names)]
+        acks, failures = self.pipeline(requests, MqttSnConstants.TYPE_UNSUBACK, UnsubackPacket, window)
+        for topic_name in acks:
+            self.unsubscribed(topic_name)
+        return list(acks), failures
+
+    def pipeline(self, requests, ack_type: int, ack_class, window: int) -> Tuple[Dict[str, object], Dict[str, str]]:
+        """
+        Send the (key, packet) requests keeping up to 'window' of them waiting
+        for the answer, matched by message ID. The unanswered packets are sent
+        once more when the gateway stops answering. Returns the decoded answer
+        of every key and the failure reason of the unanswered ones.
+        """
+        acks: Dict[str, object] = {}
+        failures: Dict[str, str] = {}
+        queue = deque(requests)
+        in_flight: Dict[int, Tuple[str, bytes]] = {}
+        retried = False
+        while queue or in_flight:
+            while queue and len(in_flight) < window:
+                key, packet = queue.popleft()
+                buffer = packet.encode()
+                in_flight[packet.get_message_id()] = (key, buffer)
+                self.send_packet(buffer)
+
+            try:
+                response = self.wait_for(True, ack_type)
+            except MqttSnClientException:
+                response = None
+
+            if response is None:
+                if not retried:
+                    # Lost datagrams: send the outstanding packets once more
+                    retried = True
+                    for key, buffer in in_flight.values():
+                        self.send_packet(buffer)
+                    continue
+                for key, buffer in in_flight.values():
+                    failures[key] = f"Timed out waiting for {self.decode_type(ack_type)}"
+                while queue:
+                    failures[queue.popleft()[0]] = "Not sent: gateway not responding"
+                break
+
+            retried = False
+            ack = ack_class()
+            ack.decode(response)
+            entry = in_flight.pop(ack.get_message_id(), None)
+            if entry is None:
+                self.logger.warning(f"Unexpected {self.decode_type(ack_type)} with message id {ack.get_message_id()}")
+                continue
+            acks[entry[0]] = ack
+        return acks, failures
     
     def send_unsubscribe_predefined(self, topic_id: int) -> None:
         """Unsubscribe from predefined topic ID"""
@@ -287,9 +712,8 @@ class MqttSnClient:
         flags += MqttSnConstants.TOPIC_TYPE_PREDEFINED
         unsubscribe_packet.set_flags(flags)
         
-        unsubscribe_packet.set_message_id(self.next_message_id)
+        unsubscribe_packet.set_message_id(self.get_next_message_id())
         unsubscribe_packet.set_topic_id(topic_id)
-        self.next_message_id += 1
         
         self.send_packet(unsubscribe_packet.encode())
         self.receive_unsuback()
@@ -392,15 +816,278 @@ class MqttSnClient:
     
     def send_publish(self, topic_name: str, data: bytes, qos: int, retain: bool = False) -> int:
         """Publish message to topic"""
-        topic_id = 0
+        topic_id, topic_type = self.resolve_publish_topic(topic_name)
+        self.send_publish_with_id(topic_id, topic_type, self.encode_payload(topic_name, data), qos, retain)
+        return topic_id
+
+    def encode_payload(self, topic_name: str, data):
+        """Payload compressed with the codec of the topic, if compression is enabled"""
+        if self.compression is None:
+            return data
+        if isinstance(data, str):
+            data = data.encode()
+        codec = self.codecs_by_topic.get(topic_name)
+        if codec is None:
+            codec = (self.compression.codec, 0)
+            for topic_filter, topic_codec in self.topic_codecs.items():
+                if self.is_matched(topic_name, topic_filter):
+                    codec = topic_codec
+                    break
+            self.codecs_by_topic[topic_name] = codec
+        return self.compression.compress(data, codec[0], codec[1])
+
+    def resolve_publish_topic(self, topic_name: str) -> Tuple[int, int]:
+        """Topic ID and topic type to publish to 'topic_name', registering it if needed"""
+        if self.topic_aliases is not None:
+            hot = self.topic_aliases.observe(topic_name)
+            topic_id = self.topic_aliases.get_alias(topic_name)
+            if topic_id is not None:
+                return topic_id, MqttSnConstants.TOPIC_TYPE_PREDEFINED
+            if hot and not self.topic_map.is_pinned(topic_name):
+                self.topic_map.pin(topic_name)
+            for cooled in self.topic_aliases.pop_cooled():
+                if cooled not in self.list_of_mqtt_sn_callback:
+                    self.topic_map.unpin(cooled)
+
+        if self.topic_catalog is not None and topic_name in self.topic_catalog:
+            return self.topic_catalog.get_topic_id(topic_name), MqttSnConstants.TOPIC_TYPE_PREDEFINED
         if len(topic_name) == 2:
-            topic_id = int.from_bytes(topic_name.encode('ascii'), 'big')
-            self.send_publish_short(topic_id, data, qos, retain)
-        else:
+            return int.from_bytes(topic_name.encode('ascii'), 'big'), MqttSnConstants.TOPIC_TYPE_SHORT
+        topic_id = self.search_topic_id(topic_name)
+        if topic_id is None:
             topic_id = self.send_register(topic_name)
-            self.send_publish_with_id(topic_id, MqttSnConstants.TOPIC_TYPE_NORMAL, data, qos, retain)
-        
-        return topic_id
+        return topic_id, MqttSnConstants.TOPIC_TYPE_NORMAL
+
+    def publish_async(self, topic_name: str, data: bytes, qos: int, retain: bool = False) -> Future:
+        """
+        Publish without waiting for the acknowledge. The returned Future is
+        resolved with the topic ID on PUBACK (QoS 1) or PUBCOMP (QoS 2), or
+        fails with MqttSnClientException on reject or timeout.
+
+        Acknowledges are processed while the client receives (polling(),
+        iter_messages(), any blocking call) or by wait_for_publishes(). With
+        'max_inflight' publishes waiting, the call first waits for a free slot.
+        """
+        topic_id, topic_type = self.resolve_publish_topic(topic_name)
+        return self.publish_with_id_async(topic_id, topic_type, self.encode_payload(topic_name, data), qos, retain)
+
+    def publish_with_id_async(self, topic_id: int, topic_type: int, data: bytes, qos: int, retain: bool = False,
+                              window: Optional[int] = None) -> Future:
+        if window is None:
+            window = self.max_inflight
+        # Before the size check: chunks have no size limit
+        if self.exceeds_mtu(data):
+            return self.publish_chunks_async(topic_id, topic_type, data, qos, retain, window)
+        if len(data) > MqttSnConstants.MAX_PAYLOAD_LENGTH_EXTENDED:
+            raise MqttSnClientException(f"Data is too big (max {MqttSnConstants.MAX_PAYLOAD_LENGTH_EXTENDED} bytes)!")
+        if len(self.inflight) >= window:
+            self.wait_for_publishes(self.timeout * (self.INFLIGHT_RETRIES + 1), window - 1)
+
+        flags = self.get_qos_flag(qos) + (topic_type & 0x3)
+        if retain:
+            flags += MqttSnConstants.FLAG_RETAIN
+        publish_packet = PublishPacket()
+        publish_packet.set_flags(flags)
+        publish_packet.set_topic_id(topic_id)
+        publish_packet.set_message_id(self.get_next_message_id() if qos > 0 else 0x0000)
+        publish_packet.set_data(data)
+
+        future = Future()
+        if qos == MqttSnConstants.QOS_1 or qos == MqttSnConstants.QOS_2:
+            expected = MqttSnConstants.TYPE_PUBACK if qos == MqttSnConstants.QOS_1 else MqttSnConstants.TYPE_PUBREC
+            self.inflight[publish_packet.get_message_id()] = MqttSnInflightPublish(
+                future, publish_packet, expected, time.monotonic() + self.timeout)
+        self.send_packet(publish_packet.encode())
+        if qos != MqttSnConstants.QOS_1 and qos != MqttSnConstants.QOS_2:
+            future.set_result(topic_id)
+        return future
+
+    def exceeds_mtu(self, data) -> bool:
+        """True if a PUBLISH of 'data' would be a datagram bigger than the MTU"""
+        if self.mtu <= 0:
+            return False
+        length = len(data) + 7
+        if length > 255:
+            length += 2
+        return length > self.mtu
+
+    def publish_chunks_async(self, topic_id: int, topic_type: int, data, qos: int, retain: bool = False,
+                             window: Optional[int] = None) -> Future:
+        """Publish 'data' as chunks fitting the MTU. The Future is resolved when every chunk is."""
+        if retain:
+            self.logger.warning(f"Retain ignored: a payload of {len(data)} bytes is split in chunks")
+        chunk_size = self.mtu - 9 - CHUNK_HEADER.size
+        if chunk_size < 1:
+            raise MqttSnClientException(f"MTU of {self.mtu} bytes too small for chunks")
+        futures = [self.publish_with_id_async(topic_id, topic_type, chunk, qos, False, window)
+                   for chunk in encode_chunks(data, chunk_size)]
+        return self.combine_futures(futures, topic_id)
+
+    def combine_futures(self, futures, result) -> Future:
+        """Future resolved with 'result' when every future is done, failed if any of them failed"""
+        combined = Future()
+        remaining = [len(futures)]
+        errors = []
+
+        def done(future: Future) -> None:
+            if future.exception() is not None:
+                errors.append(future.exception())
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                if errors:
+                    combined.set_exception(MqttSnClientException(f"{len(errors)} of {len(futures)} chunks failed: {errors[0]}"))
+                else:
+                    combined.set_result(result)
+
+        for future in futures:
+            future.add_done_callback(done)
+        return combined
+
+    def send_chunked(self, topic_name: str, data, qos: int = MqttSnConstants.QOS_1,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     window: int = MqttSnConstants.DEFAULT_WINDOW) -> int:
+        """
+        Publish an object of any size (bytes-like) as a sequence of chunks,
+        keeping up to 'window' of them waiting for the acknowledge. Each chunk
+        carries the transfer ID, its sequence number and offset, the object
+        length and CRC-32; MqttSnChunkListener rebuilds the object.
+        Returns the transfer ID.
+        """
+        if self.mtu > 0:
+            chunk_size = min(chunk_size, self.mtu - 9 - CHUNK_HEADER.size)
+        topic_id, topic_type = self.resolve_publish_topic(topic_name)
+        transfer_id = new_transfer_id()
+        futures = [self.publish_with_id_async(topic_id, topic_type, chunk, qos, False, window)
+                   for chunk in encode_chunks(data, chunk_size, transfer_id)]
+        if not self.wait_for_publishes(self.timeout * (self.INFLIGHT_RETRIES + 1)):
+            # Nothing else would resolve them
+            self.fail_inflight("Timed out waiting for the acknowledge.")
+        failed = sum(1 for future in futures if future.exception() is not None)
+        if failed > 0:
+            raise MqttSnClientException(f"Chunked transfer {transfer_id:08x} failed: {failed} of {len(futures)} chunks not acknowledged")
+        self.logger.debug(f"Chunked transfer {transfer_id:08x}: {len(futures)} chunks published")
+        return transfer_id
+
+    def send_chunked_file(self, topic_name: str, path: str, qos: int = MqttSnConstants.QOS_1,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          window: int = MqttSnConstants.DEFAULT_WINDOW) -> int:
+        """Publish a file with send_chunked(), memory-mapped instead of read"""
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return self.send_chunked(topic_name, b"", qos, chunk_size, window)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return self.send_chunked(topic_name, data, qos, chunk_size, window)
+        except OSError as e:
+            raise MqttSnClientException(f"Unable to read '{path}': {e}")
+
+    def publish_many(self, messages, window: int = MqttSnConstants.DEFAULT_WINDOW) -> List[Future]:
+        """
+        Publish many (topic_name, data, qos, retain) messages keeping up to
+        'window' of them waiting for the acknowledge.
+
+        The topics not registered yet are registered first with one pipelined
+        register_many(). Returns, once every message is acknowledged or failed,
+        the Future of each message in the same order.
+        """
+        if window < 1:
+            raise MqttSnClientException("Parameter 'window' must be at least 1.")
+        messages = list(messages)
+        unregistered = [topic_name for topic_name, _, _, _ in messages
+                        if len(topic_name) != 2
+                        and (self.topic_catalog is None or topic_name not in self.topic_catalog)
+                        and self.search_topic_id(topic_name) is None]
+        failures = {}
+        if unregistered:
+            _, failures = self.register_many(unregistered, window)
+
+        futures = []
+        for topic_name, data, qos, retain in messages:
+            try:
+                if topic_name in failures:
+                    raise MqttSnClientException(f"Unable to register topic '{topic_name}': {failures[topic_name]}")
+                topic_id, topic_type = self.resolve_publish_topic(topic_name)
+                future = self.publish_with_id_async(topic_id, topic_type, self.encode_payload(topic_name, data), qos, retain, window)
+            except MqttSnClientException as e:
+                future = Future()
+                future.set_exception(e)
+            futures.append(future)
+
+        if not self.wait_for_publishes(self.timeout * (self.INFLIGHT_RETRIES + 1)):
+            # Nothing else would resolve them
+            self.fail_inflight("Timed out waiting for the acknowledge.")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Published {len(futures)} messages, {sum(1 for f in futures if f.exception() is not None)} failures")
+        return futures
+
+    def process_inflight_ack(self, msg_type: int, buffer: bytes) -> bool:
+        """Advance the asynchronous publish acknowledged by 'buffer'. Returns False if it is not one of them."""
+        if msg_type == MqttSnConstants.TYPE_PUBACK:
+            packet = PubAckPacket()
+        elif msg_type == MqttSnConstants.TYPE_PUBREC:
+            packet = PubRecPacket()
+        else:
+            packet = PubCompPacket()
+        packet.decode(buffer)
+        message_id = packet.get_message_id()
+        entry = self.inflight.get(message_id)
+        if entry is None or entry.expected != msg_type:
+            return False
+
+        if msg_type == MqttSnConstants.TYPE_PUBREC:
+            entry.expected = MqttSnConstants.TYPE_PUBCOMP
+            entry.deadline = time.monotonic() + self.timeout
+            entry.retries = 0
+            self.send_pubrel(entry.packet)
+            return True
+
+        del self.inflight[message_id]
+        if msg_type == MqttSnConstants.TYPE_PUBACK and packet.get_return_code() > 0:
+            entry.future.set_exception(MqttSnClientException(f"PUBLISH error: {self.decode_return_code(packet.get_return_code())}"))
+        else:
+            entry.future.set_result(entry.packet.get_topic_id())
+        return True
+
+    def check_inflight(self) -> None:
+        """Send again the unacknowledged packets once, then fail their publish"""
+        now = time.monotonic()
+        for message_id, entry in list(self.inflight.items()):
+            if now < entry.deadline:
+                continue
+            if entry.retries < self.INFLIGHT_RETRIES:
+                entry.retries += 1
+                entry.deadline = now + self.timeout
+                if entry.expected == MqttSnConstants.TYPE_PUBCOMP:
+                    self.send_pubrel(entry.packet)
+                else:
+                    entry.packet.set_flags(entry.packet.get_flags() | MqttSnConstants.FLAG_DUP)
+                    self.send_packet(entry.packet.encode())
+                continue
+            del self.inflight[message_id]
+            entry.future.set_exception(MqttSnClientException(f"Timed out waiting for {self.decode_type(entry.expected)} (message id {message_id})."))
+
+    def wait_for_publishes(self, timeout: Optional[float] = None, max_pending: int = 0) -> bool:
+        """
+        Process acknowledges until at most 'max_pending' asynchronous publishes
+        are waiting. Returns False on timeout.
+        """
+        started = time.monotonic()
+        while len(self.inflight) > max_pending:
+            now = time.monotonic()
+            wait = max(0, min(entry.deadline for entry in self.inflight.values()) - now)
+            if timeout is not None:
+                remaining = timeout - (now - started)
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            select.select([self.datagram_socket], [], [], wait)
+            self.wait_for(False, None)
+        return True
+
+    def fail_inflight(self, reason: str) -> None:
+        for entry in self.inflight.values():
+            entry.future.set_exception(MqttSnClientException(reason))
+        self.inflight.clear()
     
     def send_register(self, topic: str) -> int:
         """Register topic name"""
@@ -410,13 +1097,60 @@ class MqttSnClient:
         
         packet = RegisterPacket()
         packet.set_topic_id(0)
-        packet.set_message_id(self.next_message_id)
+        packet.set_message_id(self.get_next_message_id())
         packet.set_topic_name(topic)
-        self.next_message_id += 1
         
         self.send_packet(packet.encode())
         topic_id = self.receive_regack()
+        self.register_topic(topic_id, topic)
         return topic_id
+
+    def register_many(self, topics, window: int = MqttSnConstants.DEFAULT_WINDOW) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Register many topic names pipelining up to 'window' REGISTER packets.
+
+        REGACKs are matched by message ID and every accepted topic is added
+        to the topic registry. Returns the registered topic IDs and the
+        failure reason of every topic that could not be registered.
+        """
+        if window < 1:
+            raise MqttSnClientException("Parameter 'window' must be at least 1.")
+
+        registered: Dict[str, int] = {}
+        failures: Dict[str, str] = {}
+        queue = []
+        seen = set()
+        for topic in topics:
+            if topic in seen:
+                continue
+            seen.add(topic)
+            topic_id = self.search_topic_id(topic)
+            if topic_id is not None:
+                registered[topic] = topic_id
+            elif len(topic) == 0 or len(topic) > MqttSnConstants.MAX_TOPIC_LENGTH_EXTENDED:
+                failures[topic] = "Invalid topic name length"
+            else:
+                queue.append(topic)
+
+        requests = []
+        for topic in queue:
+            packet = RegisterPacket()
+            packet.set_topic_id(0)
+            packet.set_message_id(self.get_next_message_id())
+            packet.set_topic_name(topic)
+            requests.append((topic, packet))
+
+        acks, timeouts = self.pipeline(requests, MqttSnConstants.TYPE_REGACK, RegackPacket, window)
+        failures.update(timeouts)
+        for topic, regack_packet in acks.items():
+            if regack_packet.get_return_code() > 0:
+                failures[topic] = self.decode_return_code(regack_packet.get_return_code())
+            else:
+                self.register_topic(regack_packet.get_topic_id(), topic)
+                registered[topic] = regack_packet.get_topic_id()
+
+        self.logger.debug(f"Registered {len(registered)} topics, {len(failures)} failures")
+        return registered, failures
     
     def send_publish_short(self, topic_id: int, data: bytes, qos: int, retain: bool = False) -> None:
         """Publish to short topic"""
@@ -435,6 +1169,32 @@ class MqttSnClient:
     
     def send_publish_with_id(self, topic_id: int, topic_type: int, data: bytes, qos: int, retain: bool = False) -> None:
         """Publish with topic ID and type"""
+        if self.coalescer is not None and qos <= MqttSnConstants.QOS_0 and not retain:
+            if isinstance(data, str):
+                data = data.encode()
+            for (topic_id, topic_type, qos, retain), payload in self.coalescer.add((topic_id, topic_type, qos, retain), data):
+                self.send_publish_packet(topic_id, topic_type, payload, qos, retain)
+            return
+        self.send_publish_packet(topic_id, topic_type, data, qos, retain)
+
+    def flush_publishes(self, force: bool = True) -> None:
+        """Send the coalesced messages (if 'force' is False, only the groups that are due)"""
+        if self.coalescer is None:
+            return
+        for (topic_id, topic_type, qos, retain), payload in self.coalescer.flush(force):
+            self.send_publish_packet(topic_id, topic_type, payload, qos, retain)
+
+    def send_publish_packet(self, topic_id: int, topic_type: int, data: bytes, qos: int, retain: bool = False) -> None:
+        """Send a PUBLISH right away, split in chunks if it exceeds the MTU"""
+        if self.exceeds_mtu(data):
+            future = self.publish_chunks_async(topic_id, topic_type, data, qos, retain)
+            if not self.wait_for_publishes(self.timeout * (self.INFLIGHT_RETRIES + 1)):
+                self.fail_inflight("Timed out waiting for the acknowledge.")
+            try:
+                future.result(0)
+            except TimeoutError:
+                raise MqttSnClientException(f"Timed out publishing {len(data)} bytes in chunks.")
+            return
 
         if len(data) > MqttSnConstants.MAX_PAYLOAD_LENGTH_EXTENDED:
             raise MqttSnClientException(f"Data is too big (max {MqttSnConstants.MAX_PAYLOAD_LENGTH_EXTENDED} bytes)!")
@@ -452,8 +1212,7 @@ class MqttSnClient:
         publish_packet.set_topic_id(topic_id)
         
         if qos > 0:
-            publish_packet.set_message_id(self.next_message_id)
-            self.next_message_id += 1
+            publish_packet.set_message_id(self.get_next_message_id())
         else:
             publish_packet.set_message_id(0x0000)
         
@@ -803,13 +1562,17 @@ class MqttSnClient:
         received = None
         
         try:
-            self.datagram_socket.settimeout(self.timeout)
-            self.datagram_socket.setblocking(blocking)
+            # setblocking(True) would reset the timeout to None and block forever
+            if blocking:
+                self.datagram_socket.settimeout(self.timeout)
+            else:
+                self.datagram_socket.setblocking(False)
             data, addr = self.datagram_socket.recvfrom(MqttSnConstants.MAX_PACKET_LENGTH_EXTENDED)
-            self.last_receive = int(time.time())           
-            self.logger.debug(f"Received {len(data)} bytes: {data.hex()}")          
-        
-        except BlockingIOError:    
+            self.last_receive = int(time.time())
+            self.last_heard = time.monotonic()
+            self.logger.debug(f"Received {len(data)} bytes: {data.hex()}")
+
+        except BlockingIOError as e:
             if (blocking == False):
                 return None
             else:
@@ -832,6 +1595,9 @@ class MqttSnClient:
             return str(return_code)
 
     def wait_for(self, blocking, msg_type):
+        if msg_type == MqttSnConstants.TYPE_PUBLISH and self.pending_publishes:
+            return self.pending_publishes.popleft()
+
         started_waiting = int(time.time())
         
         running = True
@@ -841,8 +1607,11 @@ class MqttSnClient:
             now = int(time.time())
             # self.logger.debug(f"Waiting {now}...")
             
-            # Time to send a ping?
-            if self.keep_alive > 0 and self.last_transmit > 0 and ((now - self.last_transmit) >= self.keep_alive):
+            if self.inflight:
+                self.check_inflight()
+
+            # Time to send a ping? (on_loop_tick() sends them on an event loop)
+            if self.loop is None and self.keep_alive > 0 and self.last_transmit > 0 and ((now - self.last_transmit) >= self.keep_alive):
                 self.logger.debug("Time to send a PING")
                 self.send_ping_req()                
                 
@@ -858,17 +1627,27 @@ class MqttSnClient:
                 self.logger.debug(f"Received {self.decode_type(tmp_msg_type)} packet...") 
             
             # Did we find what we were looking for?
-            if tmp_msg_type == msg_type:
+            if self.inflight and tmp_msg_type in self.INFLIGHT_ACKS and self.process_inflight_ack(tmp_msg_type, buf):
+                pass
+            elif tmp_msg_type == msg_type:
                 return buf
+            elif self.loop_requests and self.resolve_loop_request(tmp_msg_type, buf):
+                pass
+            elif tmp_msg_type == MqttSnConstants.TYPE_PINGRESP and self.ping_deadline > 0:
+                self.ping_deadline = 0.0
             elif tmp_msg_type == MqttSnConstants.TYPE_REGISTER:
                 self.process_register(buf)
+            elif tmp_msg_type == MqttSnConstants.TYPE_PUBLISH:
+                # Kept for the next polling()
+                self.pending_publishes.append(buf)
             elif tmp_msg_type == MqttSnConstants.TYPE_ADVERTISE:
                 running = False
             elif tmp_msg_type == MqttSnConstants.TYPE_DISCONNECT:
                 self.logger.debug("Received DISCONNECT from gateway.") 
             else:
-                if tmp_msg_type != msg_type:
-                    self.logger.warning("Was expecting '" + self.decode_type(msg_type) + "' packet but received: " + self.decode_type(msg_type))
+                # msg_type None: any packet will do (wait_for_publishes)
+                if msg_type is not None:
+                    self.logger.warning("Was expecting '" + self.decode_type(msg_type) + "' packet but received: " + self.decode_type(tmp_msg_type))
             
             # Waiting or not ?            
             if blocking == False:
@@ -906,6 +1685,8 @@ class MqttSnClient:
         ping_req_packet = PingReqPacket()
         self.send_packet(ping_req_packet.encode())
         buf = self.wait_for(True, MqttSnConstants.TYPE_PINGRESP)
+        if buf is None:
+            raise MqttSnClientException("Failed to receive PINGRESP.")
         packet = PingResPacket()
         packet.decode(buf)
 
@@ -961,58 +1742,573 @@ class MqttSnClient:
 
     def set_timeout(self, value: int):
         self.timeout = value
+
+    def set_mtu(self, value: int):
+        """
+        Max datagram size of a PUBLISH (0 = no limit, default). Bigger payloads
+        are split in chunks, see set_reassembly() on the receiving side.
+        """
+        if value < 0:
+            raise MqttSnClientException("MTU must be 0 or positive.")
+        if 0 < value <= 9 + CHUNK_HEADER.size:
+            raise MqttSnClientException(f"MTU too small (min {10 + CHUNK_HEADER.size} bytes).")
+        self.mtu = value
+
+    def set_reassembly(self, value: bool, timeout: float = MqttSnReassembler.DEFAULT_TIMEOUT):
+        """Rebuild the payloads split in chunks before they reach the listeners"""
+        self.reassembler = MqttSnReassembler(timeout=timeout) if value else None
+
+    def set_coalescing(self, value: bool, max_bytes: int = MqttSnCoalescer.DEFAULT_MAX_BYTES,
+                       max_delay: float = MqttSnCoalescer.DEFAULT_MAX_DELAY):
+        """
+        Send the QoS 0 and -1 publishes to the same topic in envelopes of up to
+        'max_bytes' bytes, at most 'max_delay' seconds late. The receivers need
+        set_deaggregation(). Due envelopes are sent by the next publish,
+        polling(), iter_messages() or flush_publishes(). Retained publishes
+        are sent as they are: the broker must retain the last value only.
+        """
+        if self.coalescer is not None:
+            self.flush_publishes()
+        if not value:
+            self.coalescer = None
+            return
+        if self.mtu > 0:
+            max_bytes = min(max_bytes, self.mtu - 9)
+        self.coalescer = MqttSnCoalescer(max_bytes, max_delay)
+
+    def set_deaggregation(self, value: bool):
+        """Give the listeners the messages of the received envelopes one by one"""
+        self.deaggregate = value
+
+    def set_compression(self, value: Optional[MqttSnCompression]):
+        """
+        Compress the payloads published by topic name (send_publish, publish_async,
+        publish_many) and decompress the received ones (None disables)
+        """
+        self.compression = value
+
+    def set_topic_codec(self, topic_filter: str, codec: int, dictionary_id: int = 0):
+        """Codec (and zlib dictionary) for the topics matching 'topic_filter', instead of the default one"""
+        if self.compression is not None:
+            self.compression.check_codec(codec)
+        self.topic_codecs[topic_filter] = (codec, dictionary_id)
+        self.codecs_by_topic.clear()
+
+    def set_schema(self, topic_filter: str, schema: Optional[MqttSnSchema]):
+        """Schema of the payloads of the topics matching 'topic_filter' (None removes it), see MqttSnMessage.get_record()"""
+        if schema is None:
+            self.schemas.pop(topic_filter, None)
+        else:
+            self.schemas[topic_filter] = schema
+        self.schemas_by_topic.clear()
+
+    def get_schema(self, topic_name: str) -> Optional[MqttSnSchema]:
+        """Schema of a topic: the one of its name, or of the first matching topic filter"""
+        if topic_name in self.schemas_by_topic:
+            return self.schemas_by_topic[topic_name]
+        schema = self.schemas.get(topic_name)
+        if schema is None:
+            for topic_filter, filter_schema in self.schemas.items():
+                if self.is_matched(topic_name, topic_filter):
+                    schema = filter_schema
+                    break
+        self.schemas_by_topic[topic_name] = schema
+        return schema
+
+    def set_max_inflight(self, value: int):
+        """Max number of asynchronous publishes waiting for an acknowledge"""
+        if value < 1:
+            raise MqttSnClientException("Max number of inflight publishes must be at least 1.")
+        self.max_inflight = value
+
+    def set_dispatch_workers(self, value: int):
+        """
+        Run listeners on 'value' worker threads, in order for each topic.
+        0 runs them inline on the polling thread (default).
+        """
+        if value < 0:
+            raise MqttSnClientException("Number of dispatch workers must be 0 or positive.")
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, value), thread_name_prefix="mqttsn-dispatch")
+        self.dispatcher = MqttSnDispatcher(self.executor) if value > 0 else None
+
+    def set_inbound_queue(self, capacity: int, policy: str = MqttSnInboundQueue.POLICY_BLOCK):
+        """
+        Queue the received messages and dispatch them on a separate thread.
+        With POLICY_BLOCK a full queue stops polling (the gateway is slowed down
+        by the socket buffer); the other policies drop messages and count them.
+        0 dispatches on the polling thread (default).
+        """
+        if capacity < 0:
+            raise MqttSnClientException("Inbound queue capacity must be 0 or positive.")
+        self.stop_inbound_queue()
+        if capacity == 0:
+            return
+        self.inbound_queue = MqttSnInboundQueue(capacity, policy)
+        self.inbound_thread = threading.Thread(target=self.run_inbound_queue, args=(self.inbound_queue,),
+                                               name="mqttsn-inbound", daemon=True)
+        self.inbound_thread.start()
+
+    def run_inbound_queue(self, queue: MqttSnInboundQueue) -> None:
+        while True:
+            msg = queue.get()
+            if msg is None:
+                return
+            try:
+                self.dispatch_message(msg)
+            except Exception as e:
+                self.logger.error(f"Dispatch error on topic ID {msg.get_topic_id()}: {e}")
+
+    def stop_inbound_queue(self) -> None:
+        """Dispatch the queued messages and stop the inbound thread"""
+        if self.inbound_queue is None:
+            return
+        self.inbound_queue.close()
+        self.inbound_thread.join()
+        self.inbound_queue = None
+        self.inbound_thread = None
+
+    def get_inbound_stats(self) -> Dict[str, int]:
+        """Counters of the inbound queue (empty if not enabled)"""
+        if self.inbound_queue is None:
+            return {}
+        return self.inbound_queue.get_stats()
+
+    def set_topic_catalog(self, value: MqttSnTopicCatalog):
+        """Use the predefined topic IDs of the catalog instead of registering topic names"""
+        self.topic_catalog = value
+
+    def set_topic_registry_capacity(self, value: int):
+        """
+        Max number of registered topics kept (0 = unbounded). The least recently
+        used topics are evicted and registered again when published. A PUBLISH
+        to an evicted topic ID registered by the gateway (e.g. for a wildcard
+        subscription) is rejected with REJECTED_INVALID, so that the gateway
+        registers the topic again: that message is lost.
+        """
+        self.topic_map.set_capacity(value)
+
+    def set_topic_aliases(self, value: MqttSnTopicAliases):
+        """Track publish frequency and use the alias table for the hot topics (None disables)"""
+        self.topic_aliases = value
         
     def polling(self):
-        buffer = self.wait_for(False, MqttSnConstants.TYPE_PUBLISH)
-        if buffer is not None:
-            publish_packet = PublishPacket()
-            publish_packet.decode(buffer)
-            
-            if publish_packet.get_type() != MqttSnConstants.TYPE_PUBLISH:
-                raise MqttSnClientException("Was expecting PUBLISH packet but received: " + self.decode_type(publish_packet.get_type()))
-            
-            packet_retain = publish_packet.get_retain()
-            packet_qos = publish_packet.get_qos()
-            if packet_qos == MqttSnConstants.FLAG_QOS_1:
-                self.send_puback(publish_packet, MqttSnConstants.ACCEPTED)
-            
-            topic_id = publish_packet.get_topic_id()
-            topic_name = self.topic_map.get(publish_packet.get_topic_id())
-            payload = publish_packet.get_data()
+        if self.inbound_queue is None:
+            buffer = self.wait_for(False, MqttSnConstants.TYPE_PUBLISH)
+            if buffer is not None:
+                msg = self.process_publish(buffer)
+                self.dispatch_message(msg)
+            self.flush_listeners(False)
+            self.flush_publishes(False)
+            return
 
-            self.logger.debug("topic ID is " + str(topic_id))
-            self.logger.debug("topic name is " + str(topic_name))
-            self.logger.debug(f"Payload is {payload}")
-            
-            mqtt_sn_callback = None
-            if topic_name is not None:
-                self.logger.debug("Search listener for Topic Name...")
-                mqtt_sn_callback = self.list_of_mqtt_sn_callback.get(topic_name)
-            else:
-                self.logger.debug("Search listener for Topic ID...")
-                mqtt_sn_callback = self.list_of_mqtt_sn_callback.get(str(topic_id))
-            
-            if mqtt_sn_callback is None:
-                self.logger.debug("Listener for topic name not found. Search by Topic ID")
-                for filter_name, callback in self.list_of_mqtt_sn_callback.items():
-                    if self.is_matched(topic_name, filter_name):
-                        self.logger.debug("Found listener for topicID=" + str(topic_id) + ",topic name=" + str(topic_name) + ", topic filter=" + filter_name)
-                        msg = MqttSnMessage()
-                        msg.set_topic_id(topic_id)
-                        msg.set_topic_name(topic_name)
-                        msg.set_qos(packet_qos)
-                        msg.set_retain(packet_retain)     
-                        msg.set_payload(payload)                   
-                        callback.message_arrived(msg)
+        # Drain the socket, at most a queue worth of messages per call
+        for _ in range(self.inbound_queue.capacity):
+            buffer = self.wait_for(False, MqttSnConstants.TYPE_PUBLISH)
+            if buffer is None:
+                break
+            msg = self.process_publish(buffer)
+            if not self.inbound_queue.put(msg):
+                self.logger.debug(f"Inbound queue full, dropped message on topic ID {msg.get_topic_id()}")
+        self.flush_listeners(False)
+        self.flush_publishes(False)
+
+    def attach_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        Receive on an asyncio event loop instead of calling polling(): the
+        messages are read and dispatched on the loop thread when the socket
+        is readable, and coroutine listeners run as tasks of the loop.
+        """
+        if self.datagram_socket is None:
+            raise MqttSnClientException("Socket not opened.")
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self.detach_loop()
+        self.loop = loop
+        self.ping_deadline = 0.0
+        self.datagram_socket.setblocking(False)
+        self.loop.add_reader(self.datagram_socket.fileno(), self.on_readable)
+        self.loop_timer = self.loop.call_later(self.LOOP_TICK, self.on_loop_tick)
+
+    def detach_loop(self) -> None:
+        if self.loop is None:
+            return
+        if self.loop_timer is not None:
+            self.loop_timer.cancel()
+            self.loop_timer = None
+        if self.datagram_socket is not None and not self.loop.is_closed():
+            self.loop.remove_reader(self.datagram_socket.fileno())
+        for expected, future, acknowledged in self.loop_requests.values():
+            if not future.done():
+                future.set_exception(MqttSnClientException("Event loop detached."))
+        self.loop_requests.clear()
+        self.loop = None
+
+    def on_readable(self) -> None:
+        try:
+            # Level triggered: what is left in the socket is read on the next callback
+            for _ in range(self.LOOP_READ_BATCH):
+                buffer = self.wait_for(False, MqttSnConstants.TYPE_PUBLISH)
+                if buffer is None:
+                    break
+                self.dispatch_message(self.process_publish(buffer))
+            self.flush_listeners(False)
+        except MqttSnClientException as e:
+            self.logger.error(f"Receive error: {e}")
+
+    def on_loop_tick(self) -> None:
+        # Keep-alive and batch delay while no message arrives
+        if self.pending_publishes:
+            self.on_readable()
+        try:
+            self.check_keep_alive()
+            self.flush_listeners(False)
+            self.flush_publishes(False)
+        except MqttSnClientException as e:
+            self.logger.error(f"Keep alive error: {e}")
+        if self.loop is not None:
+            self.loop_timer = self.loop.call_later(self.LOOP_TICK, self.on_loop_tick)
+
+    def check_keep_alive(self) -> None:
+        """Send the PINGREQ when due without waiting: on_readable() receives the PINGRESP"""
+        if self.ping_deadline > 0:
+            if time.monotonic() < self.ping_deadline:
+                return
+            self.ping_deadline = 0.0
+            raise MqttSnClientException("Failed to receive PINGRESP.")
+        if self.keep_alive > 0 and self.last_transmit > 0 and (int(time.time()) - self.last_transmit) >= self.keep_alive:
+            self.logger.debug("Time to send a PING")
+            self.ping_deadline = time.monotonic() + self.timeout
+            self.send_packet(PingReqPacket().encode())
+
+    async def request_async(self, packet, expected: int, acknowledged: Callable) -> None:
+        """
+        Send a SUBSCRIBE/UNSUBSCRIBE and await its acknowledge. on_readable()
+        calls 'acknowledged' with it right away, before the next packets.
+        """
+        future = self.loop.create_future()
+        message_id = packet.get_message_id()
+        self.loop_requests[message_id] = (expected, future, acknowledged)
+        try:
+            self.send_packet(packet.encode())
+            await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise MqttSnClientException(f"Timed out waiting for {self.decode_type(expected)} (message id {message_id}).")
+        finally:
+            self.loop_requests.pop(message_id, None)
+
+    def resolve_loop_request(self, msg_type: int, buffer: bytes) -> bool:
+        """Complete the request awaited by request_async(). Returns False if it is not one of them."""
+        if msg_type == MqttSnConstants.TYPE_SUBACK:
+            packet = SubAckPacket()
+        elif msg_type == MqttSnConstants.TYPE_UNSUBACK:
+            packet = UnsubackPacket()
+        else:
+            return False
+        packet.decode(buffer)
+        request = self.loop_requests.get(packet.get_message_id())
+        if request is None or request[0] != msg_type:
+            return False
+        expected, future, acknowledged = request
+        if not future.done():
+            try:
+                acknowledged(packet)
+                future.set_result(None)
+            except MqttSnClientException as e:
+                future.set_exception(e)
+        return True
+
+    async def subscribe_async(self, topic_filter: str, qos: int, callback: MqttSnListener) -> None:
+        """send_subscribe() for the attached event loop, awaiting the SUBACK instead of blocking"""
+        def acknowledged(packet: SubAckPacket) -> None:
+            if packet.get_return_code() > 0:
+                raise MqttSnClientException(f"SUBSCRIBE error: {self.decode_return_code(packet.get_return_code())}")
+            self.subscribed(topic_filter, packet.get_topic_id(), callback)
+        await self.request_async(self.build_subscribe(topic_filter, qos), MqttSnConstants.TYPE_SUBACK, acknowledged)
+
+    async def unsubscribe_async(self, topic_filter: str) -> None:
+        """send_unsubscribe() for the attached event loop, awaiting the UNSUBACK instead of blocking"""
+        await self.request_async(self.build_unsubscribe(topic_filter), MqttSnConstants.TYPE_UNSUBACK,
+                                 lambda packet: self.unsubscribed(topic_filter))
+
+    def iter_messages(self, timeout: Optional[float] = None):
+        """
+        Yield the received messages, in place of polling() and listeners:
+
+            for msg in client.iter_messages(timeout=30):
+                ...
+
+        Waits on the socket without polling and sends the keep-alive pings,
+        the due coalesced publishes (see set_coalescing()) and expires the
+        stalled transfers (see set_reassembly()) every LOOP_TICK. Stops after 'timeout' seconds without messages (None waits
+        forever) or when the client is closed.
+
+        Messages go through the operators (see set_operators()) of their
+        topic, or of the first matching topic filter; the messages emitted
+        by time are yielded at most LOOP_TICK seconds late.
+        """
+        last_message = time.monotonic()
+        next_tick = last_message + self.LOOP_TICK
+        while self.connected:
+            if time.monotonic() >= next_tick:
+                next_tick = time.monotonic() + self.LOOP_TICK
+                if self.reassembler is not None:
+                    self.reassembler.expire()
+                self.flush_publishes(False)
+                if self.operators:
+                    for key, msgs in self.emit_operators(False):
+                        yield from msgs
+
+            buffer = self.wait_for(False, MqttSnConstants.TYPE_PUBLISH)
+            if buffer is not None:
+                for part in self.split_message(self.process_publish(buffer)):
+                    msg = self.prepare_message(part)
+                    if msg is None:
+                        continue
+                    key = self.operator_key(msg) if self.operators else None
+                    yield from ([msg] if key is None else self.run_operators(key, msg))
+                    last_message = time.monotonic()
+                continue
+
+            wait = None
+            if self.operators or self.coalescer is not None or self.reassembler is not None:
+                # Due envelopes, expired transfers and windows on the next tick
+                wait = max(0, next_tick - time.monotonic())
+            if self.keep_alive > 0 and self.last_transmit > 0:
+                keep_alive_wait = max(0, self.last_transmit + self.keep_alive - time.time())
+                wait = keep_alive_wait if wait is None else min(wait, keep_alive_wait)
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - last_message)
+                if remaining <= 0:
+                    return
+                wait = remaining if wait is None else min(wait, remaining)
+            select.select([self.datagram_socket], [], [], wait)
+
+    async def messages(self, topic_filter: str, qos: int = MqttSnConstants.QOS_0, max_queued: int = 0):
+        """
+        Subscribe to 'topic_filter' and yield its messages:
+
+            async for msg in client.messages("sensors/#"):
+                ...
+
+        The topic is unsubscribed when the generator is closed (aclose()
+        or garbage collection). The SUBACK and UNSUBACK are awaited, so the
+        event loop keeps running meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.attach_loop(loop)
+        stream = MqttSnMessageStream(loop, max_queued)
+        await self.subscribe_async(topic_filter, qos, stream)
+        try:
+            while True:
+                yield await stream.get()
+        finally:
+            if self.connected and self.loop is loop:
+                await self.unsubscribe_async(topic_filter)
+
+    def flush_listeners(self, force: bool) -> None:
+        """Let the listeners deliver what they hold back (if 'force' is False, only what is due)"""
+        if self.reassembler is not None:
+            self.reassembler.expire()
+        if self.operators:
+            self.flush_operators(force)
+        for callback in set(self.list_of_mqtt_sn_callback.values()):
+            if callback is not None:
+                callback.flush(force)
+
+    def process_publish(self, buffer: bytes) -> MqttSnMessage:
+        """Decode an incoming PUBLISH, acknowledge it and build the message"""
+        publish_packet = PublishPacket()
+        publish_packet.decode(buffer)
+
+        if publish_packet.get_type() != MqttSnConstants.TYPE_PUBLISH:
+            raise MqttSnClientException("Was expecting PUBLISH packet but received: " + self.decode_type(publish_packet.get_type()))
+
+        packet_retain = publish_packet.get_retain()
+        packet_qos = publish_packet.get_qos()
+        topic_id = publish_packet.get_topic_id()
+        topic_type = publish_packet.get_topic_type_id()
+        topic_name = self.resolve_topic_name(topic_id, topic_type)
+        if (topic_name is None and topic_type == MqttSnConstants.TOPIC_TYPE_NORMAL
+                and str(topic_id) not in self.list_of_mqtt_sn_callback):
+            # Unknown or evicted topic ID: the gateway has to REGISTER it again
+            self.logger.warning(f"PUBLISH to unknown topic ID {topic_id} rejected")
+            self.send_puback(publish_packet, MqttSnConstants.REJECTED_INVALID)
+        elif packet_qos == MqttSnConstants.QOS_1:
+            self.send_puback(publish_packet, MqttSnConstants.ACCEPTED)
+        payload = publish_packet.get_data()
+
+        self.logger.debug("topic ID is " + str(topic_id))
+        self.logger.debug("topic name is " + str(topic_name))
+        self.logger.debug(f"Payload is {payload}")
+
+        msg = MqttSnMessage()
+        msg.set_topic_id(topic_id)
+        msg.set_topic_name(topic_name)
+        msg.set_qos(packet_qos)
+        msg.set_retain(packet_retain)
+        msg.set_payload(payload)
+        msg.set_timestamp(time.time())
+        return msg
+
+    def resolve_topic_name(self, topic_id: int, topic_type: int) -> Optional[str]:
+        """Topic name of an incoming PUBLISH, None if unknown"""
+        if topic_type == MqttSnConstants.TOPIC_TYPE_PREDEFINED:
+            if self.topic_catalog is None:
+                return None
+            return self.topic_catalog.get_topic_name(topic_id)
+        if topic_type == MqttSnConstants.TOPIC_TYPE_SHORT:
+            return topic_id.to_bytes(2, 'big').decode('ascii', errors='replace')
+        return self.topic_map.get(topic_id)
+
+    def split_message(self, msg: MqttSnMessage) -> List[MqttSnMessage]:
+        """The messages of a received envelope, or just 'msg'"""
+        if not self.deaggregate or not is_aggregate(msg.get_payload()):
+            return [msg]
+        try:
+            payloads = decode_aggregate(msg.get_payload())
+        except MqttSnClientException as e:
+            self.logger.warning(f"Envelope on '{msg.get_topic_name()}' dropped: {e}")
+            return []
+        parts = []
+        for payload in payloads:
+            part = msg.copy()
+            part.set_payload(payload)
+            parts.append(part)
+        return parts
+
+    def prepare_message(self, msg: MqttSnMessage) -> Optional[MqttSnMessage]:
+        """Turn a received message into the one given to the listeners, None to hold it back"""
+        if self.reassembler is not None and is_chunk(msg.get_payload()):
+            key = msg.get_topic_name() if msg.get_topic_name() is not None else msg.get_topic_id()
+            try:
+                data = self.reassembler.add(key, msg.get_payload())
+            except MqttSnClientException as e:
+                self.logger.warning(f"Chunked transfer on '{key}' dropped: {e}")
+                return None
+            if data is None:
+                return None
+            msg.set_payload(data.obj)
+        if self.compression is not None and is_compressed(msg.get_payload()):
+            try:
+                msg.set_payload(self.compression.decompress(msg.get_payload()))
+            except MqttSnClientException as e:
+                self.logger.warning(f"Compressed payload on '{msg.get_topic_name()}' dropped: {e}")
+                return None
+        if self.schemas and msg.get_topic_name() is not None:
+            msg.set_schema(self.get_schema(msg.get_topic_name()))
+        return msg
+
+    def dispatch_message(self, msg: MqttSnMessage) -> None:
+        """Call the listener of the topic, or every listener with a matching topic filter"""
+        if self.deaggregate and is_aggregate(msg.get_payload()):
+            for part in self.split_message(msg):
+                self.route_message(part)
+        else:
+            self.route_message(msg)
+
+    def route_message(self, msg: MqttSnMessage) -> None:
+        msg = self.prepare_message(msg)
+        if msg is None:
+            return
+        topic_id = msg.get_topic_id()
+        topic_name = msg.get_topic_name()
+
+        mqtt_sn_callback = None
+        if topic_name is not None:
+            self.logger.debug("Search listener for Topic Name...")
+            mqtt_sn_callback = self.list_of_mqtt_sn_callback.get(topic_name)
+        if mqtt_sn_callback is None:
+            self.logger.debug("Search listener for Topic ID...")
+            mqtt_sn_callback = self.list_of_mqtt_sn_callback.get(str(topic_id))
+
+        if mqtt_sn_callback is not None:
+            self.logger.debug("Callback...")
+            key = topic_name if topic_name in self.list_of_mqtt_sn_callback else str(topic_id)
+            self.deliver_operated(key, mqtt_sn_callback, msg)
+        elif topic_name is not None:
+            self.logger.debug("Listener for topic name not found. Search by Topic Filter")
+            for filter_name, callback in list(self.list_of_mqtt_sn_callback.items()):
+                if callback is not None and self.is_matched(topic_name, filter_name):
+                    self.logger.debug("Found listener for topicID=" + str(topic_id) + ",topic name=" + str(topic_name) + ", topic filter=" + filter_name)
+                    self.deliver_operated(filter_name, callback, msg.copy())
+        else:
+            self.logger.warning(f"No listener for topic ID {topic_id}")
+
+    def deliver_operated(self, key: str, callback: MqttSnListener, msg: MqttSnMessage) -> None:
+        """Deliver a message through the operators of the listener, if any"""
+        if key not in self.operators:
+            self.deliver(callback, msg)
+            return
+        for msg in self.run_operators(key, msg):
+            self.deliver(callback, msg)
+
+    def run_operators(self, key: str, msg: MqttSnMessage) -> List[MqttSnMessage]:
+        with self.operators_lock:
+            msgs = [msg]
+            for operator in self.operators.get(key, ()):
+                msgs = [out for msg in msgs for out in operator.process(msg)]
+        return msgs
+
+    def operator_key(self, msg: MqttSnMessage) -> Optional[str]:
+        """Key of the operators of 'msg' when there is no listener: its topic, else the first matching filter"""
+        topic_name = msg.get_topic_name()
+        if topic_name in self.operators:
+            return topic_name
+        if str(msg.get_topic_id()) in self.operators:
+            return str(msg.get_topic_id())
+        if topic_name is not None:
+            for key in list(self.operators):
+                if self.is_matched(topic_name, key):
+                    return key
+        return None
+
+    def emit_operators(self, force: bool) -> List[Tuple[str, List[MqttSnMessage]]]:
+        """Messages the operators emit by time (windows ended by now), by operator key"""
+        with self.operators_lock:
+            emitted = []
+            for key, operators in self.operators.items():
+                msgs = []
+                for operator in operators:
+                    msgs = [out for msg in msgs for out in operator.process(msg)] + operator.flush(force)
+                if msgs:
+                    emitted.append((key, msgs))
+        return emitted
+
+    def flush_operators(self, force: bool) -> None:
+        """Deliver the messages the operators emit by time (windows ended by now)"""
+        for key, msgs in self.emit_operators(force):
+            callback = self.list_of_mqtt_sn_callback.get(key)
+            if callback is not None:
+                for msg in msgs:
+                    self.deliver(callback, msg)
+
+    def deliver(self, callback: MqttSnListener, msg: MqttSnMessage) -> None:
+        """Call the listener inline, or on the worker pool keeping the order per topic"""
+        if asyncio.iscoroutinefunction(callback.message_arrived):
+            # Coroutine listeners run on the attached event loop
+            if self.loop is None:
+                raise MqttSnClientException("Coroutine listeners need an event loop, see attach_loop().")
+            if running_loop() is self.loop:
+                task = self.loop.create_task(callback.message_arrived(msg))
+                self.loop_tasks.add(task)
+                task.add_done_callback(self.loop_task_done)
             else:
-                self.logger.debug("Callback...")
-                msg = MqttSnMessage()
-                msg.set_topic_id(topic_id)
-                msg.set_topic_name(topic_name)
-                msg.set_qos(packet_qos)
-                msg.set_retain(packet_retain)       
-                msg.set_payload(payload)                  
-                mqtt_sn_callback.message_arrived(msg)
+                asyncio.run_coroutine_threadsafe(callback.message_arrived(msg), self.loop)
+        elif self.dispatcher is None:
+            callback.message_arrived(msg)
+        else:
+            key = msg.get_topic_name() if msg.get_topic_name() is not None else msg.get_topic_id()
+            self.dispatcher.submit(key, callback.message_arrived, msg)
+
+    def loop_task_done(self, task: asyncio.Task) -> None:
+        self.loop_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Listener error: {task.exception()}")
 
     def register_topic(self, topic_id, topic_name):
         
@@ -1021,12 +2317,12 @@ class MqttSnClient:
             raise MqttSnClientException(f"Attempted to register invalid topic id: {topic_id}")
 
         # Check topic name is valid
-        if topic_name is None or len(topic_name) <= 0 or len(topic_name) > MqttSnConstants.MAX_TOPIC_LENGTH:
+        if topic_name is None or len(topic_name) <= 0 or len(topic_name) > MqttSnConstants.MAX_TOPIC_LENGTH_EXTENDED:
             raise MqttSnClientException("Attempted to register invalid topic name.")
 
         self.logger.debug(f"Registering topic {topic_id}={topic_name}")
 
-        self.topic_map[topic_id] = topic_name
+        self.topic_map.register(topic_id, topic_name)
 
     def unregister_topic(self, topic_id):
         
@@ -1034,15 +2330,11 @@ class MqttSnClient:
         if topic_id == 0x0000 or topic_id == 0xFFFF:
             raise MqttSnClientException(f"Attempted to register invalid topic id: {topic_id}")
         
-        topic_name = self.topic_map.get(topic_id)
+        topic_name = self.topic_map.unregister(topic_id)
         self.logger.debug(f"Unregistering topic ID '{topic_id}': {topic_name}")
-        self.topic_map.pop(topic_id, None)
 
     def search_topic_id(self, topic_name):
-        for key, value in self.topic_map.items():
-            if topic_name == value:
-                return key
-        return None
+        return self.topic_map.get_id(topic_name)
     
     def add_mqtt_sn_callback(self, topic: int, a_mqtt_sn_callback):
         self.logger.debug("Store MqttSnCallback for topic " + topic)
@@ -0,0 +1,145 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import logging
+from typing import Dict, Hashable, List, Tuple
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+# Envelope: magic, then (length as varint, payload) for each message
+AGGREGATE_MAGIC = b"MSAG"
+
+def is_aggregate(payload) -> bool:
+    return len(payload) >= len(AGGREGATE_MAGIC) and bytes(payload[:4]) == AGGREGATE_MAGIC
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def varint_length(value: int) -> int:
+    return max(1, (value.bit_length() + 6) // 7)
+
+def encode_aggregate(payloads) -> bytes:
+    parts = [AGGREGATE_MAGIC]
+    for payload in payloads:
+        parts.append(encode_varint(len(payload)))
+        parts.append(bytes(payload))
+    return b"".join(parts)
+
+def decode_aggregate(payload) -> List[bytes]:
+    """Payloads of an envelope"""
+    view = memoryview(payload)
+    payloads = []
+    offset = len(AGGREGATE_MAGIC)
+    end = len(view)
+    while offset < end:
+        length = 0
+        shift = 0
+        while True:
+            if offset >= end:
+                raise MqttSnClientException("Truncated aggregate payload.")
+            byte = view[offset]
+            offset += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        if offset + length > end:
+            raise MqttSnClientException("Truncated aggregate payload.")
+        payloads.append(bytes(view[offset:offset + length]))
+        offset += length
+    return payloads
+
+class MqttSnCoalescer:
+    """
+    Buffers of small messages to send as one envelope datagram.
+
+    Messages are grouped by key (topic, QoS, retain): a group is flushed
+    when it holds 'max_bytes' bytes or its first message is 'max_delay'
+    seconds old. A group of a single message is flushed as it is, unless it
+    would be mistaken for an envelope.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_MAX_BYTES = 1024
+    DEFAULT_MAX_DELAY = 0.02
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_delay: float = DEFAULT_MAX_DELAY):
+        if max_bytes <= len(AGGREGATE_MAGIC) + 1:
+            raise MqttSnClientException(f"Envelope size too small: {max_bytes} bytes")
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        # Payloads, envelope size and deadline by key
+        self.groups: Dict[Hashable, Tuple[List[bytes], int, float]] = {}
+        self.next_deadline = float("inf")
+        self.messages = 0
+        self.envelopes = 0
+
+    def add(self, key: Hashable, payload) -> List[Tuple[Hashable, bytes]]:
+        """Buffer a message. Returns the payloads to send now: full or expired groups."""
+        ready = []
+        now = time.monotonic()
+        entry = varint_length(len(payload)) + len(payload)
+        group = self.groups.get(key)
+        if group is not None and group[1] + entry > self.max_bytes:
+            ready.append(self.pop(key))
+            group = None
+        if len(AGGREGATE_MAGIC) + entry > self.max_bytes:
+            # Too big to share an envelope
+            self.messages += 1
+            ready.append((key, self.wrap([payload])))
+        elif group is None:
+            self.groups[key] = ([payload], len(AGGREGATE_MAGIC) + entry, now + self.max_delay)
+            self.next_deadline = min(self.next_deadline, now + self.max_delay)
+        else:
+            group[0].append(payload)
+            self.groups[key] = (group[0], group[1] + entry, group[2])
+        if now >= self.next_deadline:
+            ready.extend(self.flush(False))
+        return ready
+
+    def flush(self, force: bool = True) -> List[Tuple[Hashable, bytes]]:
+        """Payloads of the expired groups (all of them if 'force')"""
+        now = time.monotonic()
+        if not force and now < self.next_deadline:
+            return []
+        ready = [self.pop(key) for key, group in list(self.groups.items()) if force or now >= group[2]]
+        self.next_deadline = min((group[2] for group in self.groups.values()), default=float("inf"))
+        return ready
+
+    def pop(self, key: Hashable) -> Tuple[Hashable, bytes]:
+        payloads = self.groups.pop(key)[0]
+        self.messages += len(payloads)
+        return key, self.wrap(payloads)
+
+    def wrap(self, payloads: List[bytes]) -> bytes:
+        if len(payloads) == 1 and not is_aggregate(payloads[0]):
+            return payloads[0]
+        self.envelopes += 1
+        return encode_aggregate(payloads)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"messages": self.messages, "envelopes": self.envelopes, "buffered": sum(len(group[0]) for group in self.groups.values())}
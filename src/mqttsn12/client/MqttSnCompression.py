@@ -0,0 +1,168 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import zlib
+import logging
+from typing import Dict, Optional
+
+try:
+    import bz2
+except ImportError:
+    bz2 = None
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+# Compressed payload header: magic, codec, dictionary ID
+COMPRESSION_MAGIC = b"MSZ"
+COMPRESSION_HEADER_LENGTH = len(COMPRESSION_MAGIC) + 2
+
+DECOMPRESS_ERRORS = (zlib.error, OSError, ValueError, EOFError) + ((lzma.LZMAError,) if lzma is not None else ())
+
+def is_compressed(payload) -> bool:
+    return len(payload) >= COMPRESSION_HEADER_LENGTH and bytes(payload[:3]) == COMPRESSION_MAGIC
+
+class MqttSnCompression:
+    """
+    Payload compression with the stdlib codecs.
+
+    Compressed payloads start with a 5-byte header (magic, codec, dictionary
+    ID). Payloads shorter than 'threshold', or that do not get smaller, are
+    sent as they are. zlib can use preset dictionaries shared by publishers
+    and subscribers, registered with the same ID (1..255) on both sides.
+    Payloads decompressing to more than 'max_length' bytes are rejected.
+    """
+    logger = logging.getLogger(__name__)
+
+    CODEC_NONE = 0
+    CODEC_ZLIB = 1
+    CODEC_LZMA = 2
+    CODEC_BZ2 = 3
+
+    DEFAULT_THRESHOLD = 64
+    DEFAULT_MAX_LENGTH = 64 * 1024 * 1024
+
+    # Raw streams: the header already identifies the codec
+    LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 6}] if lzma is not None else None
+
+    def __init__(self, codec: int = CODEC_ZLIB, threshold: int = DEFAULT_THRESHOLD, level: int = -1,
+                 max_length: int = DEFAULT_MAX_LENGTH):
+        self.check_codec(codec)
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+        self.max_length = max_length
+        self.dictionaries: Dict[int, bytes] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def check_codec(self, codec: int) -> None:
+        if codec not in (self.CODEC_NONE, self.CODEC_ZLIB, self.CODEC_LZMA, self.CODEC_BZ2):
+            raise MqttSnClientException(f"Unknown compression codec: {codec}")
+        if codec == self.CODEC_LZMA and lzma is None:
+            raise MqttSnClientException("Compression codec lzma not available in this Python.")
+        if codec == self.CODEC_BZ2 and bz2 is None:
+            raise MqttSnClientException("Compression codec bz2 not available in this Python.")
+
+    def add_dictionary(self, dictionary_id: int, data: bytes) -> None:
+        """Preset zlib dictionary, typically sample payloads of the topic"""
+        if dictionary_id < 1 or dictionary_id > 255:
+            raise MqttSnClientException(f"Invalid dictionary ID: {dictionary_id} (1..255)")
+        self.dictionaries[dictionary_id] = bytes(data)
+
+    def get_dictionary(self, dictionary_id: int) -> bytes:
+        dictionary = self.dictionaries.get(dictionary_id)
+        if dictionary is None:
+            raise MqttSnClientException(f"Unknown compression dictionary: {dictionary_id}")
+        return dictionary
+
+    def compress(self, payload, codec: Optional[int] = None, dictionary_id: int = 0) -> bytes:
+        """Payload with header, or 'payload' itself when compressing is not worth it"""
+        if codec is None:
+            codec = self.codec
+        if codec == self.CODEC_NONE or len(payload) < self.threshold:
+            if is_compressed(payload):
+                # Would be mistaken for a compressed payload
+                return COMPRESSION_MAGIC + bytes([self.CODEC_NONE, 0]) + payload
+            return payload
+
+        if codec == self.CODEC_ZLIB:
+            if dictionary_id > 0:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=self.get_dictionary(dictionary_id))
+            else:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            data = compressor.compress(payload) + compressor.flush()
+        elif dictionary_id > 0:
+            raise MqttSnClientException("Compression dictionaries are supported by zlib only.")
+        elif codec == self.CODEC_LZMA:
+            self.check_codec(codec)
+            data = lzma.compress(payload, format=lzma.FORMAT_RAW, filters=self.LZMA_FILTERS)
+        else:
+            self.check_codec(codec)
+            data = bz2.compress(payload)
+
+        if len(data) + COMPRESSION_HEADER_LENGTH >= len(payload):
+            return self.compress(payload, self.CODEC_NONE)
+        self.bytes_in += len(payload)
+        self.bytes_out += len(data) + COMPRESSION_HEADER_LENGTH
+        return COMPRESSION_MAGIC + bytes([codec, dictionary_id]) + data
+
+    def decompress(self, payload) -> bytes:
+        """Original payload of a compressed one ('payload' itself if not compressed)"""
+        if not is_compressed(payload):
+            return payload
+        codec = payload[3]
+        dictionary_id = payload[4]
+        data = payload[COMPRESSION_HEADER_LENGTH:]
+        # One byte more than allowed tells an oversize payload from one of exactly 'max_length' bytes
+        limit = self.max_length + 1
+        try:
+            if codec == self.CODEC_NONE:
+                return bytes(data)
+            if codec == self.CODEC_ZLIB:
+                if dictionary_id > 0:
+                    decompressor = zlib.decompressobj(-15, zdict=self.get_dictionary(dictionary_id))
+                else:
+                    decompressor = zlib.decompressobj(-15)
+                result = decompressor.decompress(data, limit)
+                if len(result) < limit and not decompressor.unconsumed_tail:
+                    result += decompressor.flush()
+            else:
+                self.check_codec(codec)
+                if codec == self.CODEC_LZMA:
+                    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=self.LZMA_FILTERS)
+                else:
+                    decompressor = bz2.BZ2Decompressor()
+                result = decompressor.decompress(data, limit)
+                if len(result) < limit and not decompressor.eof:
+                    raise EOFError("Compressed data ended before the end-of-stream marker was reached")
+        except DECOMPRESS_ERRORS as e:
+            raise MqttSnClientException(f"Unable to decompress payload: {e}")
+        if len(result) > self.max_length:
+            raise MqttSnClientException(f"Decompressed payload too big (max {self.max_length} bytes)")
+        return result
+
+    def get_ratio(self) -> float:
+        """Compressed / original size of the compressed payloads"""
+        return self.bytes_out / self.bytes_in if self.bytes_in > 0 else 1.0
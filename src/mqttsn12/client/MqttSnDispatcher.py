@@ -0,0 +1,98 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Dict, Hashable, Optional
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+class MqttSnDispatcher:
+    """
+    Run callbacks on a worker pool keeping them serial per key.
+
+    Every key (the topic) has its own queue drained by at most one worker
+    at a time, so callbacks of the same topic run in arrival order while
+    callbacks of different topics run concurrently.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self.queues: Dict[Hashable, deque] = {}
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.errors = 0
+        self.closed = False
+
+    def submit(self, key: Hashable, fn: Callable, *args) -> None:
+        with self.lock:
+            if self.closed:
+                raise MqttSnClientException("Dispatcher closed.")
+            queue = self.queues.get(key)
+            if queue is not None:
+                # A worker is already draining this key
+                queue.append((fn, args))
+                return
+            self.queues[key] = deque([(fn, args)])
+        try:
+            self.executor.submit(self.run, key)
+        except RuntimeError as e:
+            # Executor shut down: nobody will drain the queue
+            with self.lock:
+                del self.queues[key]
+                if len(self.queues) == 0:
+                    self.idle.notify_all()
+            raise MqttSnClientException(f"Unable to dispatch on '{key}': {e}")
+
+    def run(self, key: Hashable) -> None:
+        while True:
+            with self.lock:
+                queue = self.queues[key]
+                if len(queue) == 0:
+                    del self.queues[key]
+                    if len(self.queues) == 0:
+                        self.idle.notify_all()
+                    return
+                fn, args = queue.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"Listener error on '{key}': {e}")
+
+    def pending(self) -> int:
+        """Number of callbacks waiting to run"""
+        with self.lock:
+            return sum(len(queue) for queue in self.queues.values())
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued callback has run. Returns False on timeout."""
+        with self.lock:
+            return self.idle.wait_for(lambda: len(self.queues) == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Refuse new callbacks and wait for the queued ones. Returns False on timeout."""
+        with self.lock:
+            self.closed = True
+        return self.flush(timeout)
@@ -0,0 +1,389 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.packets import PingReqPacket
+
+class MqttSnFailoverClient:
+    """
+    Client talking to a primary gateway with one or more warm standby gateways.
+
+    Every gateway gets its own MqttSnClient session. Standby sessions are
+    connected in advance (optionally in background), so switching over only
+    means changing the active session, re-subscribing and replaying the
+    QoS>0 messages that were not acknowledged by the failed gateway.
+
+    A monitor thread pings the sessions that have been silent for the
+    liveness interval and fails over after 'max_misses' PINGRESP missing
+    for 'ping_timeout' seconds each. Pings are sent without waiting: the
+    answers are read by the next call of the application or of the monitor.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_TIMEOUT = 0.5
+    DEFAULT_LIVENESS_INTERVAL = 0.1
+    DEFAULT_PING_TIMEOUT = 0.15
+    DEFAULT_MAX_MISSES = 2
+    DEFAULT_RECONNECT_INTERVAL = 5.0
+    # Packets read from a session at every liveness check
+    DRAIN_BATCH = 16
+
+    def __init__(self, configure: Optional[Callable[[MqttSnClient, int], None]] = None):
+        self.gateways: List[Tuple[str, int]] = []
+        self.sessions: List[Optional[MqttSnClient]] = []
+        self.misses: List[int] = []
+        self.ping_sent: List[float] = []
+        self.last_attempt: List[float] = []
+        self.active = 0
+        self.configure = configure
+        self.timeout = self.DEFAULT_TIMEOUT
+        self.liveness_interval = self.DEFAULT_LIVENESS_INTERVAL
+        self.ping_timeout = self.DEFAULT_PING_TIMEOUT
+        self.max_misses = self.DEFAULT_MAX_MISSES
+        self.reconnect_interval = self.DEFAULT_RECONNECT_INTERVAL
+        self.warm_standby = True
+        self.subscriptions = []
+        # QoS>0 messages not acknowledged yet: [topic_name, data, qos, retain, Future or None if synchronous]
+        self.inflight = []
+        self.lock = threading.RLock()
+        self.monitor = None
+        self.running = False
+
+    def add_gateway(self, host: str, port: int = MqttSnConstants.DEFAULT_PORT) -> None:
+        """Add a gateway. The first one added is the primary."""
+        with self.lock:
+            self.gateways.append((host, port))
+            self.sessions.append(None)
+            self.misses.append(0)
+            self.ping_sent.append(0.0)
+            self.last_attempt.append(0.0)
+
+    def set_timeout(self, value: float):
+        """Timeout (seconds, may be fractional) used by every session."""
+        self.timeout = value
+
+    def set_liveness(self, interval: float, max_misses: int, ping_timeout: Optional[float] = None):
+        """
+        Ping the sessions silent for 'interval' seconds, fail after 'max_misses'
+        PINGRESP not received within 'ping_timeout' seconds (default: unchanged).
+        """
+        self.liveness_interval = interval
+        self.max_misses = max_misses
+        if ping_timeout is not None:
+            self.ping_timeout = ping_timeout
+
+    def set_warm_standby(self, value: bool):
+        self.warm_standby = value
+
+    def get_active_gateway(self) -> Tuple[str, int]:
+        return self.gateways[self.active]
+
+    def get_active_client(self) -> MqttSnClient:
+        return self.sessions[self.active]
+
+    def connect(self, background: bool = True) -> None:
+        """Connect the primary and, in warm standby mode, every standby gateway"""
+        if len(self.gateways) == 0:
+            raise MqttSnClientException("No gateway configured.")
+
+        with self.lock:
+            self.active = 0
+            for index in range(len(self.gateways)):
+                try:
+                    self.connect_session(index)
+                    break
+                except MqttSnClientException:
+                    self.active = index + 1
+            if self.active >= len(self.gateways):
+                raise MqttSnClientException("Failed to connect to any MQTT-SN gateway.")
+
+        if self.warm_standby and not background:
+            self.connect_standbys()
+
+        self.running = True
+        self.monitor = threading.Thread(target=self.run_monitor, name="mqttsn-failover", daemon=True)
+        self.monitor.start()
+
+    def open_session(self, index: int) -> MqttSnClient:
+        """Open and connect a session to gateway 'index', without making it available"""
+        self.last_attempt[index] = time.monotonic()
+        host, port = self.gateways[index]
+        client = MqttSnClient()
+        client.set_client_id(None)
+        if self.configure is not None:
+            self.configure(client, index)
+        client.set_timeout(self.timeout)
+        try:
+            client.open(host, port)
+            client.send_connect()
+        except MqttSnClientException:
+            client.close()
+            raise
+        self.logger.info(f"Connected to gateway {host}:{port}")
+        return client
+
+    def install_session(self, index: int, client: MqttSnClient) -> None:
+        self.sessions[index] = client
+        self.misses[index] = 0
+        self.ping_sent[index] = 0.0
+
+    def connect_session(self, index: int) -> MqttSnClient:
+        """Open and connect the session of gateway 'index'"""
+        client = self.open_session(index)
+        with self.lock:
+            self.install_session(index, client)
+        return client
+
+    def connect_standbys(self) -> None:
+        """Connect the missing standby sessions, without holding the lock while connecting"""
+        for index in range(len(self.gateways)):
+            with self.lock:
+                if index == self.active or self.sessions[index] is not None:
+                    continue
+                if self.last_attempt[index] > 0 and (time.monotonic() - self.last_attempt[index]) < self.reconnect_interval:
+                    continue
+                self.last_attempt[index] = time.monotonic()
+            try:
+                client = self.open_session(index)
+            except MqttSnClientException:
+                self.logger.warning(f"Standby gateway {self.gateways[index]} not available.")
+                continue
+            with self.lock:
+                if index != self.active and self.sessions[index] is None:
+                    self.install_session(index, client)
+                    client = None
+            if client is not None:
+                # Connected by a failover in the meantime
+                client.close()
+
+    def drop_session(self, index: int) -> None:
+        client = self.sessions[index]
+        self.sessions[index] = None
+        self.misses[index] = 0
+        self.ping_sent[index] = 0.0
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def drain(self, client: MqttSnClient) -> None:
+        """Read what the gateway sent (PINGRESP, acknowledges), without blocking"""
+        for _ in range(self.DRAIN_BATCH):
+            client.wait_for(False, None)
+
+    def check_session(self, index: int, client: MqttSnClient, now: float) -> bool:
+        """Update the liveness of a session, pinging it if silent. Returns False if it failed."""
+        if self.misses[index] >= self.max_misses:
+            return False
+        try:
+            self.drain(client)
+        except MqttSnClientException:
+            # Unreachable: the pending ping times out
+            pass
+        if now - client.last_heard < self.liveness_interval or (self.ping_sent[index] > 0 and client.last_heard >= self.ping_sent[index]):
+            self.misses[index] = 0
+            self.ping_sent[index] = 0.0
+            if now - client.last_heard < self.liveness_interval:
+                return True
+        elif self.ping_sent[index] > 0:
+            if now - self.ping_sent[index] < self.ping_timeout:
+                return True
+            self.misses[index] += 1
+            self.logger.warning(f"Gateway {self.gateways[index]} missed {self.misses[index]} keep alive.")
+            if self.misses[index] >= self.max_misses:
+                return False
+        try:
+            client.send_packet(PingReqPacket().encode())
+        except MqttSnClientException:
+            pass
+        self.ping_sent[index] = now
+        return True
+
+    def check_liveness(self) -> None:
+        """Ping silent sessions and switch over when the active one misses too many PINGRESP"""
+        with self.lock:
+            now = time.monotonic()
+            failed = [index for index, client in enumerate(self.sessions)
+                      if client is not None and not self.check_session(index, client, now)]
+            for index in failed:
+                if index == self.active:
+                    self.failover()
+                else:
+                    self.drop_session(index)
+
+    def run_monitor(self) -> None:
+        while self.running:
+            time.sleep(self.liveness_interval)
+            try:
+                self.check_liveness()
+                if self.warm_standby:
+                    self.connect_standbys()
+            except Exception as e:
+                self.logger.error(f"Failover monitor error: {e}")
+
+    def failover(self) -> List[Tuple[list, int]]:
+        """
+        Switch to the next available gateway, re-subscribe and replay in-flight
+        messages. Returns the synchronous messages replayed, with their topic ID.
+        """
+        with self.lock:
+            replayed = []
+            failed = self.active
+            self.drop_session(failed)
+            count = len(self.gateways)
+            for offset in range(1, count + 1):
+                index = (failed + offset) % count
+                if self.sessions[index] is None:
+                    if index == failed:
+                        continue
+                    try:
+                        self.connect_session(index)
+                    except MqttSnClientException:
+                        continue
+                self.active = index
+                self.logger.warning(f"Failover from {self.gateways[failed]} to {self.gateways[index]}")
+                try:
+                    for topic_filter, qos, callback in self.subscriptions:
+                        self.sessions[index].send_subscribe(topic_filter, qos, callback)
+                    self.replay(replayed)
+                    return replayed
+                except MqttSnClientException:
+                    self.drop_session(index)
+            raise MqttSnClientException("No MQTT-SN gateway available.")
+
+    def replay(self, replayed: List[Tuple[list, int]]) -> None:
+        client = self.sessions[self.active]
+        for entry in list(self.inflight):
+            self.logger.debug(f"Replaying in-flight message on topic {entry[0]}")
+            if entry[4] is None:
+                replayed.append((entry, client.send_publish(*entry[:4])))
+                self.inflight.remove(entry)
+            else:
+                self.submit(entry)
+
+    def send_publish(self, topic_name: str, data: bytes, qos: int, retain: bool = False) -> int:
+        """Publish on the active gateway, failing over if it does not answer"""
+        with self.lock:
+            entry = [topic_name, data, qos, retain, None]
+            if qos > 0:
+                self.inflight.append(entry)
+            try:
+                topic_id = self.sessions[self.active].send_publish(topic_name, data, qos, retain)
+            except MqttSnClientException:
+                try:
+                    replayed = self.failover()
+                except MqttSnClientException:
+                    # The caller gets the error: never publish it later
+                    if entry in self.inflight:
+                        self.inflight.remove(entry)
+                    raise
+                if qos > 0:
+                    # Already replayed by failover()
+                    return next(topic_id for replayed_entry, topic_id in replayed if replayed_entry is entry)
+                return self.sessions[self.active].send_publish(topic_name, data, qos, retain)
+            if qos > 0:
+                self.inflight.remove(entry)
+            return topic_id
+
+    def publish_async(self, topic_name: str, data: bytes, qos: int, retain: bool = False) -> Future:
+        """
+        Publish without waiting for the acknowledge (see MqttSnClient.publish_async).
+        QoS>0 messages not acknowledged by a failing gateway are replayed on the
+        next one: the Future is resolved by the gateway that acknowledges it.
+        """
+        with self.lock:
+            if qos <= 0:
+                return self.sessions[self.active].publish_async(topic_name, data, qos, retain)
+            entry = [topic_name, data, qos, retain, Future()]
+            self.inflight.append(entry)
+            self.submit(entry)
+            return entry[4]
+
+    def submit(self, entry) -> None:
+        client = self.sessions[self.active]
+        try:
+            future = client.publish_async(*entry[:4])
+        except MqttSnClientException:
+            # Kept in flight, replayed after the failover
+            self.misses[self.active] = self.max_misses
+            return
+        future.add_done_callback(lambda done: self.acknowledged(entry, client, done))
+
+    def acknowledged(self, entry, client: MqttSnClient, future: Future) -> None:
+        with self.lock:
+            if future.exception() is None:
+                if entry in self.inflight:
+                    self.inflight.remove(entry)
+                    entry[4].set_result(future.result())
+            elif client is self.sessions[self.active]:
+                # Not acknowledged after the retries: let the monitor fail over
+                self.misses[self.active] = self.max_misses
+            # Otherwise the session was dropped and the message is replayed on the next one
+
+    def wait_for_publishes(self, timeout: Optional[float] = None) -> bool:
+        """Read the acknowledges of the active session (see MqttSnClient.wait_for_publishes)"""
+        with self.lock:
+            return self.sessions[self.active].wait_for_publishes(timeout)
+
+    def send_subscribe(self, topic_filter: str, qos: int, callback: MqttSnListener) -> None:
+        """Subscribe on the active gateway; subscriptions are renewed after a failover"""
+        with self.lock:
+            self.subscriptions.append((topic_filter, qos, callback))
+            try:
+                self.sessions[self.active].send_subscribe(topic_filter, qos, callback)
+            except MqttSnClientException:
+                self.failover()
+
+    def polling(self) -> None:
+        with self.lock:
+            try:
+                self.sessions[self.active].polling()
+            except MqttSnClientException:
+                self.failover()
+
+    def close(self) -> None:
+        """Stop the monitor, disconnect and close every session"""
+        self.running = False
+        if self.monitor is not None:
+            self.monitor.join()
+            self.monitor = None
+        with self.lock:
+            for index, client in enumerate(self.sessions):
+                if client is None:
+                    continue
+                try:
+                    client.send_disconnect(0)
+                except MqttSnClientException:
+                    pass
+                self.drop_session(index)
+            for entry in self.inflight:
+                if entry[4] is not None and not entry[4].done():
+                    entry[4].set_exception(MqttSnClientException("Connection closed."))
+            self.inflight.clear()
@@ -0,0 +1,212 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import struct
+import threading
+import time
+import logging
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+HEDGE_TAG_LENGTH = 8
+
+class MqttSnHedgedPublisher:
+    """
+    Publish on gateway A and, when the PUBACK/PUBCOMP is late, also on gateway B.
+
+    The hedge delay is the configured percentile of the recent acknowledge
+    latencies of gateway A, so only the slowest publishes are duplicated.
+    The call returns as soon as the first gateway acknowledges the message.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_PERCENTILE = 95
+    DEFAULT_HISTORY = 200
+    DEFAULT_INITIAL_DELAY = 0.05
+    DEFAULT_MIN_DELAY = 0.002
+
+    def __init__(self, client_a: MqttSnClient, client_b: MqttSnClient):
+        self.clients = (client_a, client_b)
+        self.executors = (ThreadPoolExecutor(max_workers=1), ThreadPoolExecutor(max_workers=1))
+        self.topic_ids: tuple = ({}, {})
+        self.percentile = self.DEFAULT_PERCENTILE
+        self.latencies = deque(maxlen=self.DEFAULT_HISTORY)
+        self.initial_delay = self.DEFAULT_INITIAL_DELAY
+        self.min_delay = self.DEFAULT_MIN_DELAY
+        self.tag_payloads = False
+        self.tag_prefix = os.urandom(4)
+        self.tag_counter = 0
+        self.lock = threading.Lock()
+        self.outstanding = [0, 0]
+        self.hedged = 0
+        self.won_by = [0, 0]
+
+    def set_percentile(self, value: float):
+        if value <= 0 or value > 100:
+            raise MqttSnClientException("Percentile must be in (0, 100].")
+        self.percentile = value
+
+    def set_tag_payloads(self, value: bool):
+        """Prefix every payload with an 8-byte id, stripped by MqttSnDeduplicatingListener"""
+        self.tag_payloads = value
+
+    def get_hedge_delay(self) -> float:
+        """Current hedge delay in seconds"""
+        with self.lock:
+            if len(self.latencies) == 0:
+                return self.initial_delay
+            ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"hedged": self.hedged, "won_by_a": self.won_by[0], "won_by_b": self.won_by[1]}
+
+    def resolve_topic_id(self, index: int, topic_name: str) -> int:
+        topic_id = self.topic_ids[index].get(topic_name)
+        if topic_id is None:
+            topic_id = self.clients[index].send_register(topic_name)
+            self.topic_ids[index][topic_name] = topic_id
+        return topic_id
+
+    def submit(self, index: int, *args):
+        with self.lock:
+            self.outstanding[index] += 1
+        return self.executors[index].submit(self.publish_on, index, *args)
+
+    def publish_on(self, index: int, topic_name, topic_id: int, topic_type: int, data: bytes, qos: int, retain: bool) -> int:
+        try:
+            started = time.monotonic()
+            if topic_name is not None:
+                topic_id = self.resolve_topic_id(index, topic_name)
+            self.clients[index].send_publish_with_id(topic_id, topic_type, data, qos, retain)
+            if index == 0:
+                with self.lock:
+                    self.latencies.append(time.monotonic() - started)
+            return index
+        finally:
+            with self.lock:
+                self.outstanding[index] -= 1
+
+    def send_publish(self, topic_name: str, data: bytes, qos: int = MqttSnConstants.QOS_1, retain: bool = False) -> int:
+        """Hedged publish to a normal topic. Returns the index (0=A, 1=B) of the first gateway to acknowledge."""
+        return self.hedge(topic_name, 0, MqttSnConstants.TOPIC_TYPE_NORMAL, data, qos, retain)
+
+    def send_publish_with_id(self, topic_id: int, topic_type: int, data: bytes, qos: int = MqttSnConstants.QOS_1, retain: bool = False) -> int:
+        """Hedged publish to a predefined or short topic ID, which is the same on both gateways"""
+        if topic_type == MqttSnConstants.TOPIC_TYPE_NORMAL:
+            raise MqttSnClientException("Normal topic IDs are gateway specific: use send_publish() with the topic name.")
+        return self.hedge(None, topic_id, topic_type, data, qos, retain)
+
+    def hedge(self, topic_name, topic_id: int, topic_type: int, data: bytes, qos: int, retain: bool) -> int:
+        if qos not in (MqttSnConstants.QOS_1, MqttSnConstants.QOS_2):
+            raise MqttSnClientException("Hedged publish requires QoS 1 or 2.")
+
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if self.tag_payloads:
+            with self.lock:
+                self.tag_counter = (self.tag_counter + 1) & 0xFFFFFFFF
+                tag = self.tag_prefix + struct.pack('>I', self.tag_counter)
+            data = tag + data
+
+        args = (topic_name, topic_id, topic_type, data, qos, retain)
+        with self.lock:
+            stuck = self.outstanding[0] > 0
+            if stuck:
+                self.hedged += 1
+        if stuck:
+            # Gateway A is still stuck on an earlier publish: do not queue behind it
+            pending = {self.submit(1, *args)}
+        else:
+            delay = self.get_hedge_delay()
+            pending = {self.submit(0, *args)}
+            done, _ = wait(pending, timeout=delay)
+            if not done or next(iter(done)).exception() is not None:
+                self.logger.debug(f"No acknowledge from gateway A after {delay:.3f}s, hedging on gateway B")
+                with self.lock:
+                    self.hedged += 1
+                pending.add(self.submit(1, *args))
+
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future.result()
+                    with self.lock:
+                        self.won_by[winner] += 1
+                    return winner
+                errors.append(future.exception())
+
+        raise MqttSnClientException(f"Hedged publish failed on both gateways: {errors}")
+
+    def close(self) -> None:
+        for executor in self.executors:
+            executor.shutdown(wait=True)
+
+class MqttSnDeduplicatingListener(MqttSnListener):
+    """
+    Listener wrapper dropping the duplicates produced by hedged publishes.
+
+    Requires MqttSnHedgedPublisher.set_tag_payloads(True): the 8-byte hedge
+    id is stripped and a message is a duplicate when its id was seen less
+    than 'window' seconds before. Identical payloads with different ids are
+    all delivered.
+    """
+
+    DEFAULT_WINDOW = 5.0
+    DEFAULT_CAPACITY = 10000
+
+    def __init__(self, listener: MqttSnListener, window: float = DEFAULT_WINDOW):
+        self.listener = listener
+        self.window = window
+        self.seen = OrderedDict()
+        self.capacity = self.DEFAULT_CAPACITY
+        self.duplicates = 0
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        payload = msg.get_payload()
+        now = time.monotonic()
+        key = bytes(payload[:HEDGE_TAG_LENGTH])
+        msg.set_payload(payload[HEDGE_TAG_LENGTH:])
+
+        while self.seen:
+            received = next(iter(self.seen.values()))
+            if now - received <= self.window and len(self.seen) < self.capacity:
+                break
+            self.seen.popitem(last=False)
+
+        if key in self.seen:
+            self.duplicates += 1
+            return
+        self.seen[key] = now
+        self.listener.message_arrived(msg)
+
+    def flush(self, force: bool = True) -> None:
+        self.listener.flush(force)
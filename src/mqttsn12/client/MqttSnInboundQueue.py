@@ -0,0 +1,141 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import itertools
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+class MqttSnInboundQueue:
+    """
+    Bounded queue between the socket and the listeners.
+
+    When the queue is full the policy decides what is lost:
+    - POLICY_BLOCK: the receiver waits, leaving datagrams in the socket buffer
+    - POLICY_DROP_OLDEST: the oldest queued message is dropped
+    - POLICY_DROP_NEWEST: the incoming message is dropped
+    - POLICY_CONFLATE: only the latest message of each topic is kept; when
+      the queue is full of different topics the oldest one is dropped
+    Every loss is counted.
+    """
+    logger = logging.getLogger(__name__)
+
+    POLICY_BLOCK = "block"
+    POLICY_DROP_OLDEST = "drop-oldest"
+    POLICY_DROP_NEWEST = "drop-newest"
+    POLICY_CONFLATE = "conflate"
+
+    POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_CONFLATE)
+
+    def __init__(self, capacity: int, policy: str = POLICY_BLOCK):
+        if capacity < 1:
+            raise MqttSnClientException("Inbound queue capacity must be at least 1.")
+        if policy not in self.POLICIES:
+            raise MqttSnClientException(f"Unknown inbound queue policy '{policy}' (valid: {', '.join(self.POLICIES)})")
+        self.capacity = capacity
+        self.policy = policy
+        # Keys are unique per message, except for POLICY_CONFLATE where the key is the topic
+        self.items: "OrderedDict[object, object]" = OrderedDict()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+        self.accepted = 0
+        self.delivered = 0
+        self.blocked = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.conflated = 0
+
+    def key(self, msg) -> object:
+        if self.policy == self.POLICY_CONFLATE:
+            topic_name = msg.get_topic_name()
+            return topic_name if topic_name is not None else msg.get_topic_id()
+        return next(self.sequence)
+
+    def put(self, msg, timeout: Optional[float] = None) -> bool:
+        """Queue a message. Returns False if it was dropped."""
+        with self.lock:
+            if self.closed:
+                return False
+            key = self.key(msg)
+            if self.policy == self.POLICY_CONFLATE and key in self.items:
+                self.items[key] = msg
+                self.conflated += 1
+                return True
+
+            if len(self.items) >= self.capacity:
+                if self.policy == self.POLICY_BLOCK:
+                    self.blocked += 1
+                    if not self.not_full.wait_for(lambda: self.closed or len(self.items) < self.capacity, timeout):
+                        self.dropped_newest += 1
+                        return False
+                    if self.closed:
+                        return False
+                elif self.policy == self.POLICY_DROP_NEWEST:
+                    self.dropped_newest += 1
+                    return False
+                else:
+                    self.items.popitem(last=False)
+                    self.dropped_oldest += 1
+
+            self.items[key] = msg
+            self.accepted += 1
+            self.not_empty.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None):
+        """Oldest queued message, None on timeout or when the queue is closed and empty"""
+        with self.lock:
+            if not self.not_empty.wait_for(lambda: self.closed or len(self.items) > 0, timeout):
+                return None
+            if len(self.items) == 0:
+                return None
+            _, msg = self.items.popitem(last=False)
+            self.delivered += 1
+            self.not_full.notify()
+            return msg
+
+    def close(self) -> None:
+        """Wake up the waiting threads. Queued messages can still be read."""
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "queued": len(self.items),
+                "accepted": self.accepted,
+                "delivered": self.delivered,
+                "blocked": self.blocked,
+                "dropped_oldest": self.dropped_oldest,
+                "dropped_newest": self.dropped_newest,
+                "conflated": self.conflated,
+            }
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -0,0 +1,141 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import struct
+import threading
+import time
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from mqttsn12.client.MqttSnClient import MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnSchema import MqttSnSchema
+
+# Prefix of every collected record: receive timestamp, topic ID
+RECORD_HEADER = struct.Struct("<dH")
+
+NUMPY_BYTE_ORDERS = {"<": "<", ">": ">", "!": ">", "=": "=", "@": "="}
+
+def numpy_format(byte_order: str, code: str) -> str:
+    """NumPy type of a struct field, with the same size"""
+    size = struct.calcsize(byte_order + code)
+    kind = code[-1]
+    if kind == "s":
+        return f"S{size}"
+    if kind == "?":
+        return "?"
+    if kind in "bhilqn":
+        return f"{NUMPY_BYTE_ORDERS[byte_order]}i{size}"
+    if kind in "BHILQN":
+        return f"{NUMPY_BYTE_ORDERS[byte_order]}u{size}"
+    if kind in "efd":
+        return f"{NUMPY_BYTE_ORDERS[byte_order]}f{size}"
+    raise MqttSnClientException(f"Struct format '{code}' has no NumPy type")
+
+class MqttSnNumpyCollector(MqttSnListener):
+    """
+    Listener collecting the records of the payloads of a schema into NumPy
+    structured arrays.
+
+    Each received record is stored after its receive timestamp and topic ID
+    in one buffer; batch_arrived() gets the buffer as an array of fields
+    'timestamp', 'topic_id' and the fields of the schema (np.frombuffer, no
+    per-field conversion), every 'max_records' records or once the oldest
+    one has waited 'max_delay' seconds. Payloads can hold several records.
+    Needs NumPy.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_MAX_RECORDS = 4096
+    DEFAULT_MAX_DELAY = 1.0
+
+    def __init__(self, schema: MqttSnSchema, max_records: int = DEFAULT_MAX_RECORDS, max_delay: float = DEFAULT_MAX_DELAY):
+        if np is None:
+            raise MqttSnClientException("MqttSnNumpyCollector needs NumPy (pip install numpy).")
+        if max_records < 1:
+            raise MqttSnClientException("Parameter 'max_records' must be at least 1.")
+        self.schema = schema
+        self.max_records = max_records
+        self.max_delay = max_delay
+        self.dtype = self.build_dtype(schema)
+        self.buffer = bytearray()
+        self.records = 0
+        self.rejected = 0
+        self.batch_started = 0.0
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def build_dtype(schema: MqttSnSchema):
+        byte_order = schema.struct.format[0]
+        names = ["timestamp", "topic_id"]
+        formats = ["<f8", "<u2"]
+        offsets = [0, 8]
+        for index, code in enumerate(schema.formats):
+            # Offset of the field, padding included for the native alignment
+            offset = struct.calcsize(byte_order + "".join(schema.formats[:index + 1])) - struct.calcsize(byte_order + code)
+            names.append(schema.names[index])
+            formats.append(numpy_format(byte_order, code))
+            offsets.append(RECORD_HEADER.size + offset)
+        return np.dtype({"names": names, "formats": formats, "offsets": offsets,
+                         "itemsize": RECORD_HEADER.size + schema.size})
+
+    def batch_arrived(self, batch) -> None:
+        """Callback interface for a batch of records (NumPy structured array)"""
+        pass
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        payload = msg.get_payload()
+        size = self.schema.size
+        if len(payload) == 0 or len(payload) % size != 0:
+            self.rejected += 1
+            self.logger.warning(f"Payload of {len(payload)} bytes on topic ID {msg.get_topic_id()} is not a list of '{self.schema.name}'")
+            return
+        header = RECORD_HEADER.pack(msg.get_timestamp(), msg.get_topic_id())
+        with self.lock:
+            if self.records == 0:
+                self.batch_started = time.monotonic()
+            if len(payload) == size:
+                self.buffer += header
+                self.buffer += payload
+            else:
+                view = memoryview(payload)
+                for offset in range(0, len(payload), size):
+                    self.buffer += header
+                    self.buffer += view[offset:offset + size]
+            self.records += len(payload) // size
+            if self.records >= self.max_records:
+                self.flush()
+
+    def flush(self, force: bool = True) -> None:
+        """Deliver the pending records (if 'force' is False, only when 'max_delay' has elapsed)"""
+        with self.lock:
+            if self.records == 0:
+                return
+            if not force and time.monotonic() - self.batch_started < self.max_delay:
+                return
+            batch = np.frombuffer(self.buffer, dtype=self.dtype)
+            self.buffer = bytearray()
+            self.records = 0
+            self.batch_arrived(batch)
@@ -0,0 +1,234 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import math
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, Hashable, List, Optional
+
+from mqttsn12.client.MqttSnClient import MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnSchema import MqttSnSchema
+
+# Payload of the messages emitted by the windows, see MqttSnMessage.get_record()
+AGGREGATE_SCHEMA = MqttSnSchema("Aggregate", [("start", "d"), ("end", "d"), ("count", "Q"),
+                                              ("min", "d"), ("max", "d"), ("mean", "d")])
+
+def topic_key(msg: MqttSnMessage) -> Hashable:
+    return msg.get_topic_name() if msg.get_topic_name() is not None else msg.get_topic_id()
+
+class MqttSnOperator:
+    """
+    Stream operator between the decoding of the received messages and their
+    listener, see MqttSnClient.set_operators(). Operators keep their state
+    per topic.
+
+    The value of a message is 'value(msg)' when given, the field 'field' of
+    its record (see MqttSnClient.set_schema()) when given, otherwise its
+    payload as a number.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, field: Optional[str] = None, value: Optional[Callable[[MqttSnMessage], float]] = None):
+        self.field = field
+        self.value = value
+
+    def value_of(self, msg: MqttSnMessage) -> float:
+        if self.value is not None:
+            return self.value(msg)
+        if self.field is not None:
+            return getattr(msg.get_record(), self.field)
+        return float(msg.get_payload())
+
+    def process(self, msg: MqttSnMessage) -> List[MqttSnMessage]:
+        """The messages to pass on for a received one"""
+        return [msg]
+
+    def flush(self, force: bool) -> List[MqttSnMessage]:
+        """The messages due by now (if 'force', everything held back)"""
+        return []
+
+class MqttSnPane:
+    __slots__ = ("count", "min", "max", "sum")
+
+    def __init__(self):
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+class MqttSnWindowState:
+    __slots__ = ("template", "current", "panes")
+
+    def __init__(self, template: MqttSnMessage, current: int):
+        self.template = template
+        self.current = current
+        # Pane index -> aggregate of the pane
+        self.panes: Dict[int, MqttSnPane] = {}
+
+class MqttSnSlidingWindow(MqttSnOperator):
+    """
+    Count, min, max and mean of the values of each topic over the last
+    'duration' seconds, emitted every 'step' seconds as one message whose
+    record is an AGGREGATE_SCHEMA. Windows are aligned on the receive
+    timestamps; windows without values are not emitted.
+
+    Values are summarized in panes of 'step' seconds as they arrive, so the
+    raw messages are not kept. 'duration' must be a multiple of 'step'.
+    """
+
+    def __init__(self, duration: float, step: float, field: Optional[str] = None,
+                 value: Optional[Callable[[MqttSnMessage], float]] = None):
+        super().__init__(field, value)
+        if step <= 0 or duration < step:
+            raise MqttSnClientException("Window duration must be at least the step, which must be positive.")
+        panes = duration / step
+        if abs(panes - round(panes)) > 1e-9:
+            raise MqttSnClientException(f"Window duration {duration} is not a multiple of the step {step}")
+        self.duration = duration
+        self.step = step
+        self.panes = int(round(panes))
+        self.states: Dict[Hashable, MqttSnWindowState] = {}
+
+    def process(self, msg: MqttSnMessage) -> List[MqttSnMessage]:
+        try:
+            value = self.value_of(msg)
+        except (MqttSnClientException, ValueError, AttributeError) as e:
+            self.logger.warning(f"No value in message on topic '{topic_key(msg)}': {e}")
+            return []
+        index = int((msg.get_timestamp() or time.time()) // self.step)
+        key = topic_key(msg)
+        state = self.states.get(key)
+        if state is None:
+            state = MqttSnWindowState(msg, index)
+            self.states[key] = state
+        out = self.advance(state, index)
+        state.template = msg
+        pane = state.panes.get(index)
+        if pane is None:
+            pane = MqttSnPane()
+            state.panes[index] = pane
+        pane.add(value)
+        return out
+
+    def flush(self, force: bool) -> List[MqttSnMessage]:
+        index = int(time.time() // self.step)
+        out = []
+        for state in self.states.values():
+            out.extend(self.advance(state, max(index, state.current + 1) if force else index))
+        return out
+
+    def advance(self, state: MqttSnWindowState, index: int) -> List[MqttSnMessage]:
+        """Emit the windows ending before pane 'index'"""
+        out = []
+        # After 'panes' windows, the panes seen so far are out of any window
+        for last in range(state.current, min(index, state.current + self.panes)):
+            msg = self.emit(state, last)
+            if msg is not None:
+                out.append(msg)
+        if index > state.current:
+            state.current = index
+            for old in [old for old in state.panes if old <= index - self.panes]:
+                del state.panes[old]
+        return out
+
+    def emit(self, state: MqttSnWindowState, last: int) -> Optional[MqttSnMessage]:
+        window = MqttSnPane()
+        for index in range(last - self.panes + 1, last + 1):
+            pane = state.panes.get(index)
+            if pane is not None and pane.count > 0:
+                window.count += pane.count
+                window.sum += pane.sum
+                window.min = min(window.min, pane.min)
+                window.max = max(window.max, pane.max)
+        if window.count == 0:
+            return None
+        end = (last + 1) * self.step
+        msg = state.template.copy()
+        msg.set_payload(AGGREGATE_SCHEMA.pack(end - self.duration, end, window.count, window.min, window.max,
+                                              window.sum / window.count))
+        msg.set_schema(AGGREGATE_SCHEMA)
+        msg.set_timestamp(end)
+        return msg
+
+class MqttSnTumblingWindow(MqttSnSlidingWindow):
+    """Aggregate of the values of each topic over consecutive windows of 'duration' seconds"""
+
+    def __init__(self, duration: float, field: Optional[str] = None,
+                 value: Optional[Callable[[MqttSnMessage], float]] = None):
+        super().__init__(duration, duration, field, value)
+
+class MqttSnSampler(MqttSnOperator):
+    """Pass at most one message per topic every 'interval' seconds (the first one)"""
+
+    def __init__(self, interval: float):
+        super().__init__()
+        self.interval = interval
+        self.next_sample: Dict[Hashable, float] = {}
+
+    def process(self, msg: MqttSnMessage) -> List[MqttSnMessage]:
+        timestamp = msg.get_timestamp() or time.time()
+        key = topic_key(msg)
+        if timestamp < self.next_sample.get(key, -math.inf):
+            return []
+        self.next_sample[key] = timestamp + self.interval
+        return [msg]
+
+class MqttSnDeduplicator(MqttSnOperator):
+    """
+    Pass a message only when its value differs from the last passed one of
+    the topic by more than 'tolerance'. Without 'field' and 'value' the
+    payloads are compared as they are.
+    """
+
+    def __init__(self, field: Optional[str] = None, value: Optional[Callable[[MqttSnMessage], float]] = None,
+                 tolerance: float = 0.0):
+        super().__init__(field, value)
+        if tolerance > 0 and field is None and value is None:
+            raise MqttSnClientException("Parameter 'tolerance' needs a numeric 'field' or 'value'.")
+        self.tolerance = tolerance
+        self.last_values: Dict[Hashable, object] = {}
+
+    def process(self, msg: MqttSnMessage) -> List[MqttSnMessage]:
+        if self.field is None and self.value is None:
+            value = bytes(msg.get_payload())
+        else:
+            try:
+                value = self.value_of(msg)
+            except (MqttSnClientException, ValueError, AttributeError) as e:
+                self.logger.warning(f"No value in message on topic '{topic_key(msg)}': {e}")
+                return []
+        key = topic_key(msg)
+        if key in self.last_values:
+            last = self.last_values[key]
+            if value == last or (self.tolerance > 0 and abs(value - last) <= self.tolerance):
+                return []
+        self.last_values[key] = value
+        return [msg]
@@ -0,0 +1,170 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import logging
+from multiprocessing import util
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+# Shared memory segments attached by a worker process, by name
+attached_segments: Dict[str, "shared_memory.SharedMemory"] = {}
+
+def attach_segment(name: str) -> "shared_memory.SharedMemory":
+    """Worker side: the segment 'name', attached once and closed when the worker exits"""
+    segment = attached_segments.get(name)
+    if segment is None:
+        try:
+            segment = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13
+            segment = shared_memory.SharedMemory(name=name)
+        if not attached_segments:
+            # Run by the worker on exit, unlike atexit handlers
+            util.Finalize(None, close_attached_segments, exitpriority=10)
+        attached_segments[name] = segment
+    return segment
+
+def close_attached_segments() -> None:
+    while attached_segments:
+        name, segment = attached_segments.popitem()
+        segment.close()
+
+def run_offloaded(fn: Callable, segment_name: Optional[str], offset: int, length: int,
+                  topic_id: int, topic_name: str, qos: int, retain: bool, payload: bytes):
+    """Worker side: call 'fn' with a message whose payload is a view on the shared slot"""
+    view = None
+    if segment_name is not None:
+        view = attach_segment(segment_name).buf[offset:offset + length]
+        payload = view
+    try:
+        return fn(MqttSnMessage(topic_id, topic_name, qos, retain, payload))
+    finally:
+        if view is not None:
+            view.release()
+
+class MqttSnProcessListener(MqttSnListener):
+    """
+    Listener running a CPU-heavy handler on a process pool.
+
+    'fn' must be a picklable (module level) function taking an MqttSnMessage.
+    The payload is copied into a slot of a shared memory segment and the
+    handler receives a memoryview on it, valid only during the call; payloads
+    bigger than a slot are passed as bytes. When every slot is busy the
+    receiving thread waits for one to be free.
+
+    If 'result_topic' is set, the non-None values returned by 'fn' are
+    published there by the client thread on the next polling().
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_SLOTS = 64
+    DEFAULT_SLOT_SIZE = MqttSnConstants.MAX_PACKET_LENGTH_EXTENDED
+
+    def __init__(self, client: MqttSnClient, fn: Callable, result_topic: Optional[str] = None,
+                 result_qos: int = MqttSnConstants.QOS_0, workers: Optional[int] = None,
+                 slots: int = DEFAULT_SLOTS, slot_size: int = DEFAULT_SLOT_SIZE):
+        if shared_memory is None:
+            raise MqttSnClientException("MqttSnProcessListener needs multiprocessing.shared_memory (Python 3.8+).")
+        if slots < 1 or slot_size < 1:
+            raise MqttSnClientException("Parameters 'slots' and 'slot_size' must be at least 1.")
+        self.client = client
+        self.fn = fn
+        self.result_topic = result_topic
+        self.result_qos = result_qos
+        self.slot_size = slot_size
+        self.segment = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        self.free_slots = deque(range(slots))
+        self.slots_available = threading.Semaphore(slots)
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.results = deque()
+        self.errors = 0
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        payload = msg.get_payload()
+        slot = None
+        if len(payload) <= self.slot_size:
+            self.slots_available.acquire()
+            with self.lock:
+                slot = self.free_slots.popleft()
+            offset = slot * self.slot_size
+            self.segment.buf[offset:offset + len(payload)] = payload
+            future = self.pool.submit(run_offloaded, self.fn, self.segment.name, offset, len(payload),
+                                      msg.get_topic_id(), msg.get_topic_name(), msg.get_qos(), msg.get_retain(), b"")
+        else:
+            future = self.pool.submit(run_offloaded, self.fn, None, 0, 0,
+                                      msg.get_topic_id(), msg.get_topic_name(), msg.get_qos(), msg.get_retain(), bytes(payload))
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(lambda f: self.completed(f, slot))
+
+    def completed(self, future: Future, slot: Optional[int]) -> None:
+        with self.lock:
+            self.pending.discard(future)
+            if slot is not None:
+                self.free_slots.append(slot)
+        if slot is not None:
+            self.slots_available.release()
+        try:
+            result = future.result()
+        except Exception as e:
+            self.errors += 1
+            self.logger.error(f"Offloaded handler error: {e}")
+            return
+        if self.result_topic is not None and result is not None:
+            self.results.append(result)
+
+    def flush(self, force: bool = True) -> None:
+        """Publish the results (if 'force' is True, after waiting for the running handlers)"""
+        if force:
+            with self.lock:
+                pending = list(self.pending)
+            for future in pending:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+        while self.results:
+            result = self.results.popleft()
+            if not self.client.is_connected():
+                self.logger.warning(f"Client not connected, dropped {len(self.results) + 1} results")
+                self.results.clear()
+                return
+            self.client.send_publish(self.result_topic, result, self.result_qos)
+
+    def close(self) -> None:
+        """Wait for the running handlers, stop the pool and free the shared memory"""
+        self.pool.shutdown(wait=True)
+        self.segment.close()
+        self.segment.unlink()
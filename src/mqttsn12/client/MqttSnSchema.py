@@ -0,0 +1,109 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import struct
+import sys
+from collections import namedtuple
+from typing import Iterable, List, Sequence, Tuple
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+class MqttSnSchema:
+    """
+    Fixed-layout binary record, packed and unpacked with a precompiled
+    struct.Struct:
+
+        reading = MqttSnSchema("Reading", [("time", "I"), ("temperature", "f"), ("humidity", "f")])
+        payload = reading.pack(1700000000, 21.5, 40.0)
+        reading.unpack(payload).temperature
+
+    A payload can hold several records (pack_many / unpack_many). Records
+    are little-endian without padding by default ('byte_order' as in the
+    struct module).
+    """
+
+    def __init__(self, name: str, fields: Sequence[Tuple[str, str]], byte_order: str = "<"):
+        if not fields:
+            raise MqttSnClientException("A schema needs at least one field.")
+        if byte_order not in "<>!=@":
+            raise MqttSnClientException(f"Invalid byte order: '{byte_order}'")
+        self.name = name
+        self.names = tuple(field[0] for field in fields)
+        self.formats = tuple(field[1] for field in fields)
+        try:
+            self.struct = struct.Struct(byte_order + "".join(self.formats))
+            self.record = namedtuple(name, self.names)
+        except (struct.error, ValueError) as e:
+            raise MqttSnClientException(f"Invalid schema '{name}': {e}")
+        self.size = self.struct.size
+        # Same scalar type in every field, stored in the native order and size: payloads can be cast in place
+        native = byte_order in "=@" or (byte_order == "<") == (sys.byteorder == "little")
+        fmt = self.formats[0]
+        self.cast_format = fmt if (native and len(set(self.formats)) == 1 and fmt in "bBhHiIlLqQfd"
+                                   and struct.calcsize(byte_order + fmt) == struct.calcsize("@" + fmt)) else None
+
+    def pack(self, *values) -> bytes:
+        """Payload of one record, from the field values in order or from a record"""
+        if len(values) == 1 and isinstance(values[0], tuple):
+            values = values[0]
+        try:
+            return self.struct.pack(*values)
+        except struct.error as e:
+            raise MqttSnClientException(f"Unable to pack '{self.name}': {e}")
+
+    def pack_many(self, records: Iterable[Sequence]) -> bytes:
+        """Payload of consecutive records"""
+        records = list(records)
+        buffer = bytearray(self.size * len(records))
+        pack_into = self.struct.pack_into
+        try:
+            for index, values in enumerate(records):
+                pack_into(buffer, index * self.size, *values)
+        except struct.error as e:
+            raise MqttSnClientException(f"Unable to pack '{self.name}': {e}")
+        return bytes(buffer)
+
+    def unpack(self, payload):
+        """The record of a payload, as a named tuple"""
+        if len(payload) != self.size:
+            raise MqttSnClientException(f"Payload of {len(payload)} bytes is not a '{self.name}' ({self.size} bytes)")
+        return self.record._make(self.struct.unpack(payload))
+
+    def unpack_many(self, payload) -> List:
+        """The records of a payload of consecutive records"""
+        self.check_length(payload)
+        make = self.record._make
+        return [make(values) for values in self.struct.iter_unpack(payload)]
+
+    def cast(self, payload) -> memoryview:
+        """
+        Records as a 2D memoryview (records x fields) on the payload, without
+        copies. Only for schemas whose fields share the type and the native
+        byte order.
+        """
+        if self.cast_format is None:
+            raise MqttSnClientException(f"Schema '{self.name}' can not be cast: mixed types or foreign byte order")
+        self.check_length(payload)
+        return memoryview(payload).cast("B").cast(self.cast_format, (len(payload) // self.size, len(self.names)))
+
+    def check_length(self, payload) -> None:
+        if len(payload) % self.size != 0:
+            raise MqttSnClientException(f"Payload of {len(payload)} bytes is not a list of '{self.name}' ({self.size} bytes)")
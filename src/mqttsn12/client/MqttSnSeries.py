@@ -0,0 +1,151 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import struct
+from array import array
+from typing import Iterable, Optional
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+# Series header: magic, codec, array typecode, sample count
+SERIES_HEADER = struct.Struct(">4sBcI")
+SERIES_MAGIC = b"MSTS"
+
+CODEC_DELTA = 1
+CODEC_XOR = 2
+
+INTEGER_TYPECODES = "bBhHiIlLqQ"
+# Float typecode -> unsigned integer typecode of the same size
+FLOAT_BITS = {"f": "I", "d": "Q"}
+
+def is_series(payload) -> bool:
+    return len(payload) >= SERIES_HEADER.size and bytes(payload[:4]) == SERIES_MAGIC
+
+def encode_series(values: Iterable, typecode: Optional[str] = None, codec: Optional[int] = None) -> bytes:
+    """
+    Payload of a numeric series: integers as zigzag varints of the deltas
+    (CODEC_DELTA), floats as the XOR with the previous sample, without its
+    leading and trailing zero bytes (CODEC_XOR). 'values' can be an array,
+    its typecode is used when 'typecode' is None ('q' or 'd' otherwise).
+    """
+    if typecode is None:
+        if isinstance(values, array):
+            typecode = values.typecode
+        else:
+            values = list(values)
+            typecode = "d" if any(isinstance(value, float) for value in values) else "q"
+    samples = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    if codec is None:
+        codec = CODEC_XOR if typecode in FLOAT_BITS else CODEC_DELTA
+
+    out = bytearray(SERIES_HEADER.pack(SERIES_MAGIC, codec, typecode.encode(), len(samples)))
+    if codec == CODEC_DELTA:
+        if typecode not in INTEGER_TYPECODES:
+            raise MqttSnClientException(f"Delta encoding needs an integer typecode, not '{typecode}'")
+        encode_deltas(samples, out)
+    elif codec == CODEC_XOR:
+        if typecode not in FLOAT_BITS:
+            raise MqttSnClientException(f"XOR encoding needs a float typecode, not '{typecode}'")
+        # Same bytes seen as unsigned integers, in one pass
+        bits = array(FLOAT_BITS[typecode], samples.tobytes())
+        encode_xor(bits, bits.itemsize, out)
+    else:
+        raise MqttSnClientException(f"Unknown series codec: {codec}")
+    return bytes(out)
+
+def encode_deltas(samples: array, out: bytearray) -> None:
+    previous = 0
+    append = out.append
+    for value in samples:
+        delta = value - previous
+        previous = value
+        zigzag = delta << 1 if delta >= 0 else ((-delta) << 1) - 1
+        while zigzag >= 0x80:
+            append((zigzag & 0x7F) | 0x80)
+            zigzag >>= 7
+        append(zigzag)
+
+def encode_xor(bits: array, width: int, out: bytearray) -> None:
+    # Control byte: leading zero bytes << 4 | trailing zero bytes, then the bytes between them
+    previous = 0
+    for value in bits:
+        xor = value ^ previous
+        previous = value
+        if xor == 0:
+            out.append(width << 4)
+            continue
+        leading = width - (xor.bit_length() + 7) // 8
+        trailing = ((xor & -xor).bit_length() - 1) // 8
+        out.append(leading << 4 | trailing)
+        out += (xor >> (8 * trailing)).to_bytes(width - leading - trailing, "big")
+
+def decode_series(payload) -> array:
+    """Samples of a series payload, as an array of the typecode it was encoded with"""
+    if not is_series(payload):
+        raise MqttSnClientException("Payload is not a numeric series.")
+    magic, codec, typecode, count = SERIES_HEADER.unpack_from(payload)
+    typecode = typecode.decode()
+    data = memoryview(payload)[SERIES_HEADER.size:]
+    try:
+        if codec == CODEC_DELTA and typecode in INTEGER_TYPECODES:
+            return array(typecode, decode_deltas(data, count))
+        if codec == CODEC_XOR and typecode in FLOAT_BITS:
+            bits = array(FLOAT_BITS[typecode], decode_xor(data, count, struct.calcsize(FLOAT_BITS[typecode])))
+            return array(typecode, bits.tobytes())
+    except (IndexError, OverflowError) as e:
+        raise MqttSnClientException(f"Invalid series payload: {e}")
+    raise MqttSnClientException(f"Unknown series codec {codec} for typecode '{typecode}'")
+
+def decode_deltas(data: memoryview, count: int) -> list:
+    values = []
+    append = values.append
+    offset = 0
+    previous = 0
+    for _ in range(count):
+        zigzag = 0
+        shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            zigzag |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        previous += (zigzag >> 1) ^ -(zigzag & 1)
+        append(previous)
+    return values
+
+def decode_xor(data: memoryview, count: int, width: int) -> list:
+    values = []
+    append = values.append
+    offset = 0
+    previous = 0
+    for _ in range(count):
+        control = data[offset]
+        offset += 1
+        length = width - (control >> 4) - (control & 0x0F)
+        if length > 0:
+            if offset + length > len(data):
+                raise IndexError("truncated sample")
+            previous ^= int.from_bytes(data[offset:offset + length], "big") << (8 * (control & 0x0F))
+            offset += length
+        append(previous)
+    return values
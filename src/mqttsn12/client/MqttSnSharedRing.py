@@ -0,0 +1,189 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import select
+import struct
+import time
+import logging
+from typing import List, Optional
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+# Ring header: magic, slot count, slot size, messages written
+RING_HEADER = struct.Struct("<4sIIxxxxQ")
+RING_MAGIC = b"MSRB"
+# Slot header: sequence, topic ID, flags (QoS, retain), payload length
+SLOT_HEADER = struct.Struct("<QHBxI")
+FLAG_RETAIN = 0x04
+
+# Segments created by the writers of this process
+created_segments = set()
+
+def check_shared_memory() -> None:
+    if shared_memory is None:
+        raise MqttSnClientException("The shared ring buffer needs multiprocessing.shared_memory (Python 3.8+).")
+
+class MqttSnRingWriter(MqttSnListener):
+    """
+    Single writer of a shared memory ring buffer of received messages.
+
+    Subscribe it as the listener of the high-rate topics; every message is
+    written in the next slot (topic ID, QoS, retain, payload) overwriting the
+    oldest one. Each slot is guarded by a sequence number (odd while it is
+    being written), so readers in other processes need no lock: they detect
+    the slots overwritten under them and count them as lost.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_SLOTS = 1024
+    DEFAULT_SLOT_SIZE = 1024
+    IDLE_WAIT = 0.1
+
+    def __init__(self, name: Optional[str] = None, slots: int = DEFAULT_SLOTS, slot_size: int = DEFAULT_SLOT_SIZE):
+        check_shared_memory()
+        if slots < 1 or slot_size < 1:
+            raise MqttSnClientException("Parameters 'slots' and 'slot_size' must be at least 1.")
+        self.slots = slots
+        self.slot_size = slot_size
+        self.stride = SLOT_HEADER.size + slot_size
+        self.segment = shared_memory.SharedMemory(name=name, create=True, size=RING_HEADER.size + slots * self.stride)
+        created_segments.add(self.segment.name)
+        self.buf = self.segment.buf
+        self.written = 0
+        self.truncated = 0
+        RING_HEADER.pack_into(self.buf, 0, RING_MAGIC, slots, slot_size, 0)
+
+    def get_name(self) -> str:
+        """Name of the segment, to pass to the readers"""
+        return self.segment.name
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        payload = msg.get_payload()
+        if len(payload) > self.slot_size:
+            self.truncated += 1
+            self.logger.warning(f"Payload of {len(payload)} bytes truncated to the slot size ({self.slot_size})")
+            payload = payload[:self.slot_size]
+        flags = msg.get_qos() & 0x03
+        if msg.get_retain():
+            flags |= FLAG_RETAIN
+
+        sequence = self.written
+        offset = RING_HEADER.size + (sequence % self.slots) * self.stride
+        # Odd while writing, then even: 2 * (sequence + 1) identifies the message
+        SLOT_HEADER.pack_into(self.buf, offset, 2 * sequence + 1, 0, 0, 0)
+        start = offset + SLOT_HEADER.size
+        self.buf[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.buf, offset, 2 * sequence + 2, msg.get_topic_id(), flags, len(payload))
+        self.written = sequence + 1
+        struct.pack_into("<Q", self.buf, RING_HEADER.size - 8, self.written)
+
+    def serve(self, client: MqttSnClient, stop) -> None:
+        """Receiver loop: poll 'client' until 'stop' (a threading or multiprocessing Event) is set"""
+        while not stop.is_set():
+            select.select([client.datagram_socket], [], [], self.IDLE_WAIT)
+            client.polling()
+
+    def close(self) -> None:
+        """Release and destroy the segment"""
+        self.buf.release()
+        self.segment.close()
+        self.segment.unlink()
+        created_segments.discard(self.segment.name)
+
+class MqttSnRingReader:
+    """
+    Reader of a ring buffer written by MqttSnRingWriter, usually in another
+    process. Every reader has its own position; a reader slower than the
+    writer loses the overwritten messages (see 'lost').
+    """
+    logger = logging.getLogger(__name__)
+
+    IDLE_WAIT = 0.0005
+
+    def __init__(self, name: str, from_start: bool = False):
+        check_shared_memory()
+        self.segment = self.attach(name)
+        self.buf = self.segment.buf
+        magic, self.slots, self.slot_size, written = RING_HEADER.unpack_from(self.buf, 0)
+        if magic != RING_MAGIC:
+            raise MqttSnClientException(f"Shared memory '{name}' is not a message ring buffer.")
+        self.stride = SLOT_HEADER.size + self.slot_size
+        self.next = 0 if from_start else written
+        self.lost = 0
+
+    @staticmethod
+    def attach(name: str):
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: the resource tracker would destroy the segment when this process exits
+            segment = shared_memory.SharedMemory(name=name)
+            if segment.name not in created_segments:
+                resource_tracker.unregister(segment._name, "shared_memory")
+            return segment
+
+    def get_written(self) -> int:
+        return struct.unpack_from("<Q", self.buf, RING_HEADER.size - 8)[0]
+
+    def read(self, max_messages: int = 100, timeout: float = 0.0) -> List[MqttSnMessage]:
+        """Up to 'max_messages' new messages, waiting at most 'timeout' seconds for the first one"""
+        deadline = time.monotonic() + timeout
+        while True:
+            messages = self.read_available(max_messages)
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(self.IDLE_WAIT)
+
+    def read_available(self, max_messages: int) -> List[MqttSnMessage]:
+        messages = []
+        written = self.get_written()
+        if written - self.next > self.slots:
+            self.lost += written - self.slots - self.next
+            self.next = written - self.slots
+        while self.next < written and len(messages) < max_messages:
+            offset = RING_HEADER.size + (self.next % self.slots) * self.stride
+            expected = 2 * self.next + 2
+            sequence, topic_id, flags, length = SLOT_HEADER.unpack_from(self.buf, offset)
+            start = offset + SLOT_HEADER.size
+            payload = bytes(self.buf[start:start + min(length, self.slot_size)])
+            # Overwritten before or while copying it
+            if sequence != expected or SLOT_HEADER.unpack_from(self.buf, offset)[0] != expected:
+                self.lost += 1
+            else:
+                messages.append(MqttSnMessage(topic_id, None, flags & 0x03, bool(flags & FLAG_RETAIN), payload))
+            self.next += 1
+        return messages
+
+    def __iter__(self):
+        while True:
+            for msg in self.read(timeout=self.IDLE_WAIT * 100):
+                yield msg
+
+    def close(self) -> None:
+        self.buf.release()
+        self.segment.close()
@@ -0,0 +1,149 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import logging
+from typing import Dict, List, Optional
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnTopicCatalog import MqttSnTopicCatalog
+
+class MqttSnTopicAliases:
+    """
+    Publish frequency tracker selecting the hot topics of a client.
+
+    A topic becomes hot when it is published at least 'hot_threshold'
+    times per 'window' seconds. Topics found in the alias table (a catalog
+    of predefined IDs shared with the gateway) are published with their
+    predefined ID, hot or not; the other hot topics keep their registered
+    ID for the whole session. The hot topics can be exported as a gateway
+    manifest to extend the shared alias table.
+    """
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_HOT_THRESHOLD = 10
+    DEFAULT_WINDOW = 60.0
+    DEFAULT_MAX_HOT = 256
+    DEFAULT_MAX_TRACKED = 10000
+
+    def __init__(self, alias_table: Optional[MqttSnTopicCatalog] = None,
+                 hot_threshold: int = DEFAULT_HOT_THRESHOLD, window: float = DEFAULT_WINDOW):
+        if hot_threshold < 1:
+            raise MqttSnClientException("Parameter 'hot_threshold' must be at least 1.")
+        if window <= 0:
+            raise MqttSnClientException("Parameter 'window' must be positive.")
+        self.alias_table = alias_table
+        self.hot_threshold = hot_threshold
+        self.window = window
+        self.max_hot = self.DEFAULT_MAX_HOT
+        self.max_tracked = self.DEFAULT_MAX_TRACKED
+        # Two-bucket sliding window: counts of the current and of the previous window
+        self.window_start = time.monotonic()
+        self.current: Dict[str, int] = {}
+        self.previous: Dict[str, int] = {}
+        self.hot: Dict[str, float] = {}
+        self.cooled: List[str] = []
+
+    def set_alias_table(self, value: MqttSnTopicCatalog):
+        self.alias_table = value
+
+    def rotate(self, now: float) -> None:
+        elapsed = now - self.window_start
+        if elapsed < self.window:
+            return
+        if elapsed < 2 * self.window:
+            self.previous = self.current
+        else:
+            self.previous = {}
+        self.current = {}
+        self.window_start = now - (elapsed % self.window)
+
+    def rate(self, topic_name: str, now: float) -> float:
+        """Estimated publishes of 'topic_name' in the last window"""
+        weight = 1.0 - (now - self.window_start) / self.window
+        return self.current.get(topic_name, 0) + self.previous.get(topic_name, 0) * weight
+
+    def observe(self, topic_name: str) -> bool:
+        """Count a publish of 'topic_name'. Returns True if the topic is hot."""
+        now = time.monotonic()
+        self.rotate(now)
+        if topic_name in self.current or len(self.current) < self.max_tracked:
+            self.current[topic_name] = self.current.get(topic_name, 0) + 1
+
+        rate = self.rate(topic_name, now)
+        if topic_name in self.hot:
+            self.hot[topic_name] = rate
+            return True
+        if rate < self.hot_threshold:
+            return False
+        if len(self.hot) >= self.max_hot:
+            coldest = min(self.hot, key=lambda name: self.rate(name, now))
+            if self.rate(coldest, now) >= rate:
+                return False
+            del self.hot[coldest]
+            self.cooled.append(coldest)
+        self.hot[topic_name] = rate
+        self.logger.debug(f"Topic '{topic_name}' is hot ({rate:.1f} publishes per window)")
+        return True
+
+    def is_hot(self, topic_name: str) -> bool:
+        return topic_name in self.hot
+
+    def pop_cooled(self) -> List[str]:
+        """Topics that left the hot set since the last call"""
+        cooled, self.cooled = self.cooled, []
+        return cooled
+
+    def get_alias(self, topic_name: str) -> Optional[int]:
+        """Predefined ID of 'topic_name' in the alias table, None otherwise"""
+        if self.alias_table is None or topic_name not in self.alias_table:
+            return None
+        return self.alias_table.get_topic_id(topic_name)
+
+    def get_hot_topics(self) -> List[str]:
+        """Hot topics, hottest first"""
+        now = time.monotonic()
+        return sorted(self.hot, key=lambda name: self.rate(name, now), reverse=True)
+
+    def to_manifest(self, first_topic_id: int = 1, client_id: str = MqttSnTopicCatalog.ANY_CLIENT) -> List[str]:
+        """Manifest lines (gateway predefined topic format) for the hot topics without alias"""
+        lines = []
+        used = set() if self.alias_table is None else set(self.alias_table.names_by_id)
+        topic_id = first_topic_id
+        for topic_name in self.get_hot_topics():
+            if self.alias_table is not None and topic_name in self.alias_table:
+                continue
+            while topic_id in used:
+                topic_id += 1
+            lines.append(f"{client_id},{topic_name},{topic_id}")
+            used.add(topic_id)
+        return lines
+
+    def write_manifest(self, path: str, first_topic_id: int = 1, client_id: str = MqttSnTopicCatalog.ANY_CLIENT) -> int:
+        lines = self.to_manifest(first_topic_id, client_id)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# ClientId, TopicName, TopicId\n")
+                for line in lines:
+                    f.write(line + "\n")
+        except OSError as e:
+            raise MqttSnClientException(f"Unable to write manifest '{path}': {e}")
+        return len(lines)
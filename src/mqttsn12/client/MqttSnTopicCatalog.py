@@ -0,0 +1,115 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import logging
+from typing import Dict, Iterable, Optional
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+class MqttSnTopicCatalog:
+    """
+    In-memory map between topic names and predefined topic IDs.
+
+    The manifest uses the format of the Paho MQTT-SN gateway
+    'predefinedTopic.conf' file, one entry per line:
+
+        # ClientId, TopicName, TopicId
+        *,sensors/temperature,1
+        my-client,sensors/humidity,2
+
+    '*' entries apply to every client; entries for a specific client
+    override them. Empty lines and lines starting with '#' are ignored.
+    """
+    logger = logging.getLogger(__name__)
+
+    ANY_CLIENT = "*"
+
+    def __init__(self):
+        self.ids_by_name: Dict[str, int] = {}
+        self.names_by_id: Dict[int, str] = {}
+
+    @classmethod
+    def from_file(cls, path: str, client_id: Optional[str] = None) -> "MqttSnTopicCatalog":
+        catalog = cls()
+        catalog.load(path, client_id)
+        return catalog
+
+    def load(self, path: str, client_id: Optional[str] = None) -> int:
+        """Load the entries of 'client_id' (and of every client) from a manifest file"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return self.parse(f, client_id)
+        except OSError as e:
+            raise MqttSnClientException(f"Unable to read topic catalog '{path}': {e}")
+
+    def parse(self, lines: Iterable[str], client_id: Optional[str] = None) -> int:
+        """Load manifest lines. Returns the number of entries added."""
+        shared = []
+        specific = []
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if len(line) == 0 or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) != 3:
+                raise MqttSnClientException(f"Topic catalog line {number} is not 'ClientId,TopicName,TopicId': {line}")
+            owner, topic_name, topic_id = fields
+            try:
+                topic_id = int(topic_id)
+            except ValueError:
+                raise MqttSnClientException(f"Topic catalog line {number} has an invalid topic ID: {fields[2]}")
+            if owner == self.ANY_CLIENT:
+                shared.append((topic_name, topic_id))
+            elif client_id is not None and owner == client_id:
+                specific.append((topic_name, topic_id))
+
+        for topic_name, topic_id in shared + specific:
+            self.add(topic_name, topic_id)
+        return len(shared) + len(specific)
+
+    def add(self, topic_name: str, topic_id: int) -> None:
+        if topic_id <= 0x0000 or topic_id >= 0xFFFF:
+            raise MqttSnClientException(f"Invalid predefined topic ID: {topic_id}")
+        if topic_name is None or len(topic_name) == 0:
+            raise MqttSnClientException("Invalid predefined topic name.")
+
+        old_name = self.names_by_id.get(topic_id)
+        if old_name is not None:
+            self.ids_by_name.pop(old_name, None)
+        old_id = self.ids_by_name.get(topic_name)
+        if old_id is not None:
+            self.names_by_id.pop(old_id, None)
+
+        self.ids_by_name[topic_name] = topic_id
+        self.names_by_id[topic_id] = topic_name
+        self.logger.debug(f"Predefined topic {topic_id}={topic_name}")
+
+    def get_topic_id(self, topic_name: str) -> Optional[int]:
+        return self.ids_by_name.get(topic_name)
+
+    def get_topic_name(self, topic_id: int) -> Optional[str]:
+        return self.names_by_id.get(topic_id)
+
+    def __contains__(self, topic_name: str) -> bool:
+        return topic_name in self.ids_by_name
+
+    def __len__(self) -> int:
+        return len(self.ids_by_name)
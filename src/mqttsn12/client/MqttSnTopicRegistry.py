@@ -0,0 +1,139 @@
+# MIT License
+#
+# Copyright (c) 2025 Marco Ratto
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import sys
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+
+class MqttSnTopicRegistry:
+    """
+    Registered topic IDs of a session with O(1) lookup in both directions.
+
+    With a capacity greater than zero the least recently used topics are
+    evicted when the registry is full; pinned topics (subscriptions, hot
+    topics) are never evicted. Topic names are interned, so the many
+    messages of a topic share the same string.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = capacity
+        self.names_by_id: "OrderedDict[int, str]" = OrderedDict()
+        self.ids_by_name: Dict[str, int] = {}
+        self.pinned = set()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def set_capacity(self, value: int) -> None:
+        """Max number of topics (0 = unbounded)"""
+        if value < 0:
+            raise MqttSnClientException("Topic registry capacity must be 0 (unbounded) or positive.")
+        with self.lock:
+            self.capacity = value
+            self.evict()
+
+    def register(self, topic_id: int, topic_name: str) -> None:
+        topic_name = sys.intern(topic_name)
+        with self.lock:
+            old_name = self.names_by_id.pop(topic_id, None)
+            if old_name is not None and self.ids_by_name.get(old_name) == topic_id:
+                del self.ids_by_name[old_name]
+            old_id = self.ids_by_name.get(topic_name)
+            if old_id is not None:
+                self.names_by_id.pop(old_id, None)
+            self.names_by_id[topic_id] = topic_name
+            self.ids_by_name[topic_name] = topic_id
+            self.evict()
+
+    def unregister(self, topic_id: int) -> Optional[str]:
+        with self.lock:
+            topic_name = self.names_by_id.pop(topic_id, None)
+            if topic_name is not None and self.ids_by_name.get(topic_name) == topic_id:
+                del self.ids_by_name[topic_name]
+            return topic_name
+
+    def evict(self) -> None:
+        if self.capacity <= 0 or len(self.names_by_id) <= self.capacity:
+            return
+        # Pinned topics are moved out of the way; the most recent topic is always kept
+        attempts = len(self.names_by_id) - 1
+        while len(self.names_by_id) > self.capacity and attempts > 0:
+            attempts -= 1
+            topic_id, topic_name = next(iter(self.names_by_id.items()))
+            if topic_name in self.pinned:
+                self.names_by_id.move_to_end(topic_id)
+                continue
+            del self.names_by_id[topic_id]
+            del self.ids_by_name[topic_name]
+            self.evictions += 1
+            self.logger.debug(f"Evicted topic {topic_id}={topic_name}")
+
+    def get_name(self, topic_id: int) -> Optional[str]:
+        """Topic name of 'topic_id', marking it as recently used"""
+        with self.lock:
+            topic_name = self.names_by_id.get(topic_id)
+            if topic_name is not None:
+                self.names_by_id.move_to_end(topic_id)
+            return topic_name
+
+    def get_id(self, topic_name: str) -> Optional[int]:
+        """Topic ID of 'topic_name', marking it as recently used"""
+        with self.lock:
+            topic_id = self.ids_by_name.get(topic_name)
+            if topic_id is not None:
+                self.names_by_id.move_to_end(topic_id)
+            return topic_id
+
+    def pin(self, topic_name: str) -> None:
+        with self.lock:
+            self.pinned.add(sys.intern(topic_name))
+
+    def unpin(self, topic_name: str) -> None:
+        with self.lock:
+            self.pinned.discard(topic_name)
+            self.evict()
+
+    def is_pinned(self, topic_name: str) -> bool:
+        return topic_name in self.pinned
+
+    def clear(self) -> None:
+        with self.lock:
+            self.names_by_id.clear()
+            self.ids_by_name.clear()
+
+    # Read-only dict-like access by topic ID, as the former topic_map
+    def get(self, topic_id: int, default=None) -> Optional[str]:
+        topic_name = self.get_name(topic_id)
+        return default if topic_name is None else topic_name
+
+    def items(self):
+        with self.lock:
+            return list(self.names_by_id.items())
+
+    def __contains__(self, topic_id: int) -> bool:
+        return topic_id in self.names_by_id
+
+    def __len__(self) -> int:
+        return len(self.names_by_id)
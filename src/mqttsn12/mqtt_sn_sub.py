@@ -23,15 +23,13 @@
 import argparse
 import os
 import sys
-import time
 import logging
 
 from mqttsn12.MqttSnConstants import MqttSnConstants
-from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClient import MqttSnClient
 from mqttsn12.client.MqttSnClientException import MqttSnClientException
 from mqttsn12.packets import *
 
-keep_running = True
 args = None
 
 logging.basicConfig(
@@ -39,16 +37,6 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class MyListener(MqttSnListener):
-    def message_arrived(self, msg: MqttSnMessage) -> None:
-        global keep_running
-        global args
-        payload = msg.get_payload().decode()
-        logging.debug(f"MqttSnMessage: {msg}")
-        print(payload)
-        if args.one:
-            keep_running=False
-        
 def parse_args():
     parser = argparse.ArgumentParser(
         prog="mqtt_sn_pub",
@@ -129,11 +117,8 @@ def parse_args():
 
 def main():
     global args
-    global keep_running
     
-    mylistener = MyListener()
     mqttsn_client = MqttSnClient()
-    keep_running = True
 
     args = parse_args()
 
@@ -169,14 +154,18 @@ def main():
         mqttsn_client.send_connect()
 
     if args.topicid:
-        mqttsn_client.send_subscribe_predefined(args.topicid, args.qos, mylistener)
+        mqttsn_client.send_subscribe_predefined(args.topicid, args.qos, None)
     else:       
-        mqttsn_client.send_subscribe(args.topic, args.qos, mylistener)
+        mqttsn_client.send_subscribe(args.topic, args.qos, None)
         
+    received = 0
     try:            
-        while keep_running:
-            mqttsn_client.polling()
-            time.sleep(0.1)
+        for msg in mqttsn_client.iter_messages():
+            logging.debug(f"MqttSnMessage: {msg}")
+            print(msg.get_payload().decode())
+            received += 1
+            if args.one or (args.msg_count is not None and received >= args.msg_count):
+                break
     except MqttSnClientException as e:
         print(e)        
     
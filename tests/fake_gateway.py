@@ -0,0 +1,146 @@
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import socket
+import struct
+import threading
+
+class FakeGateway:
+    """
+    Minimal MQTT-SN gateway on 127.0.0.1 for the tests that need no broker.
+
+    Answers CONNECT, REGISTER, PUBLISH (QoS 1/2), PUBREL, SUBSCRIBE,
+    UNSUBSCRIBE, PINGREQ and DISCONNECT, records the rejecting PUBACKs
+    and echoes the publishes to the
+    clients subscribed to their topic ID. While 'muted' it ignores every
+    packet, like a gateway that went away.
+    """
+
+    def __init__(self, echo: bool = True):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        # Closing the socket does not wake up recvfrom()
+        self.sock.settimeout(0.1)
+        self.echo = echo
+        self.muted = False
+        self.topics = {}
+        self.subscribers = {}
+        self.clients = []
+        self.received = []
+        # (topic ID, return code) of the PUBACKs rejecting a publish
+        self.rejected = []
+        self.pings = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+    def topic_id(self, topic_name: str) -> int:
+        if topic_name not in self.topics:
+            self.topics[topic_name] = len(self.topics) + 1
+        return self.topics[topic_name]
+
+    def run(self) -> None:
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(70000)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if self.muted:
+                continue
+            if addr not in self.clients:
+                self.clients.append(addr)
+            if data[0] == 1:
+                msg_type, body = data[3], data[4:]
+            else:
+                msg_type, body = data[1], data[2:]
+            self.process(msg_type, body, addr)
+
+    def process(self, msg_type: int, body: bytes, addr) -> None:
+        if msg_type == 0x04:
+            # CONNECT -> CONNACK
+            self.sock.sendto(bytes([3, 0x05, 0]), addr)
+        elif msg_type == 0x0A:
+            # REGISTER -> REGACK
+            message_id = struct.unpack(">H", body[2:4])[0]
+            topic_id = self.topic_id(body[4:].decode())
+            self.sock.sendto(struct.pack(">BBHHB", 7, 0x0B, topic_id, message_id, 0), addr)
+        elif msg_type == 0x0C:
+            flags = body[0]
+            topic_id, message_id = struct.unpack(">HH", body[1:5])
+            payload = body[5:]
+            self.received.append((topic_id, flags, payload))
+            qos = (flags >> 5) & 0x03
+            if qos == 1:
+                self.sock.sendto(struct.pack(">BBHHB", 7, 0x0D, topic_id, message_id, 0), addr)
+            elif qos == 2:
+                self.sock.sendto(struct.pack(">BBH", 4, 0x0F, message_id), addr)
+            if self.echo and topic_id in self.subscribers:
+                self.publish(self.subscribers[topic_id], topic_id, payload, flags & 0x03)
+        elif msg_type == 0x0D:
+            topic_id, message_id, return_code = struct.unpack(">HHB", body[0:5])
+            if return_code != 0:
+                self.rejected.append((topic_id, return_code))
+        elif msg_type == 0x10:
+            # PUBREL -> PUBCOMP
+            message_id = struct.unpack(">H", body[0:2])[0]
+            self.sock.sendto(struct.pack(">BBH", 4, 0x0E, message_id), addr)
+        elif msg_type == 0x12:
+            flags = body[0]
+            message_id = struct.unpack(">H", body[1:3])[0]
+            if flags & 0x03 == 0:
+                topic_name = body[3:].decode()
+                topic_id = 0 if ("#" in topic_name or "+" in topic_name) else self.topic_id(topic_name)
+            else:
+                topic_id = struct.unpack(">H", body[3:5])[0]
+            self.subscribers[topic_id] = addr
+            self.sock.sendto(struct.pack(">BBBHHB", 8, 0x13, flags & 0x60, topic_id, message_id, 0), addr)
+        elif msg_type == 0x14:
+            message_id = struct.unpack(">H", body[1:3])[0]
+            self.sock.sendto(struct.pack(">BBH", 4, 0x15, message_id), addr)
+        elif msg_type == 0x16:
+            self.pings += 1
+            self.sock.sendto(bytes([2, 0x17]), addr)
+        elif msg_type == 0x18:
+            self.sock.sendto(bytes([2, 0x18]), addr)
+
+    def publish(self, addr, topic_id: int, payload: bytes, topic_type: int = 0, qos: int = 0, message_id: int = 0) -> None:
+        """Send a PUBLISH to a client"""
+        flags = (qos << 5) | topic_type
+        if len(payload) + 7 > 255:
+            packet = struct.pack(">BHBBHH", 1, 9 + len(payload), 0x0C, flags, topic_id, message_id)
+        else:
+            packet = struct.pack(">BBBHH", 7 + len(payload), 0x0C, flags, topic_id, message_id)
+        self.sock.sendto(packet + payload, addr)
+
+    def register(self, addr, topic_name: str, message_id: int = 1) -> int:
+        """Send a REGISTER of 'topic_name' to a client (as for a wildcard subscription)"""
+        topic_id = self.topic_id(topic_name)
+        name = topic_name.encode()
+        self.sock.sendto(struct.pack(">BBHH", 6 + len(name), 0x0A, topic_id, message_id) + name, addr)
+        return topic_id
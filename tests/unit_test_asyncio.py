@@ -0,0 +1,139 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import asyncio
+import time
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from fake_gateway import FakeGateway
+
+class FailingListener(MqttSnListener):
+
+    def __init__(self):
+        self.calls = 0
+
+    async def message_arrived(self, msg: MqttSnMessage) -> None:
+        self.calls += 1
+        raise ValueError("listener failure")
+
+class TestAsyncio(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = FakeGateway(echo=False)
+        self.client = MqttSnClient()
+        self.client.open("127.0.0.1", self.gateway.port)
+        self.client.send_connect()
+
+    def tearDown(self):
+        self.client.close()
+        self.gateway.stop()
+
+    def test_messages(self):
+        print("test_messages")
+        async def consume():
+            received = []
+            stream = self.client.messages("mqttsn/test/async")
+            async def publish():
+                # Once subscribed
+                while "mqttsn/test/async" not in self.gateway.topics:
+                    await asyncio.sleep(0.01)
+                for i in range(3):
+                    self.gateway.publish(self.gateway.clients[0], self.gateway.topics["mqttsn/test/async"], b"%d" % i)
+            publisher = asyncio.ensure_future(publish())
+            async for msg in stream:
+                received.append(bytes(msg.get_payload()))
+                if len(received) == 3:
+                    break
+            await stream.aclose()
+            await publisher
+            return received
+        received = asyncio.run(asyncio.wait_for(consume(), 10))
+        self.assertEqual(received, [b"0", b"1", b"2"])
+        self.assertNotIn("mqttsn/test/async", self.client.list_of_mqtt_sn_callback)
+
+    def test_subscribe_timeout_does_not_block(self):
+        print("test_subscribe_timeout_does_not_block")
+        self.client.set_timeout(0.3)
+        self.gateway.muted = True
+        async def subscribe():
+            ticks = 0
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            ticker = asyncio.ensure_future(tick())
+            self.client.attach_loop(asyncio.get_running_loop())
+            try:
+                with self.assertRaises(MqttSnClientException):
+                    await self.client.subscribe_async("mqttsn/test/async", 0, MqttSnListener())
+            finally:
+                ticker.cancel()
+                self.client.detach_loop()
+            return ticks
+        # The loop kept running while the SUBACK was awaited
+        self.assertGreater(asyncio.run(subscribe()), 10)
+
+    def test_keep_alive_on_loop(self):
+        print("test_keep_alive_on_loop")
+        self.client.set_keep_alive(1)
+        self.client.set_timeout(0.3)
+        async def run(duration: float) -> float:
+            self.client.attach_loop(asyncio.get_running_loop())
+            longest = 0.0
+            started = last = time.monotonic()
+            try:
+                while time.monotonic() - started < duration:
+                    await asyncio.sleep(0.01)
+                    now = time.monotonic()
+                    longest = max(longest, now - last)
+                    last = now
+            finally:
+                self.client.detach_loop()
+            return longest
+        asyncio.run(run(1.5))
+        self.assertGreaterEqual(self.gateway.pings, 1)
+        self.assertEqual(self.client.ping_deadline, 0.0)
+        # A lost PINGRESP does not stall the loop
+        self.gateway.muted = True
+        self.assertLess(asyncio.run(run(2.5)), 0.2)
+
+    def test_listener_tasks(self):
+        print("test_listener_tasks")
+        listener = FailingListener()
+        async def deliver():
+            self.client.attach_loop(asyncio.get_running_loop())
+            try:
+                with self.assertLogs("mqttsn12.client.MqttSnClient", "ERROR"):
+                    self.client.deliver(listener, MqttSnMessage(1, "t", 0, False, b"x"))
+                    self.assertEqual(len(self.client.loop_tasks), 1)
+                    await asyncio.sleep(0.01)
+            finally:
+                self.client.detach_loop()
+        asyncio.run(deliver())
+        self.assertEqual(listener.calls, 1)
+        self.assertEqual(len(self.client.loop_tasks), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnBalancedPublisher import MqttSnBalancedPublisher
+from fake_gateway import FakeGateway
+
+TOPICS = [f"mqttsn/test/balanced/{i}" for i in range(1000)]
+
+class TestBalancedPublisher(unittest.TestCase):
+
+    def ring(self, names):
+        publisher = MqttSnBalancedPublisher()
+        for name in names:
+            publisher.add_gateway(MqttSnClient(), name)
+        return publisher
+
+    def assignment(self, publisher):
+        return {topic: publisher.get_gateway(topic) for topic in TOPICS}
+
+    def test_stable_assignment(self):
+        print("test_stable_assignment")
+        first = self.assignment(self.ring(["a", "b", "c"]))
+        # Independent of the insertion order and of the instance
+        self.assertEqual(first, self.assignment(self.ring(["c", "a", "b"])))
+        self.assertEqual(set(first.values()), {"a", "b", "c"})
+        for name in ("a", "b", "c"):
+            self.assertGreater(list(first.values()).count(name), len(TOPICS) // 6)
+
+    def test_remove_moves_only_owned_topics(self):
+        print("test_remove_moves_only_owned_topics")
+        publisher = self.ring(["a", "b", "c"])
+        before = self.assignment(publisher)
+        publisher.remove_gateway("b")
+        after = self.assignment(publisher)
+        for topic in TOPICS:
+            if before[topic] == "b":
+                self.assertIn(after[topic], ("a", "c"))
+            else:
+                self.assertEqual(after[topic], before[topic])
+        # Adding it back restores the original assignment
+        publisher.add_gateway(MqttSnClient(), "b")
+        self.assertEqual(self.assignment(publisher), before)
+
+    def test_errors(self):
+        print("test_errors")
+        publisher = MqttSnBalancedPublisher()
+        with self.assertRaises(MqttSnClientException):
+            publisher.get_gateway("t")
+        publisher.add_gateway(MqttSnClient(), "a")
+        with self.assertRaises(MqttSnClientException):
+            publisher.add_gateway(MqttSnClient(), "a")
+        with self.assertRaises(MqttSnClientException):
+            publisher.remove_gateway("b")
+
+    def test_publish(self):
+        print("test_publish")
+        gateways = [FakeGateway(), FakeGateway()]
+        clients = []
+        publisher = MqttSnBalancedPublisher()
+        try:
+            for i, gateway in enumerate(gateways):
+                client = MqttSnClient()
+                client.open("127.0.0.1", gateway.port)
+                client.send_connect()
+                clients.append(client)
+                publisher.add_gateway(client, f"gw{i}")
+            for i in range(50):
+                publisher.send_publish(TOPICS[i % 10], b"%d" % i, MqttSnConstants.QOS_1)
+            self.assertTrue(publisher.flush(10))
+        finally:
+            publisher.close()
+            for client, gateway in zip(clients, gateways):
+                client.close()
+                gateway.stop()
+        self.assertEqual(publisher.get_throughput()["messages"], 50)
+        # Every topic went to a single gateway, in publish order
+        self.assertEqual(sorted(list(gateways[0].topics) + list(gateways[1].topics)), sorted(TOPICS[:10]))
+        for gateway in gateways:
+            for topic, topic_id in gateway.topics.items():
+                payloads = [int(payload) for received_id, flags, payload in gateway.received if received_id == topic_id]
+                self.assertEqual(len(payloads), 5)
+                self.assertEqual(payloads, sorted(payloads))
+
+if __name__ == '__main__':
+    unittest.main()
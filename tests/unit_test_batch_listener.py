@@ -0,0 +1,99 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnBatchListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from fake_gateway import FakeGateway
+
+class BatchCollector(MqttSnBatchListener):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.batches = []
+
+    def messages_arrived(self, msgs) -> None:
+        self.batches.append([bytes(msg.get_payload()) for msg in msgs])
+
+def message(payload: bytes) -> MqttSnMessage:
+    return MqttSnMessage(1, "mqttsn/test/batch", 0, False, payload)
+
+class TestBatchListener(unittest.TestCase):
+
+    def test_max_messages(self):
+        print("test_max_messages")
+        listener = BatchCollector(3, 60)
+        for i in range(7):
+            listener.message_arrived(message(b"%d" % i))
+        self.assertEqual(listener.batches, [[b"0", b"1", b"2"], [b"3", b"4", b"5"]])
+        listener.flush()
+        self.assertEqual(listener.batches[-1], [b"6"])
+
+    def test_max_delay(self):
+        print("test_max_delay")
+        listener = BatchCollector(100, 0.05)
+        listener.message_arrived(message(b"a"))
+        listener.flush(False)
+        self.assertEqual(listener.batches, [])
+        time.sleep(0.06)
+        listener.flush(False)
+        self.assertEqual(listener.batches, [[b"a"]])
+        listener.flush(False)
+        self.assertEqual(len(listener.batches), 1)
+
+    def test_invalid_max_messages(self):
+        print("test_invalid_max_messages")
+        with self.assertRaises(MqttSnClientException):
+            MqttSnBatchListener(0)
+
+    def test_polling_delivers_due_batch(self):
+        print("test_polling_delivers_due_batch")
+        gateway = FakeGateway()
+        client = MqttSnClient()
+        client.open("127.0.0.1", gateway.port)
+        client.send_connect()
+        listener = BatchCollector(100, 0.05)
+        try:
+            client.send_subscribe("mqttsn/test/batch", 0, listener)
+            for i in range(3):
+                client.send_publish("mqttsn/test/batch", b"%d" % i, 0)
+            deadline = time.monotonic() + 5
+            while len(listener.batches) == 0 and time.monotonic() < deadline:
+                client.polling()
+                time.sleep(0.01)
+            self.assertEqual(listener.batches, [[b"0", b"1", b"2"]])
+            listener.max_delay = 60
+            client.send_publish("mqttsn/test/batch", b"last", 0)
+            while len(listener.batch) == 0 and time.monotonic() < deadline:
+                client.polling()
+                time.sleep(0.01)
+            self.assertEqual(len(listener.batches), 1)
+        finally:
+            client.close()
+            gateway.stop()
+        # close() delivers the last batch
+        self.assertEqual(listener.batches[-1], [b"last"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnChunkListener, MqttSnClient, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnChunking import CHUNK_HEADER, DEFAULT_CHUNK_SIZE, MqttSnChunkAssembler, MqttSnReassembler, encode_chunks, is_chunk
+from fake_gateway import FakeGateway
+
+class TestChunking(unittest.TestCase):
+
+    def test_reassemble_out_of_order(self):
+        print("test_reassemble_out_of_order")
+        data = os.urandom(10000)
+        chunks = list(encode_chunks(data, 999))
+        self.assertEqual(len(chunks), 11)
+        self.assertTrue(all(is_chunk(chunk) and len(chunk) <= 999 + CHUNK_HEADER.size for chunk in chunks))
+        random.shuffle(chunks)
+        reassembler = MqttSnReassembler()
+        results = [reassembler.add("topic", chunk) for chunk in chunks + chunks[:1]]
+        self.assertEqual(bytes(results[-2]), data)
+        self.assertTrue(all(result is None for result in results[:-2] + results[-1:]))
+
+    def test_reassemble_to_file(self):
+        print("test_reassemble_to_file")
+        data = os.urandom(5000)
+        with tempfile.TemporaryDirectory() as directory:
+            reassembler = MqttSnReassembler(directory)
+            for chunk in encode_chunks(data, 1024, transfer_id=0x1234):
+                path = reassembler.add("topic", chunk)
+            self.assertEqual(path, os.path.join(directory, "00001234"))
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), data)
+
+    def test_crc_mismatch(self):
+        print("test_crc_mismatch")
+        chunks = [bytearray(chunk) for chunk in encode_chunks(b"0123456789", 4)]
+        chunks[1][-1] ^= 0xFF
+        reassembler = MqttSnReassembler()
+        reassembler.add("topic", chunks[0])
+        reassembler.add("topic", chunks[1])
+        with self.assertRaises(MqttSnClientException):
+            reassembler.add("topic", chunks[2])
+        self.assertEqual(reassembler.failed, 1)
+
+    def test_expire(self):
+        print("test_expire")
+        reassembler = MqttSnReassembler(timeout=0)
+        reassembler.add("topic", next(encode_chunks(b"0123456789", 4)))
+        self.assertEqual(reassembler.expire(), 1)
+        self.assertEqual(len(reassembler.transfers), 0)
+
+    def test_unwritable_directory(self):
+        print("test_unwritable_directory")
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(MqttSnClientException):
+                MqttSnChunkAssembler(10, 1, 0, os.path.join(directory, "missing", "00001234"))
+
+class ObjectCollector(MqttSnChunkListener):
+
+    def __init__(self):
+        super().__init__()
+        self.objects = []
+
+    def object_arrived(self, msg, data) -> None:
+        self.objects.append(bytes(data))
+
+class TestClientChunking(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = FakeGateway()
+        self.client = MqttSnClient()
+        self.client.open("127.0.0.1", self.gateway.port)
+        self.client.send_connect()
+
+    def tearDown(self):
+        self.client.close()
+        self.gateway.stop()
+
+    def test_default_chunk_size(self):
+        print("test_default_chunk_size")
+        collector = ObjectCollector()
+        self.client.send_subscribe("mqttsn/test/chunks", MqttSnConstants.QOS_0, collector)
+        data = os.urandom(2 * DEFAULT_CHUNK_SIZE + 1000)
+        self.client.send_chunked("mqttsn/test/chunks", data, window=1)
+        self.assertTrue(all(len(payload) == DEFAULT_CHUNK_SIZE + CHUNK_HEADER.size
+                            for topic_id, flags, payload in self.gateway.received[:2]))
+        deadline = time.monotonic() + 5
+        while not collector.objects and time.monotonic() < deadline:
+            self.client.polling()
+            time.sleep(0.01)
+        self.assertEqual(collector.objects, [data])
+
+    def test_dropped_transfer_logged(self):
+        print("test_dropped_transfer_logged")
+        collector = ObjectCollector()
+        chunks = [bytearray(chunk) for chunk in encode_chunks(b"0123456789", 4)]
+        chunks[1][-1] ^= 0xFF
+        msg = MqttSnMessage()
+        msg.set_topic_name("mqttsn/test/chunks")
+        with self.assertLogs("mqttsn12.client.MqttSnClient", "WARNING"):
+            for chunk in chunks:
+                msg.set_payload(chunk)
+                collector.message_arrived(msg)
+        self.assertEqual(collector.objects, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnCoalescing import MqttSnCoalescer, decode_aggregate, encode_aggregate, is_aggregate
+from mqttsn12.client.MqttSnChunking import encode_chunks
+from fake_gateway import FakeGateway
+
+class TestCoalescing(unittest.TestCase):
+
+    def test_envelope(self):
+        print("test_envelope")
+        payloads = [b"", b"21.5", bytes(200), b"MSAG"]
+        envelope = encode_aggregate(payloads)
+        self.assertTrue(is_aggregate(envelope))
+        self.assertEqual(decode_aggregate(envelope), payloads)
+        with self.assertRaises(MqttSnClientException):
+            decode_aggregate(envelope[:-1])
+
+    def test_max_bytes(self):
+        print("test_max_bytes")
+        coalescer = MqttSnCoalescer(max_bytes=64, max_delay=60)
+        ready = []
+        for i in range(20):
+            ready.extend(coalescer.add("a" if i % 2 == 0 else "b", b"%09d" % i))
+        self.assertEqual([key for key, payload in ready], ["a", "b"])
+        self.assertTrue(all(len(payload) <= 64 for key, payload in ready))
+        self.assertEqual(decode_aggregate(ready[0][1]), [b"%09d" % i for i in range(0, 12, 2)])
+        self.assertEqual(len(coalescer.flush()), 2)
+        self.assertEqual(coalescer.get_stats(), {"messages": 20, "envelopes": 4, "buffered": 0})
+
+    def test_max_delay(self):
+        print("test_max_delay")
+        coalescer = MqttSnCoalescer(max_bytes=1024, max_delay=0.01)
+        self.assertEqual(coalescer.add("a", b"one"), [])
+        self.assertEqual(coalescer.flush(False), [])
+        time.sleep(0.02)
+        # A single message is sent as it is
+        self.assertEqual(coalescer.add("b", b"two"), [("a", b"one")])
+        self.assertEqual(coalescer.flush(False), [])
+        self.assertEqual(coalescer.flush(), [("b", b"two")])
+class TestClientCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = FakeGateway(echo=False)
+        self.client = MqttSnClient()
+        self.client.open("127.0.0.1", self.gateway.port)
+        self.client.send_connect()
+
+    def tearDown(self):
+        self.client.close()
+        self.gateway.stop()
+
+    def test_retained_not_coalesced(self):
+        print("test_retained_not_coalesced")
+        self.client.set_coalescing(True, max_delay=60)
+        self.client.send_publish("as", b"1", MqttSnConstants.QOS_0, True)
+        self.client.send_publish("as", b"2", MqttSnConstants.QOS_0, True)
+        deadline = time.monotonic() + 5
+        while len(self.gateway.received) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([payload for topic_id, flags, payload in self.gateway.received], [b"1", b"2"])
+        self.assertTrue(all(flags & MqttSnConstants.FLAG_RETAIN for topic_id, flags, payload in self.gateway.received))
+
+    def test_iter_messages_flushes(self):
+        print("test_iter_messages_flushes")
+        self.client.set_coalescing(True, max_delay=0.05)
+        for i in range(3):
+            self.client.send_publish("as", b"%d" % i, MqttSnConstants.QOS_0)
+        self.assertEqual(self.gateway.received, [])
+        self.assertEqual(list(self.client.iter_messages(timeout=0.3)), [])
+        self.assertEqual(len(self.gateway.received), 1)
+        self.assertEqual(decode_aggregate(self.gateway.received[0][2]), [b"0", b"1", b"2"])
+
+    def test_corrupt_envelope_logged(self):
+        print("test_corrupt_envelope_logged")
+        self.client.set_deaggregation(True)
+        envelope = encode_aggregate([b"0", b"1", b"22"])
+        msg = MqttSnMessage(1, "mqttsn/test/envelopes", 0, False, envelope[:-1])
+        with self.assertLogs("mqttsn12.client.MqttSnClient", "WARNING"):
+            self.assertEqual(self.client.split_message(msg), [])
+
+    def test_iter_messages_expires_transfers(self):
+        print("test_iter_messages_expires_transfers")
+        self.client.set_reassembly(True, timeout=0.1)
+        self.client.send_subscribe("mqttsn/test/chunks", 0, MqttSnListener())
+        first = next(encode_chunks(bytes(100), 40))
+        self.gateway.publish(self.gateway.clients[0], self.gateway.topics["mqttsn/test/chunks"], first)
+        self.assertEqual(list(self.client.iter_messages(timeout=0.5)), [])
+        self.assertEqual(len(self.client.reassembler.transfers), 0)
+        self.assertEqual(self.client.reassembler.failed, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnCompression import MqttSnCompression, is_compressed
+
+class TestCompression(unittest.TestCase):
+    PAYLOAD = json.dumps([{"device": f"sensor-{i:03d}", "temperature": 20 + i / 10, "status": "ok"} for i in range(50)]).encode()
+
+    def test_codecs(self):
+        print("test_codecs")
+        compression = MqttSnCompression()
+        for codec in (MqttSnCompression.CODEC_ZLIB, MqttSnCompression.CODEC_LZMA, MqttSnCompression.CODEC_BZ2):
+            payload = compression.compress(self.PAYLOAD, codec)
+            self.assertTrue(is_compressed(payload))
+            self.assertLess(len(payload), len(self.PAYLOAD))
+            self.assertEqual(compression.decompress(payload), self.PAYLOAD)
+        self.assertLess(compression.get_ratio(), 1.0)
+
+    def test_not_compressed(self):
+        print("test_not_compressed")
+        compression = MqttSnCompression(threshold=16)
+        self.assertEqual(compression.compress(b"short"), b"short")
+        data = os.urandom(1000)
+        self.assertEqual(compression.compress(data), data)
+        # Raw payloads that look compressed are escaped
+        payload = compression.compress(b"MSZ\x01\x00 not compressed")
+        self.assertTrue(is_compressed(payload))
+        self.assertEqual(compression.decompress(payload), b"MSZ\x01\x00 not compressed")
+
+    def test_dictionary(self):
+        print("test_dictionary")
+        sample = json.dumps({"device": "sensor-000", "temperature": 21.5, "status": "ok"}).encode()
+        publisher = MqttSnCompression(threshold=16)
+        publisher.add_dictionary(1, sample * 4)
+        payload = publisher.compress(sample.replace(b"000", b"123"), dictionary_id=1)
+        self.assertLess(len(payload), len(sample) / 2)
+        subscriber = MqttSnCompression()
+        with self.assertRaises(MqttSnClientException):
+            subscriber.decompress(payload)
+        subscriber.add_dictionary(1, sample * 4)
+        self.assertEqual(subscriber.decompress(payload), sample.replace(b"000", b"123"))
+
+    def test_max_length(self):
+        print("test_max_length")
+        publisher = MqttSnCompression()
+        subscriber = MqttSnCompression(max_length=100000)
+        for codec in (MqttSnCompression.CODEC_ZLIB, MqttSnCompression.CODEC_LZMA, MqttSnCompression.CODEC_BZ2):
+            self.assertEqual(subscriber.decompress(publisher.compress(bytes(100000), codec)), bytes(100000))
+            bomb = publisher.compress(bytes(10 * 1024 * 1024), codec)
+            with self.assertRaises(MqttSnClientException):
+                subscriber.decompress(bomb)
+            if codec != MqttSnCompression.CODEC_ZLIB:
+                truncated = publisher.compress(self.PAYLOAD, codec)
+                with self.assertRaises(MqttSnClientException):
+                    subscriber.decompress(truncated[:len(truncated) // 2])
+
+    def test_corrupt_payload_logged(self):
+        print("test_corrupt_payload_logged")
+        client = MqttSnClient()
+        client.set_compression(MqttSnCompression())
+        msg = MqttSnMessage(1, "mqttsn/test/compressed", 0, False, b"MSZ\x02\x00 corrupt")
+        with self.assertLogs("mqttsn12.client.MqttSnClient", "WARNING"):
+            self.assertIsNone(client.prepare_message(msg))
+
+if __name__ == '__main__':
+    unittest.main()
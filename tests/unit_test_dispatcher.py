@@ -0,0 +1,94 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnDispatcher import MqttSnDispatcher
+
+class TestDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.dispatcher = MqttSnDispatcher(self.executor)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_order_per_key(self):
+        print("test_order_per_key")
+        received = {key: [] for key in range(4)}
+        def callback(key, value):
+            # Give the other workers a chance to overtake
+            time.sleep(0.0005 * (value % 3))
+            received[key].append(value)
+        for value in range(100):
+            for key in received:
+                self.dispatcher.submit(key, callback, key, value)
+        self.assertTrue(self.dispatcher.flush(10))
+        for values in received.values():
+            self.assertEqual(values, list(range(100)))
+        self.assertEqual(self.dispatcher.pending(), 0)
+
+    def test_flush_timeout(self):
+        print("test_flush_timeout")
+        release = threading.Event()
+        self.dispatcher.submit("a", release.wait)
+        self.dispatcher.submit("a", lambda: None)
+        self.assertFalse(self.dispatcher.flush(0.05))
+        self.assertEqual(self.dispatcher.pending(), 1)
+        release.set()
+        self.assertTrue(self.dispatcher.flush(5))
+
+    def test_errors_counted(self):
+        print("test_errors_counted")
+        received = []
+        self.dispatcher.submit("a", lambda: 1 / 0)
+        self.dispatcher.submit("a", received.append, 1)
+        self.assertTrue(self.dispatcher.flush(5))
+        self.assertEqual(self.dispatcher.errors, 1)
+        self.assertEqual(received, [1])
+
+    def test_close(self):
+        print("test_close")
+        received = []
+        self.dispatcher.submit("a", time.sleep, 0.05)
+        self.dispatcher.submit("a", received.append, 1)
+        self.assertTrue(self.dispatcher.close(5))
+        self.assertEqual(received, [1])
+        with self.assertRaises(MqttSnClientException):
+            self.dispatcher.submit("a", received.append, 2)
+
+    def test_submit_after_executor_shutdown(self):
+        print("test_submit_after_executor_shutdown")
+        self.executor.shutdown(wait=True)
+        with self.assertRaises(MqttSnClientException):
+            self.dispatcher.submit("a", print)
+        # The queue was cleaned up: flush does not wait forever
+        self.assertTrue(self.dispatcher.flush())
+        self.assertEqual(self.dispatcher.pending(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnListener
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnFailoverClient import MqttSnFailoverClient
+from fake_gateway import FakeGateway
+
+class TestFailover(unittest.TestCase):
+
+    def setUp(self):
+        self.primary = FakeGateway()
+        self.standby = FakeGateway()
+        self.client = MqttSnFailoverClient()
+        self.client.add_gateway("127.0.0.1", self.primary.port)
+        self.client.add_gateway("127.0.0.1", self.standby.port)
+        self.client.connect(background=False)
+
+    def tearDown(self):
+        self.client.close()
+        self.primary.stop()
+        self.standby.stop()
+
+    def wait_active(self, port, timeout):
+        started = time.monotonic()
+        while self.client.get_active_gateway()[1] != port and time.monotonic() - started < timeout:
+            time.sleep(0.01)
+        return time.monotonic() - started
+
+    def test_failover(self):
+        print("test_failover")
+        self.client.send_subscribe("mqttsn/test/failover", MqttSnConstants.QOS_1, MqttSnListener())
+        self.client.send_publish("mqttsn/test/failover", b"primary", MqttSnConstants.QOS_1)
+        self.assertEqual(self.primary.received[-1][2], b"primary")
+
+        self.primary.muted = True
+        elapsed = self.wait_active(self.standby.port, 5)
+        self.assertEqual(self.client.get_active_gateway()[1], self.standby.port)
+        self.assertLess(elapsed, 1.0)
+        # Subscriptions renewed on the standby gateway
+        self.assertIn(self.standby.topics["mqttsn/test/failover"], self.standby.subscribers)
+
+        self.client.send_publish("mqttsn/test/failover", b"standby", MqttSnConstants.QOS_1)
+        self.assertEqual(self.standby.received[-1][2], b"standby")
+
+    def test_replay_async(self):
+        print("test_replay_async")
+        self.client.send_publish("mqttsn/test/replay", b"registered", MqttSnConstants.QOS_1)
+        self.primary.muted = True
+        futures = [self.client.publish_async("mqttsn/test/replay", f"{i}".encode(), MqttSnConstants.QOS_1)
+                   for i in range(5)]
+
+        started = time.monotonic()
+        while not all(future.done() for future in futures) and time.monotonic() - started < 5:
+            self.client.wait_for_publishes(0.05)
+        for future in futures:
+            self.assertIsNone(future.exception(0))
+        self.assertEqual(self.client.get_active_gateway()[1], self.standby.port)
+        self.assertEqual(sorted(payload for topic_id, flags, payload in self.standby.received if payload != b"registered"),
+                         [f"{i}".encode() for i in range(5)])
+
+    def test_replay_topic_id(self):
+        print("test_replay_topic_id")
+        # Keep the monitor from failing over first
+        self.client.set_liveness(60, 100)
+        self.primary.muted = True
+        topic_id = self.client.send_publish("as", b"replayed", MqttSnConstants.QOS_1)
+        self.assertEqual(self.client.get_active_gateway()[1], self.standby.port)
+        self.assertEqual(topic_id, int.from_bytes(b"as", "big"))
+        self.assertEqual(self.standby.received[-1][2], b"replayed")
+
+    def test_no_gateway_available(self):
+        print("test_no_gateway_available")
+        self.client.set_liveness(60, 100)
+        self.primary.muted = True
+        self.standby.muted = True
+        with self.assertRaises(MqttSnClientException):
+            self.client.send_publish("mqttsn/test/failed", b"failed", MqttSnConstants.QOS_1)
+        self.assertEqual(self.client.inflight, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnHedgedPublisher import MqttSnHedgedPublisher, MqttSnDeduplicatingListener
+from fake_gateway import FakeGateway
+
+class Collector(MqttSnListener):
+
+    def __init__(self):
+        self.payloads = []
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        self.payloads.append(bytes(msg.get_payload()))
+
+class TestHedgedPublisher(unittest.TestCase):
+
+    def setUp(self):
+        self.gateways = (FakeGateway(), FakeGateway())
+        self.clients = (MqttSnClient(), MqttSnClient())
+        for client, gateway in zip(self.clients, self.gateways):
+            client.open("127.0.0.1", gateway.port)
+            client.send_connect()
+        self.publisher = MqttSnHedgedPublisher(*self.clients)
+
+    def tearDown(self):
+        self.publisher.close()
+        for client, gateway in zip(self.clients, self.gateways):
+            client.close()
+            gateway.stop()
+
+    def test_hedge_on_late_gateway(self):
+        print("test_hedge_on_late_gateway")
+        self.gateways[0].muted = True
+        self.clients[0].set_timeout(1)
+        winner = self.publisher.send_publish_with_id(0x6162, MqttSnConstants.TOPIC_TYPE_SHORT, b"hedged")
+        self.assertEqual(winner, 1)
+        self.assertEqual(self.publisher.get_stats(), {"hedged": 1, "won_by_a": 0, "won_by_b": 1})
+        self.assertEqual(self.gateways[1].received, [(0x6162, 0x22, b"hedged")])
+
+    def test_concurrent_stats(self):
+        print("test_concurrent_stats")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            winners = list(executor.map(lambda i: self.publisher.send_publish("mqttsn/test/hedged", b"%d" % i), range(200)))
+        stats = self.publisher.get_stats()
+        self.assertEqual(stats["won_by_a"], winners.count(0))
+        self.assertEqual(stats["won_by_b"], winners.count(1))
+        self.assertLessEqual(stats["won_by_b"], stats["hedged"])
+
+class TestDeduplicatingListener(unittest.TestCase):
+
+    def test_tagged(self):
+        print("test_tagged")
+        collector = Collector()
+        listener = MqttSnDeduplicatingListener(collector)
+        for tag, payload in ((1, b"on"), (1, b"on"), (2, b"on"), (3, b"off"), (2, b"on")):
+            listener.message_arrived(MqttSnMessage(1, "t", 1, False, tag.to_bytes(8, "big") + payload))
+        # Identical payloads with different tags are not duplicates
+        self.assertEqual(collector.payloads, [b"on", b"on", b"off"])
+        self.assertEqual(listener.duplicates, 2)
+
+    def test_capacity(self):
+        print("test_capacity")
+        collector = Collector()
+        listener = MqttSnDeduplicatingListener(collector)
+        listener.capacity = 1
+        for tag in (1, 2, 1):
+            listener.message_arrived(MqttSnMessage(1, "t", 1, False, tag.to_bytes(8, "big") + b"x"))
+        # Tag 1 was forgotten to make room for tag 2
+        self.assertEqual(collector.payloads, [b"x", b"x", b"x"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnInboundQueue import MqttSnInboundQueue
+
+class TestInboundQueue(unittest.TestCase):
+
+    def fill(self, queue, topics):
+        for i, topic_name in enumerate(topics):
+            queue.put(MqttSnMessage(i + 1, topic_name, 0, False, str(i).encode()))
+
+    def test_drop_oldest(self):
+        print("test_drop_oldest")
+        queue = MqttSnInboundQueue(2, MqttSnInboundQueue.POLICY_DROP_OLDEST)
+        self.fill(queue, ["a", "b", "c"])
+        self.assertEqual(queue.get(0).get_payload(), b"1")
+        self.assertEqual(queue.get(0).get_payload(), b"2")
+        self.assertEqual(queue.get_stats()["dropped_oldest"], 1)
+
+    def test_drop_newest(self):
+        print("test_drop_newest")
+        queue = MqttSnInboundQueue(2, MqttSnInboundQueue.POLICY_DROP_NEWEST)
+        self.fill(queue, ["a", "b", "c"])
+        self.assertEqual(queue.get(0).get_payload(), b"0")
+        self.assertEqual(queue.get(0).get_payload(), b"1")
+        self.assertIsNone(queue.get(0))
+        self.assertEqual(queue.get_stats()["dropped_newest"], 1)
+
+    def test_conflate(self):
+        print("test_conflate")
+        queue = MqttSnInboundQueue(2, MqttSnInboundQueue.POLICY_CONFLATE)
+        self.fill(queue, ["a", "b", "a", "a"])
+        self.assertEqual(queue.get(0).get_payload(), b"3")
+        self.assertEqual(queue.get(0).get_payload(), b"1")
+        self.assertEqual(queue.get_stats()["conflated"], 2)
+
+    def test_block_timeout(self):
+        print("test_block_timeout")
+        queue = MqttSnInboundQueue(1)
+        self.assertTrue(queue.put(MqttSnMessage(1, "a")))
+        self.assertFalse(queue.put(MqttSnMessage(2, "b"), timeout=0.01))
+        self.assertEqual(queue.get_stats()["blocked"], 1)
+
+    def test_close(self):
+        print("test_close")
+        queue = MqttSnInboundQueue(4)
+        self.fill(queue, ["a"])
+        queue.close()
+        self.assertIsNotNone(queue.get())
+        self.assertIsNone(queue.get())
+
+    def test_invalid_policy(self):
+        print("test_invalid_policy")
+        with self.assertRaises(MqttSnClientException):
+            MqttSnInboundQueue(4, "drop-random")
+
+if __name__ == '__main__':
+    unittest.main()
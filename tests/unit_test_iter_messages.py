@@ -0,0 +1,74 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener
+from mqttsn12.client.MqttSnOperators import MqttSnDeduplicator, MqttSnTumblingWindow
+from fake_gateway import FakeGateway
+
+class TestIterMessages(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = FakeGateway(echo=False)
+        self.client = MqttSnClient()
+        self.client.open("127.0.0.1", self.gateway.port)
+        self.client.send_connect()
+        self.client.send_subscribe("mqttsn/test/iter", 0, MqttSnListener())
+        self.topic_id = self.gateway.topics["mqttsn/test/iter"]
+
+    def tearDown(self):
+        self.client.close()
+        self.gateway.stop()
+
+    def publish(self, *payloads) -> None:
+        for payload in payloads:
+            self.gateway.publish(self.gateway.clients[0], self.topic_id, payload)
+
+    def test_iter_messages(self):
+        print("test_iter_messages")
+        self.publish(b"1", b"2", b"3")
+        started = time.monotonic()
+        received = [(msg.get_topic_name(), bytes(msg.get_payload())) for msg in self.client.iter_messages(timeout=0.3)]
+        self.assertEqual(received, [("mqttsn/test/iter", b"1"), ("mqttsn/test/iter", b"2"), ("mqttsn/test/iter", b"3")])
+        # Stopped by the timeout
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_operators(self):
+        print("test_operators")
+        self.client.set_operators("mqttsn/test/iter", [MqttSnDeduplicator()])
+        self.publish(b"1", b"1", b"2", b"2", b"1")
+        received = [bytes(msg.get_payload()) for msg in self.client.iter_messages(timeout=0.3)]
+        self.assertEqual(received, [b"1", b"2", b"1"])
+
+    def test_operators_emit_by_time(self):
+        print("test_operators_emit_by_time")
+        self.client.set_operators("mqttsn/test/iter", [MqttSnTumblingWindow(0.2)])
+        self.publish(b"1", b"3")
+        # The window ends while no message arrives
+        records = [tuple(msg.get_record())[2:] for msg in self.client.iter_messages(timeout=0.6)]
+        # Both values in one window, unless they straddle a window boundary
+        self.assertIn(records, ([(2, 1, 3, 2)], [(1, 1, 1, 1), (1, 3, 3, 3)]))
+
+if __name__ == '__main__':
+    unittest.main()
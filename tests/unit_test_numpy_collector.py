@@ -0,0 +1,73 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnMessage
+from mqttsn12.client.MqttSnSchema import MqttSnSchema
+from mqttsn12.client.MqttSnNumpyCollector import MqttSnNumpyCollector, np
+
+class Collector(MqttSnNumpyCollector):
+
+    def __init__(self, schema, max_records):
+        super().__init__(schema, max_records)
+        self.batches = []
+
+    def batch_arrived(self, batch):
+        self.batches.append(batch)
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestNumpyCollector(unittest.TestCase):
+
+    def message(self, topic_id, timestamp, payload):
+        msg = MqttSnMessage(topic_id, None, 0, False, payload)
+        msg.set_timestamp(timestamp)
+        return msg
+
+    def test_batches(self):
+        print("test_batches")
+        reading = MqttSnSchema("Reading", [("sensor", "B"), ("temperature", "f"), ("count", "q")])
+        collector = Collector(reading, 4)
+        collector.message_arrived(self.message(1, 10.0, reading.pack(7, 21.5, -3)))
+        collector.message_arrived(self.message(2, 11.0, reading.pack_many([(8, 22.5, 4), (9, 23.5, 5)])))
+        collector.message_arrived(self.message(2, 12.0, b"\x00"))
+        self.assertEqual(collector.rejected, 1)
+        self.assertEqual(len(collector.batches), 0)
+        collector.message_arrived(self.message(3, 12.0, reading.pack(10, 24.5, 6)))
+        batch = collector.batches[0]
+        self.assertEqual(batch["topic_id"].tolist(), [1, 2, 2, 3])
+        self.assertEqual(batch["timestamp"].tolist(), [10.0, 11.0, 11.0, 12.0])
+        self.assertEqual(batch["sensor"].tolist(), [7, 8, 9, 10])
+        self.assertAlmostEqual(float(batch["temperature"].mean()), 23.0)
+        self.assertEqual(int(batch["count"].sum()), 12)
+        collector.flush()
+        self.assertEqual(len(collector.batches), 1)
+
+    def test_native_alignment(self):
+        print("test_native_alignment")
+        record = MqttSnSchema("Record", [("flag", "b"), ("value", "d")], "@")
+        collector = Collector(record, 1)
+        collector.message_arrived(self.message(1, 1.0, record.pack(1, 0.25)))
+        self.assertEqual(collector.batches[0]["value"][0], 0.25)
+
+if __name__ == '__main__':
+    unittest.main()
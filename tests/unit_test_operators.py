@@ -0,0 +1,99 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnOperators import (
+    AGGREGATE_SCHEMA,
+    MqttSnDeduplicator,
+    MqttSnSampler,
+    MqttSnSlidingWindow,
+    MqttSnTumblingWindow,
+)
+
+def message(topic_name, timestamp, value):
+    msg = MqttSnMessage(1, topic_name, 0, False, str(value).encode())
+    msg.set_timestamp(timestamp)
+    return msg
+
+def records(msgs):
+    return [tuple(msg.get_record()) for msg in msgs]
+
+class TestOperators(unittest.TestCase):
+
+    def test_tumbling_window(self):
+        print("test_tumbling_window")
+        window = MqttSnTumblingWindow(10)
+        out = []
+        for timestamp, value in [(100, 1), (105, 3), (109, 2), (112, 7), (135, 4)]:
+            out.extend(window.process(message("a", timestamp, value)))
+        self.assertEqual(records(out), [(100, 110, 3, 1, 3, 2), (110, 120, 1, 7, 7, 7)])
+        self.assertEqual(out[0].get_schema(), AGGREGATE_SCHEMA)
+        self.assertEqual(records(window.flush(True)), [(130, 140, 1, 4, 4, 4)])
+
+    def test_sliding_window(self):
+        print("test_sliding_window")
+        window = MqttSnSlidingWindow(20, 10)
+        out = []
+        for timestamp, topic, value in [(100, "a", 1), (101, "b", 10), (115, "a", 5), (125, "a", 9)]:
+            out.extend(window.process(message(topic, timestamp, value)))
+        self.assertEqual(records(out), [(90, 110, 1, 1, 1, 1), (100, 120, 2, 1, 5, 3)])
+        # Every window still holding values has ended by now
+        self.assertEqual(records(window.flush(False)), [(110, 130, 2, 5, 9, 7), (120, 140, 1, 9, 9, 9),
+                                                        (90, 110, 1, 10, 10, 10), (100, 120, 1, 10, 10, 10)])
+        self.assertEqual(window.flush(True), [])
+        with self.assertRaises(MqttSnClientException):
+            MqttSnSlidingWindow(25, 10)
+
+    def test_sample_and_dedupe(self):
+        print("test_sample_and_dedupe")
+        sampler = MqttSnSampler(1.0)
+        passed = [msg for t in (0.0, 0.5, 1.0, 1.2, 2.5) for msg in sampler.process(message("a", 100 + t, t))]
+        self.assertEqual([msg.get_timestamp() for msg in passed], [100.0, 101.0, 102.5])
+        deduplicator = MqttSnDeduplicator(tolerance=0.5, value=lambda msg: float(msg.get_payload()))
+        passed = [msg for v in (1.0, 1.2, 1.6, 1.7, 1.0) for msg in deduplicator.process(message("a", 0, v))]
+        self.assertEqual([float(msg.get_payload()) for msg in passed], [1.0, 1.6, 1.0])
+        # Raw payloads have no distance
+        with self.assertRaises(MqttSnClientException):
+            MqttSnDeduplicator(tolerance=0.5)
+
+    def test_subscription_operators(self):
+        print("test_subscription_operators")
+        received = []
+
+        class Listener(MqttSnListener):
+            def message_arrived(self, msg):
+                received.append(msg)
+
+        client = MqttSnClient()
+        client.add_mqtt_sn_callback("sensors/+", Listener())
+        client.set_operators("sensors/+", [MqttSnDeduplicator(), MqttSnTumblingWindow(10)])
+        for timestamp, value in [(100, 1), (101, 1), (102, 3)]:
+            client.dispatch_message(message("sensors/1", timestamp, value))
+        self.assertEqual(received, [])
+        client.flush_listeners(False)
+        self.assertEqual(records(received), [(100, 110, 2, 1, 3, 2)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import hashlib
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnMessage
+from mqttsn12.client.MqttSnProcessListener import MqttSnProcessListener, attached_segments, close_attached_segments, run_offloaded, shared_memory
+from fake_gateway import FakeGateway
+
+def checksum(msg: MqttSnMessage) -> bytes:
+    return msg.get_topic_name().encode() + b":" + hashlib.sha256(msg.get_payload()).hexdigest().encode()
+
+@unittest.skipIf(shared_memory is None, "multiprocessing.shared_memory needs Python 3.8+")
+class TestProcessListener(unittest.TestCase):
+
+    def test_round_trip(self):
+        print("test_round_trip")
+        gateway = FakeGateway()
+        client = MqttSnClient()
+        client.open("127.0.0.1", gateway.port)
+        client.send_connect()
+        listener = MqttSnProcessListener(client, checksum, "mqttsn/test/results", result_qos=1, workers=2, slots=4, slot_size=64)
+        # Bigger than a slot every 5 messages: passed as bytes
+        payloads = [bytes([i]) * (100 if i % 5 == 0 else 10 + i) for i in range(20)]
+        try:
+            for payload in payloads:
+                listener.message_arrived(MqttSnMessage(1, "mqttsn/test/offload", 0, False, payload))
+            listener.flush()
+        finally:
+            listener.close()
+            client.close()
+            gateway.stop()
+        self.assertEqual(listener.errors, 0)
+        self.assertEqual(sorted(payload for topic_id, flags, payload in gateway.received),
+                         sorted(b"mqttsn/test/offload:" + hashlib.sha256(payload).hexdigest().encode() for payload in payloads))
+
+    def test_worker_segments(self):
+        print("test_worker_segments")
+        listener = MqttSnProcessListener(MqttSnClient(), checksum, slots=1, slot_size=16)
+        try:
+            listener.segment.buf[0:5] = b"hello"
+            # Run in this process as a worker would
+            result = run_offloaded(checksum, listener.segment.name, 0, 5, 1, "t", 0, False, b"")
+            self.assertEqual(result, b"t:" + hashlib.sha256(b"hello").hexdigest().encode())
+            self.assertIn(listener.segment.name, attached_segments)
+            close_attached_segments()
+            self.assertEqual(len(attached_segments), 0)
+        finally:
+            listener.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import logging
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from fake_gateway import FakeGateway
+
+class NoPubcompGateway(FakeGateway):
+
+    def process(self, msg_type: int, body: bytes, addr) -> None:
+        # PUBREL never acknowledged
+        if msg_type != 0x10:
+            super().process(msg_type, body, addr)
+
+class TestPublishAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.start(FakeGateway())
+
+    def start(self, gateway: FakeGateway) -> None:
+        self.gateway = gateway
+        self.client = MqttSnClient()
+        self.client.open("127.0.0.1", self.gateway.port)
+        self.client.send_connect()
+
+    def tearDown(self):
+        self.client.close()
+        self.gateway.stop()
+
+    def test_unrelated_packets_while_waiting(self):
+        print("test_unrelated_packets_while_waiting")
+        # PINGRESP, not expected by anybody, queued before the acknowledges (short topic: no REGISTER)
+        self.gateway.sock.sendto(bytes([2, 0x17]), self.gateway.clients[0])
+        futures = [self.client.publish_async("as", b"%d" % i, MqttSnConstants.QOS_1) for i in range(5)]
+        with self.assertLogs("mqttsn12.client.MqttSnClient", "WARNING") as logs:
+            self.assertTrue(self.client.wait_for_publishes(5))
+            logging.getLogger("mqttsn12.client.MqttSnClient").warning("done")
+        self.assertEqual([record.getMessage() for record in logs.records], ["done"])
+        self.assertTrue(all(future.done() for future in futures))
+
+    def test_publish_many_timeout(self):
+        print("test_publish_many_timeout")
+        self.tearDown()
+        self.start(NoPubcompGateway())
+        self.client.set_timeout(0.2)
+        # The PUBREC restarts the deadline: still waiting for PUBCOMP when wait_for_publishes() gives up
+        futures = self.client.publish_many([("as", b"%d" % i, MqttSnConstants.QOS_2, False) for i in range(3)])
+        self.assertEqual(len(futures), 3)
+        for future in futures:
+            self.assertIsInstance(future.exception(0), MqttSnClientException)
+    def test_send_chunked_timeout(self):
+        print("test_send_chunked_timeout")
+        self.tearDown()
+        self.start(NoPubcompGateway())
+        self.client.set_timeout(0.2)
+        with self.assertRaises(MqttSnClientException):
+            self.client.send_chunked("as", bytes(1000), MqttSnConstants.QOS_2, chunk_size=300)
+        self.assertEqual(len(self.client.inflight), 0)
+    def test_async_above_max_payload_with_mtu(self):
+        print("test_async_above_max_payload_with_mtu")
+        self.client.set_mtu(1400)
+        data = bytes(MqttSnConstants.MAX_PAYLOAD_LENGTH_EXTENDED + 1000)
+        future = self.client.publish_async("as", data, MqttSnConstants.QOS_1)
+        self.assertTrue(self.client.wait_for_publishes(10))
+        self.assertEqual(future.result(0), int.from_bytes(b"as", "big"))
+        self.assertGreater(sum(len(payload) for topic_id, flags, payload in self.gateway.received), len(data))
+
+    def test_chunked_publish_timeout(self):
+        print("test_chunked_publish_timeout")
+        self.tearDown()
+        self.start(NoPubcompGateway())
+        self.client.set_timeout(0.2)
+        self.client.set_mtu(500)
+        with self.assertRaises(MqttSnClientException):
+            self.client.send_publish("as", bytes(2000), MqttSnConstants.QOS_2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,6 +20,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import os
 import time
 import sys
 import unittest
@@ -94,6 +95,84 @@ class TestPublisher(unittest.TestCase):
 
         self.mqttsn_client.send_disconnect(0)
 
+    def test_register_many(self):
+        print("test_register_many")
+        self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
+        self.mqttsn_client.send_connect()
+        topics = [f"mqttsn/test/register_many/{i}" for i in range(100)]
+        registered, failures = self.mqttsn_client.register_many(topics)
+
+        self.assertEqual(len(registered), len(topics))
+        self.assertEqual(len(failures), 0)
+        for topic in topics:
+            self.assertEqual(self.mqttsn_client.search_topic_id(topic), registered[topic])
+
+        self.mqttsn_client.send_publish(topics[0], 
+                        "test_register_many", 
+                        MqttSnConstants.QOS_1, 
+                        False);
+
+        self.mqttsn_client.send_disconnect(0)
+
+    def test_publish_async(self):
+        print("test_publish_async")
+        self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
+        self.mqttsn_client.send_connect()
+        futures = []
+        for i in range(10):
+            futures.append(self.mqttsn_client.publish_async("mqttsn/test/publish_async",
+                        f"test_publish_async {i}",
+                        MqttSnConstants.QOS_1 if i % 2 == 0 else MqttSnConstants.QOS_2,
+                        False))
+
+        self.assertTrue(self.mqttsn_client.wait_for_publishes(10))
+        for future in futures:
+            self.assertEqual(future.result(0), self.mqttsn_client.search_topic_id("mqttsn/test/publish_async"))
+
+        self.mqttsn_client.send_disconnect(0)
+
+    def test_publish_many(self):
+        print("test_publish_many")
+        self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
+        self.mqttsn_client.send_connect()
+        messages = [(f"mqttsn/test/publish_many/{i % 10}", f"test_publish_many {i}", MqttSnConstants.QOS_1, False)
+                    for i in range(100)]
+        futures = self.mqttsn_client.publish_many(messages)
+
+        self.assertEqual(len(futures), len(messages))
+        for future in futures:
+            self.assertIsNone(future.exception(0))
+
+        self.mqttsn_client.send_disconnect(0)
+
+    def test_publish_mtu(self):
+        print("test_publish_mtu")
+        self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
+        self.mqttsn_client.send_connect()
+        self.mqttsn_client.set_mtu(1200)
+        self.mqttsn_client.send_publish("mqttsn/test/publish_mtu",
+                        os.urandom(10000),
+                        MqttSnConstants.QOS_1,
+                        False);
+
+        self.mqttsn_client.send_disconnect(0)
+
+    def test_publish_coalesced(self):
+        print("test_publish_coalesced")
+        self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
+        self.mqttsn_client.send_connect()
+        self.mqttsn_client.set_coalescing(True, max_bytes=512, max_delay=0.05)
+        for i in range(100):
+            self.mqttsn_client.send_publish("mqttsn/test/publish_coalesced",
+                        f"{i}",
+                        MqttSnConstants.QOS_0,
+                        False);
+        self.mqttsn_client.flush_publishes()
+
+        self.assertEqual(self.mqttsn_client.coalescer.get_stats()["messages"], 100)
+
+        self.mqttsn_client.send_disconnect(0)
+
     def test_custom_client_id(self):
         print("test_pub_qos0")
         self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import struct
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnSchema import MqttSnSchema
+
+class TestSchema(unittest.TestCase):
+    READING = MqttSnSchema("Reading", [("time", "I"), ("temperature", "f"), ("humidity", "f")])
+
+    def test_record(self):
+        print("test_record")
+        payload = self.READING.pack(1700000000, 21.5, 40.0)
+        self.assertEqual(len(payload), 12)
+        record = self.READING.unpack(payload)
+        self.assertEqual(record.temperature, 21.5)
+        self.assertEqual(self.READING.pack(record), payload)
+        with self.assertRaises(MqttSnClientException):
+            self.READING.unpack(payload + b"\x00")
+        with self.assertRaises(MqttSnClientException):
+            self.READING.pack(1, 2.0)
+
+    def test_records(self):
+        print("test_records")
+        records = [(i, 20.0 + i, 40.0) for i in range(10)]
+        payload = self.READING.pack_many(records)
+        self.assertEqual([tuple(record) for record in self.READING.unpack_many(payload)], records)
+        with self.assertRaises(MqttSnClientException):
+            self.READING.cast(payload)
+        vector = MqttSnSchema("Vector", [("x", "f"), ("y", "f"), ("z", "f")])
+        view = vector.cast(vector.pack_many([(1, 2, 3), (4, 5, 6)]))
+        self.assertEqual(view.shape, (2, 3))
+        self.assertEqual(view[1, 2], 6.0)
+
+    def test_cast_standard_size(self):
+        print("test_cast_standard_size")
+        longs = MqttSnSchema("Longs", [("a", "l"), ("b", "l")])
+        payload = longs.pack_many([(1, 2), (3, 4)])
+        if struct.calcsize("@l") == struct.calcsize("<l"):
+            self.assertEqual(longs.cast(payload).tolist(), [[1, 2], [3, 4]])
+        else:
+            with self.assertRaises(MqttSnClientException):
+                longs.cast(payload)
+        native = MqttSnSchema("Longs", [("a", "l"), ("b", "l")], "@")
+        self.assertEqual(native.cast(native.pack_many([(1, 2), (3, 4)])).tolist(), [[1, 2], [3, 4]])
+
+    def test_topic_schema(self):
+        print("test_topic_schema")
+        client = MqttSnClient()
+        client.set_schema("sensors/+/reading", self.READING)
+        self.assertIs(client.get_schema("sensors/1/reading"), self.READING)
+        self.assertIsNone(client.get_schema("sensors/1/status"))
+        msg = MqttSnMessage(1, "sensors/1/reading", 0, False, self.READING.pack(1, 21.5, 40.0))
+        msg = client.prepare_message(msg)
+        self.assertEqual(msg.get_record().humidity, 40.0)
+        self.assertEqual(msg.copy().get_schema(), self.READING)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import math
+import unittest
+from array import array
+
+from mqttsn12.client.MqttSnClient import MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnSeries import CODEC_DELTA, decode_series, encode_series, is_series
+
+class TestSeries(unittest.TestCase):
+
+    def test_delta(self):
+        print("test_delta")
+        timestamps = [1700000000000 + 1000 * i + (i % 3) for i in range(1000)]
+        payload = encode_series(timestamps)
+        self.assertTrue(is_series(payload))
+        self.assertLess(len(payload), 8 * len(timestamps) / 3)
+        self.assertEqual(decode_series(payload), array("q", timestamps))
+        extremes = array("q", [-1, 2 ** 63 - 1, -2 ** 63, 0])
+        self.assertEqual(decode_series(encode_series(extremes)), extremes)
+        with self.assertRaises(MqttSnClientException):
+            decode_series(payload[:-1])
+
+    def test_xor(self):
+        print("test_xor")
+        temperatures = [round(20 + math.sin(i / 50), 1) for i in range(1000)]
+        payload = encode_series(temperatures)
+        self.assertLess(len(payload), 8 * len(temperatures) / 3)
+        self.assertEqual(decode_series(payload), array("d", temperatures))
+        samples = array("f", [0.0, -0.0, math.inf, 1.5, 1.5])
+        self.assertEqual(decode_series(encode_series(samples)).tobytes(), samples.tobytes())
+        with self.assertRaises(MqttSnClientException):
+            encode_series(samples, codec=CODEC_DELTA)
+
+    def test_message(self):
+        print("test_message")
+        msg = MqttSnMessage(1, "sensors/t", 0, False)
+        msg.set_series(range(10), "H")
+        self.assertTrue(msg.is_series())
+        self.assertEqual(msg.get_series(), array("H", range(10)))
+
+if __name__ == '__main__':
+    unittest.main()
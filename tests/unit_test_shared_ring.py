@@ -0,0 +1,100 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.client.MqttSnClient import MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnSharedRing import MqttSnRingWriter, MqttSnRingReader, shared_memory
+
+@unittest.skipIf(shared_memory is None, "multiprocessing.shared_memory needs Python 3.8+")
+class TestSharedRing(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = MqttSnRingWriter(slots=4, slot_size=8)
+
+    def tearDown(self):
+        self.writer.close()
+
+    def write(self, count: int, start: int = 0) -> None:
+        for i in range(start, start + count):
+            self.writer.message_arrived(MqttSnMessage(i + 1, "t", i % 3, i % 2 == 0, b"m%d" % i))
+
+    def test_round_trip(self):
+        print("test_round_trip")
+        reader = MqttSnRingReader(self.writer.get_name())
+        try:
+            self.write(3)
+            messages = reader.read(10)
+            self.assertEqual([bytes(msg.get_payload()) for msg in messages], [b"m0", b"m1", b"m2"])
+            self.assertEqual([msg.get_topic_id() for msg in messages], [1, 2, 3])
+            self.assertEqual([msg.get_qos() for msg in messages], [0, 1, 2])
+            self.assertEqual([msg.get_retain() for msg in messages], [True, False, True])
+            self.assertEqual(reader.read(10), [])
+            self.assertEqual(reader.lost, 0)
+        finally:
+            reader.close()
+
+    def test_from_start(self):
+        print("test_from_start")
+        self.write(2)
+        late = MqttSnRingReader(self.writer.get_name())
+        first = MqttSnRingReader(self.writer.get_name(), from_start=True)
+        try:
+            self.assertEqual(late.read(10), [])
+            self.assertEqual([bytes(msg.get_payload()) for msg in first.read(10)], [b"m0", b"m1"])
+        finally:
+            late.close()
+            first.close()
+
+    def test_overrun(self):
+        print("test_overrun")
+        reader = MqttSnRingReader(self.writer.get_name())
+        try:
+            # 10 messages in 4 slots: the 6 oldest are overwritten
+            self.write(10)
+            messages = reader.read(10)
+            self.assertEqual([bytes(msg.get_payload()) for msg in messages], [b"m6", b"m7", b"m8", b"m9"])
+            self.assertEqual(reader.lost, 6)
+            self.write(2, 10)
+            self.assertEqual(len(reader.read(10)), 2)
+            self.assertEqual(reader.lost, 6)
+        finally:
+            reader.close()
+
+    def test_truncated(self):
+        print("test_truncated")
+        reader = MqttSnRingReader(self.writer.get_name())
+        try:
+            self.writer.message_arrived(MqttSnMessage(1, "t", 0, False, b"0123456789"))
+            self.assertEqual(bytes(reader.read(1)[0].get_payload()), b"01234567")
+            self.assertEqual(self.writer.truncated, 1)
+        finally:
+            reader.close()
+
+    def test_invalid_parameters(self):
+        print("test_invalid_parameters")
+        with self.assertRaises(MqttSnClientException):
+            MqttSnRingWriter(slots=0)
+
+if __name__ == '__main__':
+    unittest.main()
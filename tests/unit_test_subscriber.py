@@ -123,7 +123,28 @@ class TestSubscriber(unittest.TestCase):
         time.sleep(1)
                         
         self.mqttsn_client.send_unsubscribe("AA")
-            
+
+        self.mqttsn_client.send_disconnect(0)
+
+    def test_subscribe_many(self):
+        print("test_subscribe_many")
+
+        myListener = MyListener()
+        topic_filters = [f"mqttsn/test/subscribe_many/{i}" for i in range(50)] + ["mqttsn/test/subscribe_many/#", "AB"]
+
+        self.mqttsn_client.open(self.MQTT_SN_HOST, self.MQTT_SN_PORT)
+        self.mqttsn_client.send_connect()
+        granted, failures = self.mqttsn_client.subscribe_many(
+                        [(topic_filter, MqttSnConstants.QOS_1, myListener) for topic_filter in topic_filters])
+
+        self.assertEqual(len(failures), 0)
+        self.assertEqual(set(granted), set(topic_filters))
+
+        unsubscribed, failures = self.mqttsn_client.unsubscribe_many(topic_filters)
+
+        self.assertEqual(len(failures), 0)
+        self.assertEqual(set(unsubscribed), set(topic_filters))
+
         self.mqttsn_client.send_disconnect(0)
 
     def test_unsubcribe_predefined_topic(self):
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnTopicAliases import MqttSnTopicAliases
+from mqttsn12.client.MqttSnTopicCatalog import MqttSnTopicCatalog
+from fake_gateway import FakeGateway
+
+class TestTopicAliases(unittest.TestCase):
+
+    def alias_table(self):
+        catalog = MqttSnTopicCatalog()
+        catalog.parse(["*,mqttsn/test/alias,7"])
+        return catalog
+
+    def test_hot_threshold(self):
+        print("test_hot_threshold")
+        aliases = MqttSnTopicAliases(hot_threshold=3, window=3600)
+        self.assertEqual([aliases.observe("a") for _ in range(4)], [False, False, True, True])
+        self.assertTrue(aliases.is_hot("a"))
+        self.assertFalse(aliases.observe("b"))
+        self.assertEqual(aliases.get_hot_topics(), ["a"])
+
+    def test_max_hot(self):
+        print("test_max_hot")
+        aliases = MqttSnTopicAliases(hot_threshold=1, window=3600)
+        aliases.max_hot = 1
+        aliases.observe("a")
+        for _ in range(2):
+            aliases.observe("b")
+        # 'b' is hotter and replaces 'a'
+        self.assertEqual(aliases.get_hot_topics(), ["b"])
+
+    def test_alias_of_cold_topic(self):
+        print("test_alias_of_cold_topic")
+        aliases = MqttSnTopicAliases(self.alias_table(), hot_threshold=100, window=3600)
+        self.assertFalse(aliases.observe("mqttsn/test/alias"))
+        self.assertEqual(aliases.get_alias("mqttsn/test/alias"), 7)
+        self.assertIsNone(aliases.get_alias("mqttsn/test/other"))
+
+    def test_manifest(self):
+        print("test_manifest")
+        aliases = MqttSnTopicAliases(self.alias_table(), hot_threshold=1, window=3600)
+        for topic_name in ("mqttsn/test/alias", "mqttsn/test/hot", "mqttsn/test/hot"):
+            aliases.observe(topic_name)
+        self.assertEqual(aliases.to_manifest(7), ["*,mqttsn/test/hot,8"])
+
+    def test_invalid_parameters(self):
+        print("test_invalid_parameters")
+        with self.assertRaises(MqttSnClientException):
+            MqttSnTopicAliases(hot_threshold=0)
+        with self.assertRaises(MqttSnClientException):
+            MqttSnTopicAliases(window=0)
+
+    def test_resolve_publish_topic(self):
+        print("test_resolve_publish_topic")
+        gateway = FakeGateway()
+        client = MqttSnClient()
+        client.open("127.0.0.1", gateway.port)
+        client.send_connect()
+        client.set_topic_aliases(MqttSnTopicAliases(self.alias_table(), hot_threshold=2, window=3600))
+        try:
+            # Cold but shared: no REGISTER
+            self.assertEqual(client.resolve_publish_topic("mqttsn/test/alias"), (7, MqttSnConstants.TOPIC_TYPE_PREDEFINED))
+            self.assertNotIn("mqttsn/test/alias", gateway.topics)
+            client.resolve_publish_topic("mqttsn/test/hot")
+            self.assertFalse(client.topic_map.is_pinned("mqttsn/test/hot"))
+            topic_id, topic_type = client.resolve_publish_topic("mqttsn/test/hot")
+            self.assertEqual((topic_id, topic_type), (gateway.topics["mqttsn/test/hot"], MqttSnConstants.TOPIC_TYPE_NORMAL))
+            self.assertTrue(client.topic_map.is_pinned("mqttsn/test/hot"))
+        finally:
+            client.close()
+            gateway.stop()
+
+if __name__ == '__main__':
+    unittest.main()
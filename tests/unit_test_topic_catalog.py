@@ -0,0 +1,64 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnTopicCatalog import MqttSnTopicCatalog
+
+class TestTopicCatalog(unittest.TestCase):
+
+    MANIFEST = [
+        "# ClientId, TopicName, TopicId",
+        "",
+        "*,mqttsn/test/predefined_pub,1",
+        "*,mqttsn/test/predefined_retained,2",
+        "python,mqttsn/test/predefined_retained,3",
+        "other,mqttsn/test/other,4",
+    ]
+
+    def test_parse_shared_entries(self):
+        print("test_parse_shared_entries")
+        catalog = MqttSnTopicCatalog()
+        self.assertEqual(catalog.parse(self.MANIFEST), 2)
+        self.assertEqual(catalog.get_topic_id("mqttsn/test/predefined_pub"), 1)
+        self.assertEqual(catalog.get_topic_name(2), "mqttsn/test/predefined_retained")
+        self.assertNotIn("mqttsn/test/other", catalog)
+
+    def test_parse_client_entries_override(self):
+        print("test_parse_client_entries_override")
+        catalog = MqttSnTopicCatalog()
+        catalog.parse(self.MANIFEST, "python")
+        self.assertEqual(catalog.get_topic_id("mqttsn/test/predefined_retained"), 3)
+        self.assertEqual(catalog.get_topic_name(3), "mqttsn/test/predefined_retained")
+        self.assertIsNone(catalog.get_topic_name(2))
+
+    def test_parse_invalid_line(self):
+        print("test_parse_invalid_line")
+        catalog = MqttSnTopicCatalog()
+        with self.assertRaises(MqttSnClientException):
+            catalog.parse(["*,mqttsn/test/predefined_pub"])
+        with self.assertRaises(MqttSnClientException):
+            catalog.parse(["*,mqttsn/test/predefined_pub,abc"])
+
+if __name__ == '__main__':
+    unittest.main()
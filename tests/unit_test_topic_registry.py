@@ -0,0 +1,156 @@
+#!/usr/bin/env python3 
+# MIT License
+# 
+# Copyright (c) 2025 Marco Ratto
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import time
+import unittest
+
+from mqttsn12.MqttSnConstants import MqttSnConstants
+from mqttsn12.client.MqttSnClient import MqttSnClient, MqttSnListener, MqttSnMessage
+from mqttsn12.client.MqttSnClientException import MqttSnClientException
+from mqttsn12.client.MqttSnTopicRegistry import MqttSnTopicRegistry
+from mqttsn12.client.MqttSnTopicAliases import MqttSnTopicAliases
+from fake_gateway import FakeGateway
+
+class Collector(MqttSnListener):
+
+    def __init__(self):
+        self.messages = []
+
+    def message_arrived(self, msg: MqttSnMessage) -> None:
+        self.messages.append((msg.get_topic_name(), bytes(msg.get_payload())))
+
+class TestTopicRegistry(unittest.TestCase):
+
+    def test_lookup_both_directions(self):
+        print("test_lookup_both_directions")
+        registry = MqttSnTopicRegistry()
+        registry.register(1, "mqttsn/test/a")
+        registry.register(2, "mqttsn/test/b")
+        self.assertEqual(registry.get_name(2), "mqttsn/test/b")
+        self.assertEqual(registry.get_id("mqttsn/test/a"), 1)
+        self.assertEqual(registry.unregister(1), "mqttsn/test/a")
+        self.assertIsNone(registry.get_id("mqttsn/test/a"))
+
+    def test_reregister_replaces_old_mapping(self):
+        print("test_reregister_replaces_old_mapping")
+        registry = MqttSnTopicRegistry()
+        registry.register(1, "mqttsn/test/a")
+        registry.register(1, "mqttsn/test/b")
+        self.assertIsNone(registry.get_id("mqttsn/test/a"))
+        registry.register(3, "mqttsn/test/b")
+        self.assertIsNone(registry.get_name(1))
+        self.assertEqual(len(registry), 1)
+
+    def test_lru_eviction(self):
+        print("test_lru_eviction")
+        registry = MqttSnTopicRegistry(capacity=2)
+        registry.register(1, "mqttsn/test/a")
+        registry.register(2, "mqttsn/test/b")
+        registry.get_id("mqttsn/test/a")
+        registry.register(3, "mqttsn/test/c")
+        self.assertEqual(len(registry), 2)
+        self.assertIsNone(registry.get_id("mqttsn/test/b"))
+        self.assertEqual(registry.get_id("mqttsn/test/a"), 1)
+        self.assertEqual(registry.evictions, 1)
+
+    def test_pinned_topics_are_not_evicted(self):
+        print("test_pinned_topics_are_not_evicted")
+        registry = MqttSnTopicRegistry(capacity=1)
+        registry.pin("mqttsn/test/a")
+        registry.register(1, "mqttsn/test/a")
+        registry.register(2, "mqttsn/test/b")
+        registry.register(3, "mqttsn/test/c")
+        self.assertEqual(registry.get_id("mqttsn/test/a"), 1)
+        self.assertIsNone(registry.get_id("mqttsn/test/b"))
+        self.assertEqual(len(registry), 2)
+
+    def test_inbound_topics_evicted(self):
+        print("test_inbound_topics_evicted")
+        registry = MqttSnTopicRegistry(capacity=1)
+        registry.register(1, "mqttsn/test/a")
+        registry.register(2, "mqttsn/test/b")
+        self.assertIsNone(registry.get_name(1))
+        self.assertEqual(len(registry), 1)
+
+    def test_wildcard_receive_after_eviction(self):
+        print("test_wildcard_receive_after_eviction")
+        gateway = FakeGateway(echo=False)
+        client = MqttSnClient()
+        client.open("127.0.0.1", gateway.port)
+        client.send_connect()
+        client.set_topic_registry_capacity(2)
+        collector = Collector()
+        try:
+            client.send_subscribe("mqttsn/test/wildcard/#", 0, collector)
+            topic_id = gateway.register(gateway.clients[0], "mqttsn/test/wildcard/a")
+            self.poll(client, lambda: topic_id in client.topic_map)
+            # Fill the registry with published topics
+            for i in range(4):
+                client.send_publish(f"mqttsn/test/published/{i}", b"x", 1)
+            self.assertNotIn(topic_id, client.topic_map)
+            gateway.publish(gateway.clients[0], topic_id, b"evicted", qos=1, message_id=7)
+            self.poll(client, lambda: len(gateway.rejected) > 0)
+            self.assertEqual(gateway.rejected, [(topic_id, MqttSnConstants.REJECTED_INVALID)])
+            self.assertEqual(collector.messages, [])
+            # The gateway registers the topic again
+            gateway.register(gateway.clients[0], "mqttsn/test/wildcard/a", message_id=2)
+            self.poll(client, lambda: topic_id in client.topic_map)
+            gateway.publish(gateway.clients[0], topic_id, b"registered again")
+            self.poll(client, lambda: len(collector.messages) > 0)
+            self.assertEqual(collector.messages, [("mqttsn/test/wildcard/a", b"registered again")])
+        finally:
+            client.close()
+            gateway.stop()
+
+    def test_cooled_alias_unpinned(self):
+        print("test_cooled_alias_unpinned")
+        gateway = FakeGateway()
+        client = MqttSnClient()
+        client.open("127.0.0.1", gateway.port)
+        client.send_connect()
+        aliases = MqttSnTopicAliases(hot_threshold=1, window=3600)
+        aliases.max_hot = 1
+        client.set_topic_aliases(aliases)
+        try:
+            client.resolve_publish_topic("mqttsn/test/a")
+            self.assertTrue(client.topic_map.is_pinned("mqttsn/test/a"))
+            for _ in range(2):
+                client.resolve_publish_topic("mqttsn/test/b")
+            self.assertFalse(client.topic_map.is_pinned("mqttsn/test/a"))
+            self.assertTrue(client.topic_map.is_pinned("mqttsn/test/b"))
+        finally:
+            client.close()
+            gateway.stop()
+
+    def poll(self, client: MqttSnClient, condition) -> None:
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            client.polling()
+            time.sleep(0.01)
+
+    def test_invalid_capacity(self):
+        print("test_invalid_capacity")
+        with self.assertRaises(MqttSnClientException):
+            MqttSnTopicRegistry().set_capacity(-1)
+
+if __name__ == '__main__':
+    unittest.main()